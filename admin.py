@@ -2,14 +2,27 @@
 Admin Page Class
 Administrative Interface
 """
+import os
+import threading
+import webbrowser
+from datetime import date, datetime
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+from widgets import PagedTreeview, ProgressDialog
+from backup import Backup, Restore, default_backup_path
+from reports import ReportEngine
 
 class AdminPage:
+    # Tables behind the statistics cards; audit_log feeds the activity list
+    STATS_TABLES = ('patients', 'doctors', 'staff', 'appointments', 'users')
+
     def __init__(self, root, app):
         self.root = root
         self.app = app
+        self.report_engine = ReportEngine(app.db)
+        self.stats = {}  # values shown on the cards
         self.create_widgets()
+        self.app.notifier.subscribe(self, self.STATS_TABLES + ('audit_log',), self.on_data_changed)
     
     def create_widgets(self):
         """Create admin page widgets"""
@@ -57,11 +70,12 @@ class AdminPage:
         stats_content.pack(fill='x', padx=20, pady=20)
         
         # Create stats grid
-        stats_grid = tk.Frame(stats_content, bg='white')
-        stats_grid.pack(fill='x')
+        self.stats_grid = tk.Frame(stats_content, bg='white')
+        self.stats_grid.pack(fill='x')
         
         # Load and display statistics
-        self.load_statistics(stats_grid)
+        self.stat_labels = self.create_stat_cards(self.stats_grid)
+        self.load_statistics()
         
         # Management sections
         sections_frame = tk.Frame(content_frame, bg='#f0f0f0')
@@ -117,13 +131,21 @@ class AdminPage:
                  bg='#2ecc71', fg='white', relief='flat', cursor='hand2',
                  command=self.database_backup).pack(side='left', padx=(0, 10), ipady=8, ipadx=15)
         
+        tk.Button(system_buttons, text="Restore Backup", font=('Arial', 12),
+                 bg='#c0392b', fg='white', relief='flat', cursor='hand2',
+                 command=self.restore_backup).pack(side='left', padx=(0, 10), ipady=8, ipadx=15)
+        
         tk.Button(system_buttons, text="System Settings", font=('Arial', 12),
                  bg='#34495e', fg='white', relief='flat', cursor='hand2',
                  command=self.system_settings).pack(side='left', padx=(0, 10), ipady=8, ipadx=15)
         
         tk.Button(system_buttons, text="Generate Reports", font=('Arial', 12),
                  bg='#e67e22', fg='white', relief='flat', cursor='hand2',
-                 command=self.generate_reports).pack(side='left', ipady=8, ipadx=15)
+                 command=self.generate_reports).pack(side='left', padx=(0, 10), ipady=8, ipadx=15)
+        
+        tk.Button(system_buttons, text="Query Diagnostics", font=('Arial', 12),
+                 bg='#7f8c8d', fg='white', relief='flat', cursor='hand2',
+                 command=self.query_diagnostics).pack(side='left', ipady=8, ipadx=15)
         
         # Recent Activity
         activity_frame = tk.Frame(sections_frame, bg='white', relief='raised', bd=1)
@@ -147,71 +169,95 @@ class AdminPage:
         # Load recent activity
         self.load_recent_activity()
     
-    def load_statistics(self, parent):
-        """Load and display system statistics"""
-        try:
-            # Get statistics from database
-            stats = self.app.db.get_system_statistics()
+    def on_show(self):
+        """Called by the page manager when this cached page is shown again"""
+        self.app.notifier.subscribe(self, self.STATS_TABLES + ('audit_log',), self.on_data_changed)
+        self.load_statistics()
+        self.load_recent_activity()
+
+    def on_hide(self):
+        self.app.notifier.unsubscribe(self)
+
+    on_destroy = on_hide
+
+    def on_data_changed(self, tables):
+        """Pushed by the app's change notifier"""
+        if tables & set(self.STATS_TABLES):
+            self.load_statistics()
+        if 'audit_log' in tables:
+            self.load_recent_activity()
+    
+    def create_stat_cards(self, parent):
+        """Create the statistic cards once; returns {stat key: value label}"""
+        stat_items = [
+            ('total_patients', "Total Patients", '#3498db'),
+            ('total_doctors', "Total Doctors", '#2ecc71'),
+            ('total_staff', "Total Staff", '#f39c12'),
+            ('todays_appointments', "Today's Appointments", '#e74c3c'),
+            ('active_users', "Active Users", '#9b59b6'),
+            ('uptime', "System Uptime", '#34495e')
+        ]
+        labels = {}
+        for i, (key, label, color) in enumerate(stat_items):
+            row = i // 3
+            col = i % 3
             
-            # Create stat cards
-            stat_items = [
-                ("Total Patients", stats.get('total_patients', 0), '#3498db'),
-                ("Total Doctors", stats.get('total_doctors', 0), '#2ecc71'),
-                ("Total Staff", stats.get('total_staff', 0), '#f39c12'),
-                ("Today's Appointments", stats.get('todays_appointments', 0), '#e74c3c'),
-                ("Active Users", stats.get('active_users', 0), '#9b59b6'),
-                ("System Uptime", stats.get('uptime', 'N/A'), '#34495e')
-            ]
+            stat_card = tk.Frame(parent, bg=color, relief='raised', bd=2)
+            stat_card.grid(row=row, column=col, padx=10, pady=10, sticky='ew', ipadx=20, ipady=15)
             
-            for i, (label, value, color) in enumerate(stat_items):
-                row = i // 3
-                col = i % 3
-                
-                stat_card = tk.Frame(parent, bg=color, relief='raised', bd=2)
-                stat_card.grid(row=row, column=col, padx=10, pady=10, sticky='ew', ipadx=20, ipady=15)
-                
-                tk.Label(stat_card, text=str(value), font=('Arial', 24, 'bold'),
-                        bg=color, fg='white').pack()
-                
-                tk.Label(stat_card, text=label, font=('Arial', 12),
-                        bg=color, fg='white').pack()
+            labels[key] = tk.Label(stat_card, text="–", font=('Arial', 24, 'bold'),
+                                   bg=color, fg='white')
+            labels[key].pack()
             
-            # Configure grid weights
-            for i in range(3):
-                parent.grid_columnconfigure(i, weight=1)
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load statistics: {str(e)}")
+            tk.Label(stat_card, text=label, font=('Arial', 12),
+                    bg=color, fg='white').pack()
+        
+        # Configure grid weights
+        for i in range(3):
+            parent.grid_columnconfigure(i, weight=1)
+        return labels
+    
+    def load_statistics(self):
+        """Load system statistics in the background and update the cards"""
+        self.app.worker.submit(self.app.db.get_system_statistics, owner=self,
+                               on_success=self.show_statistics,
+                               on_error=lambda e: messagebox.showerror("Error", f"Failed to load statistics: {e}"))
+    
+    def show_statistics(self, stats):
+        for key, label in self.stat_labels.items():
+            value = stats.get(key, 'N/A' if key == 'uptime' else 0)
+            if self.stats.get(key) != value:
+                label.config(text=str(value))
+                self.stats[key] = value
     
     def load_recent_activity(self):
         """Load recent system activity"""
-        try:
-            activities = self.app.db.get_recent_activity()
-            
-            self.activity_listbox.delete(0, tk.END)
-            
-            for activity in activities:
-                activity_text = f"{activity.get('timestamp', '')} - {activity.get('action', '')} by {activity.get('user', '')}"
-                self.activity_listbox.insert(tk.END, activity_text)
-                
-        except Exception as e:
-            # If no activity log exists, show sample data
-            sample_activities = [
-                "2024-01-15 10:30:00 - User login: admin",
-                "2024-01-15 10:25:00 - New patient added: John Doe",
-                "2024-01-15 10:20:00 - Appointment scheduled: Dr. Smith",
-                "2024-01-15 10:15:00 - Staff member updated: Jane Wilson",
-                "2024-01-15 10:10:00 - System backup completed"
-            ]
-            
-            for activity in sample_activities:
-                self.activity_listbox.insert(tk.END, activity)
+        self.app.worker.submit(self.app.db.get_recent_activity, owner=self,
+                               on_success=self.show_recent_activity,
+                               on_error=lambda e: self.activity_listbox.insert(tk.END, f"Failed to load activity: {e}"))
+    
+    def show_recent_activity(self, activities):
+        self.activity_listbox.delete(0, tk.END)
+        if not activities:
+            self.activity_listbox.insert(tk.END, "No activity recorded yet")
+        for activity in activities:
+            self.activity_listbox.insert(tk.END, self.describe_activity(activity))
+    
+    def describe_activity(self, activity):
+        target = activity['table_name'] or ''
+        if activity['row_id'] is not None:
+            target += f" #{activity['row_id']}"
+        text = f"{activity['occurred_at']:%Y-%m-%d %H:%M:%S} - {activity['action']} {target}".rstrip()
+        text += f" by {activity['username'] or 'system'}"
+        if activity['status'] != 'ok':
+            text += f" ({activity['status']})"
+        return text
     
     def manage_users(self):
         """Open user management window"""
         user_window = tk.Toplevel(self.root)
         user_window.title("User Management")
-        user_window.geometry("800x600")
+        user_window.geometry("900x620")
         user_window.configure(bg='white')
         user_window.transient(self.root)
         user_window.grab_set()
@@ -220,9 +266,23 @@ class AdminPage:
         tk.Label(user_window, text="User Management", font=('Arial', 18, 'bold'),
                 bg='white', fg='#2c3e50').pack(pady=20)
         
+        # Filters
+        filter_frame = tk.Frame(user_window, bg='white')
+        filter_frame.pack(fill='x', padx=20)
+        tk.Label(filter_frame, text="Search:", font=('Arial', 11), bg='white').pack(side='left', padx=(0, 5))
+        search_entry = tk.Entry(filter_frame, font=('Arial', 11), width=20, relief='solid', bd=1)
+        search_entry.pack(side='left', padx=(0, 15))
+        tk.Label(filter_frame, text="Role:", font=('Arial', 11), bg='white').pack(side='left', padx=(0, 5))
+        role_combo = ttk.Combobox(filter_frame, values=['', 'Admin', 'Doctor', 'Nurse', 'Patient'],
+                                  state='readonly', width=10)
+        role_combo.pack(side='left', padx=(0, 15))
+        tk.Label(filter_frame, text="Status:", font=('Arial', 11), bg='white').pack(side='left', padx=(0, 5))
+        status_combo = ttk.Combobox(filter_frame, values=['', 'Active', 'Disabled'], state='readonly', width=10)
+        status_combo.pack(side='left', padx=(0, 15))
+        
         # Users list
         users_frame = tk.Frame(user_window, bg='white')
-        users_frame.pack(fill='both', expand=True, padx=20, pady=20)
+        users_frame.pack(fill='both', expand=True, padx=20, pady=15)
         
         columns = ('ID', 'Username', 'Full Name', 'Role', 'Status', 'Last Login')
         users_tree = ttk.Treeview(users_frame, columns=columns, show='headings', height=15)
@@ -231,26 +291,150 @@ class AdminPage:
             users_tree.heading(col, text=col)
             users_tree.column(col, width=120)
         
-        users_tree.pack(fill='both', expand=True)
-        
-        # Load users
-        try:
-            users = self.app.db.get_all_users()
-            for user in users:
-                users_tree.insert('', 'end', values=(
-                    user.get('id', ''),
-                    user.get('username', ''),
-                    user.get('full_name', ''),
-                    user.get('role', ''),
-                    'Active',  # Default status
-                    user.get('last_login', 'Never')
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load users: {str(e)}")
+        scrollbar = ttk.Scrollbar(users_frame, orient='vertical', command=users_tree.yview)
+        users_tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+        
+        # Sort and filter state read by every page fetch
+        view = {'sort': 'username', 'descending': False, 'filters': {}}
+        sort_columns = {'Username': 'username', 'Full Name': 'full_name', 'Last Login': 'last_login'}
+        
+        def fetch_page(after_key=None, limit=100, before_key=None):
+            return self.app.db.get_users_page(after_key, limit, before_key, view['sort'], view['descending'],
+                                              **view['filters'])
+        
+        def row_key(user):
+            return tuple(user[c] for c in self.app.db.USER_SORTS[view['sort']])
+        
+        table = PagedTreeview(
+            users_tree, scrollbar, self.app.worker, user_window, fetch_page,
+            lambda user: (user['id'], user['username'], user['full_name'], user['role'],
+                          'Active' if user['is_active'] else 'Disabled',
+                          user['last_login'].strftime('%Y-%m-%d %H:%M') if user['last_login'] else 'Never'),
+            row_key=row_key,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load users: {e}", parent=user_window))
+        
+        def apply_filters(_event=None):
+            status = status_combo.get()
+            view['filters'] = {
+                'role': role_combo.get() or None,
+                'active': None if not status else status == 'Active',
+                'search': search_entry.get().strip() or None,
+            }
+            table.reload()
+        
+        def show_sort():
+            for col, key in sort_columns.items():
+                arrow = (' ▼' if view['descending'] else ' ▲') if key == view['sort'] else ''
+                users_tree.heading(col, text=col + arrow)
+        
+        def sort_by(heading):
+            sort = sort_columns[heading]
+            if view['sort'] == sort:
+                view['descending'] = not view['descending']
+            else:
+                # Most recent logins first; names A-Z
+                view['sort'], view['descending'] = sort, sort == 'last_login'
+            show_sort()
+            table.reload()
+        
+        for heading in sort_columns:
+            users_tree.heading(heading, command=lambda h=heading: sort_by(h))
+        role_combo.bind('<<ComboboxSelected>>', apply_filters)
+        status_combo.bind('<<ComboboxSelected>>', apply_filters)
+        search_entry.bind('<Return>', apply_filters)
+        tk.Button(filter_frame, text="Search", font=('Arial', 10), bg='#3498db', fg='white', relief='flat',
+                  cursor='hand2', command=apply_filters).pack(side='left', ipadx=10)
+        
+        def toggle_active():
+            selected = users_tree.selection()
+            if not selected:
+                messagebox.showerror("Error", "Please select a user", parent=user_window)
+                return
+            user = table.row(selected[0])
+            if user['id'] == (self.app.current_user or {}).get('id'):
+                messagebox.showerror("Error", "You cannot disable your own account", parent=user_window)
+                return
+            action = "disable" if user['is_active'] else "enable"
+            if not messagebox.askyesno("Confirm", f"Do you want to {action} {user['username']}?", parent=user_window):
+                return
+            self.app.worker.submit(self.app.db.set_user_active, user['id'], not user['is_active'], owner=user_window,
+                                   on_success=lambda ok: apply_filters() if ok else messagebox.showerror(
+                                       "Error", "Failed to update user", parent=user_window),
+                                   on_error=lambda e: messagebox.showerror("Error", f"Failed to update user: {e}",
+                                                                           parent=user_window))
+        
+        tk.Button(user_window, text="Enable / Disable", font=('Arial', 12), bg='#f39c12', fg='white',
+                  relief='flat', cursor='hand2', command=toggle_active).pack(pady=(0, 15), ipady=5, ipadx=15)
+        user_window.bind('<Destroy>', lambda e: self.app.worker.cancel(user_window) if e.widget is user_window else None)
+        
+        show_sort()
+        table.reload()
     
     def view_user_logs(self):
         """View user activity logs"""
-        messagebox.showinfo("User Logs", "User activity logs feature will be implemented here.")
+        log_window = tk.Toplevel(self.root)
+        log_window.title("User Activity Logs")
+        log_window.geometry("1000x600")
+        log_window.configure(bg='white')
+        log_window.transient(self.root)
+        
+        tk.Label(log_window, text="User Activity Logs", font=('Arial', 18, 'bold'),
+                bg='white', fg='#2c3e50').pack(pady=(20, 10))
+        
+        # Filters
+        filter_frame = tk.Frame(log_window, bg='white')
+        filter_frame.pack(fill='x', padx=20)
+        filters = {}
+        for label, key, values in (("User:", 'username', []),
+                                   ("Action:", 'action', ['add', 'update', 'delete', 'status', 'login',
+                                                          'logout', 'import', 'restore']),
+                                   ("Table:", 'table', ['patients', 'doctors', 'staff', 'appointments', 'users',
+                                                        'doctor_availability_exceptions'])):
+            tk.Label(filter_frame, text=label, font=('Arial', 11), bg='white').pack(side='left', padx=(0, 5))
+            combo = ttk.Combobox(filter_frame, values=[''] + values, state='readonly', width=16)
+            combo.pack(side='left', padx=(0, 15))
+            filters[key] = combo
+        
+        # Log table
+        logs_frame = tk.Frame(log_window, bg='white')
+        logs_frame.pack(fill='both', expand=True, padx=20, pady=15)
+        columns = ('Time', 'User', 'Action', 'Table', 'Row', 'Status', 'Details')
+        logs_tree = ttk.Treeview(logs_frame, columns=columns, show='headings', height=18)
+        for col, width in zip(columns, (150, 100, 70, 150, 60, 60, 380)):
+            logs_tree.heading(col, text=col)
+            logs_tree.column(col, width=width, minwidth=50)
+        scrollbar = ttk.Scrollbar(logs_frame, orient='vertical', command=logs_tree.yview)
+        logs_tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+        
+        selected = {}  # current filter values, read by every page fetch
+        
+        def fetch_page(after_key=None, limit=100, before_key=None):
+            return self.app.db.get_audit_log_page(after_key, limit, before_key, **selected)
+        
+        table = PagedTreeview(
+            logs_tree, scrollbar, self.app.worker, log_window, fetch_page,
+            lambda log: (f"{log['occurred_at']:%Y-%m-%d %H:%M:%S}", log['username'] or '', log['action'],
+                         log['table_name'] or '', '' if log['row_id'] is None else log['row_id'],
+                         log['status'], log['details'] or ''),
+            descending=True,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load logs: {e}", parent=log_window))
+        
+        def apply_filters(_event=None):
+            selected.clear()
+            selected.update({key: combo.get() or None for key, combo in filters.items()})
+            table.reload()
+        
+        for combo in filters.values():
+            combo.bind('<<ComboboxSelected>>', apply_filters)
+        tk.Button(filter_frame, text="Refresh", font=('Arial', 10), bg='#3498db', fg='white', relief='flat',
+                  cursor='hand2', command=apply_filters).pack(side='left', ipadx=10)
+        log_window.bind('<Destroy>', lambda e: self.app.worker.cancel(log_window) if e.widget is log_window else None)
+        
+        self.app.worker.submit(self.app.db.get_audit_usernames, owner=log_window,
+                               on_success=lambda names: filters['username'].config(values=[''] + names))
+        apply_filters()
     
     def reset_password(self):
         """Reset user password"""
@@ -258,12 +442,59 @@ class AdminPage:
     
     def database_backup(self):
         """Create database backup"""
-        if messagebox.askyesno("Database Backup", "Are you sure you want to create a database backup?"):
-            try:
-                # Implement backup logic here
-                messagebox.showinfo("Success", "Database backup created successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Backup failed: {str(e)}")
+        default = default_backup_path()
+        path = filedialog.asksaveasfilename(
+            parent=self.root, title="Save Database Backup", defaultextension=".zip",
+            initialdir=os.path.abspath(os.path.dirname(default)), initialfile=os.path.basename(default),
+            filetypes=[("HealthNet backup", "*.zip")])
+        if not path:
+            return
+        cancel_event = threading.Event()
+        dialog = ProgressDialog(self.root, "Database Backup", "Taking snapshot...", on_stop=cancel_event.set)
+        
+        def progress(table, rows):
+            # Called on the worker thread; hand the update to the Tk thread
+            self.app.worker.post(dialog.update, f"Backing up {table}... {rows:,} rows written")
+        
+        def finished(summary, error=None):
+            dialog.close()
+            if error is not None:
+                messagebox.showerror("Error", f"Backup failed: {error}")
+            elif summary['cancelled']:
+                messagebox.showinfo("Database Backup", "Backup stopped; no file was written.")
+            else:
+                messagebox.showinfo("Success", f"Database backup created successfully!\n\n"
+                                               f"{summary['rows']:,} rows in {summary['seconds']}s\n{summary['path']}")
+        
+        backup = Backup(self.app.db, path, progress=progress, cancel_event=cancel_event)
+        self.app.worker.submit(backup.run, on_success=finished, on_error=lambda e: finished(None, e))
+    
+    def restore_backup(self):
+        """Replace the database contents with a backup"""
+        path = filedialog.askopenfilename(parent=self.root, title="Restore Database Backup",
+                                          filetypes=[("HealthNet backup", "*.zip"), ("All files", "*.*")])
+        if not path:
+            return
+        if not messagebox.askyesno("Restore Backup",
+                                   "Restoring replaces ALL current data with the contents of the backup.\n\n"
+                                   "Are you sure you want to continue?", icon='warning'):
+            return
+        dialog = ProgressDialog(self.root, "Restore Backup", "Verifying checksums...")
+        
+        def progress(table, rows, total):
+            self.app.worker.post(dialog.update, f"Restoring {table}... {rows:,} of {total:,} rows",
+                                 rows / total if total else 1.0)
+        
+        def finished(summary, error=None):
+            dialog.close()
+            if error is not None:
+                messagebox.showerror("Error", f"Restore failed: {error}")
+                return
+            messagebox.showinfo("Success", f"Restored {summary['rows']:,} rows from the backup taken "
+                                           f"{summary['created_at']} in {summary['seconds']}s.")
+        
+        restore = Restore(self.app.db, path, progress=progress)
+        self.app.worker.submit(restore.run, on_success=finished, on_error=lambda e: finished(None, e))
     
     def system_settings(self):
         """Open system settings"""
@@ -271,6 +502,149 @@ class AdminPage:
     
     def generate_reports(self):
         """Generate system reports"""
-        messagebox.showinfo("Generate Reports", "Report generation feature will be implemented here.")
-
+        report_window = tk.Toplevel(self.root)
+        report_window.title("Generate Reports")
+        report_window.geometry("460x360")
+        report_window.configure(bg='white')
+        report_window.transient(self.root)
+        
+        tk.Label(report_window, text="Generate Reports", font=('Arial', 18, 'bold'),
+                bg='white', fg='#2c3e50').pack(pady=(20, 10))
+        for title in self.app.db.REPORTS.values():
+            tk.Label(report_window, text=f"• {title}", font=('Arial', 10), bg='white',
+                    fg='#34495e').pack(anchor='w', padx=30)
+        
+        range_frame = tk.Frame(report_window, bg='white')
+        range_frame.pack(pady=15)
+        today = date.today()
+        entries = {}
+        for row, (label, default) in enumerate((("From (YYYY-MM-DD):", today.replace(day=1)),
+                                                 ("To (YYYY-MM-DD):", today))):
+            tk.Label(range_frame, text=label, font=('Arial', 11), bg='white').grid(row=row, column=0, sticky='w', pady=3)
+            entry = tk.Entry(range_frame, font=('Arial', 11), width=14)
+            entry.insert(0, default.isoformat())
+            entry.grid(row=row, column=1, padx=10, pady=3)
+            entries[row] = entry
+        
+        status_label = tk.Label(report_window, text="", font=('Arial', 10), bg='white', fg='#7f8c8d')
+        status_label.pack()
+        
+        def finished(summary, error=None):
+            if not report_window.winfo_exists():
+                return
+            generate_btn.config(state='normal')
+            if error is not None:
+                status_label.config(text="")
+                messagebox.showerror("Error", f"Report generation failed: {error}", parent=report_window)
+                return
+            source = "from cache" if summary['cached'] else "generated"
+            status_label.config(text=f"Reports {source} in {summary['seconds']}s: {summary['directory']}")
+            webbrowser.open("file://" + os.path.abspath(summary['index']))
+        
+        def generate():
+            try:
+                start_date = datetime.strptime(entries[0].get().strip(), "%Y-%m-%d").date()
+                end_date = datetime.strptime(entries[1].get().strip(), "%Y-%m-%d").date()
+            except ValueError:
+                messagebox.showerror("Error", "Dates must be in YYYY-MM-DD format", parent=report_window)
+                return
+            if end_date < start_date:
+                messagebox.showerror("Error", "The end date must not be before the start date", parent=report_window)
+                return
+            generate_btn.config(state='disabled')
+            status_label.config(text="Generating...")
+            self.app.worker.submit(self.report_engine.generate, start_date, end_date, owner=self,
+                                   on_success=finished, on_error=lambda e: finished(None, e))
+        
+        generate_btn = tk.Button(report_window, text="Generate", font=('Arial', 12, 'bold'),
+                                 bg='#e67e22', fg='white', relief='flat', cursor='hand2', command=generate)
+        generate_btn.pack(pady=10, ipadx=20, ipady=5)
     
+    def query_diagnostics(self):
+        """Per-method query timings and the slow-query log from the database profiler"""
+        profiler = self.app.db.profiler
+        diag_window = tk.Toplevel(self.root)
+        diag_window.title("Query Diagnostics")
+        diag_window.geometry("1000x650")
+        diag_window.configure(bg='white')
+        diag_window.transient(self.root)
+        
+        tk.Label(diag_window, text="Query Diagnostics", font=('Arial', 18, 'bold'),
+                bg='white', fg='#2c3e50').pack(pady=(20, 5))
+        since_label = tk.Label(diag_window, text="", font=('Arial', 10), bg='white', fg='#7f8c8d')
+        since_label.pack()
+        profiling_var = tk.BooleanVar(value=profiler.enabled)
+        tk.Checkbutton(diag_window, text="Profile queries (adds a little time to every query)",
+                       variable=profiling_var, bg='white', font=('Arial', 10),
+                       command=lambda: toggle_profiling()).pack()
+        
+        methods_frame = tk.Frame(diag_window, bg='white')
+        methods_frame.pack(fill='both', expand=True, padx=20, pady=10)
+        columns = ('Method', 'Calls', 'p50 ms', 'p95 ms', 'p99 ms', 'Max ms', 'Total ms', 'Rows', 'KB')
+        methods_tree = ttk.Treeview(methods_frame, columns=columns, show='headings', height=12)
+        for col, width in zip(columns, (240, 70, 80, 80, 80, 80, 90, 90, 80)):
+            methods_tree.heading(col, text=col)
+            methods_tree.column(col, width=width, minwidth=50, anchor='w' if col == 'Method' else 'e')
+        methods_scroll = ttk.Scrollbar(methods_frame, orient='vertical', command=methods_tree.yview)
+        methods_tree.configure(yscrollcommand=methods_scroll.set)
+        methods_tree.pack(side='left', fill='both', expand=True)
+        methods_scroll.pack(side='right', fill='y')
+        
+        tk.Label(diag_window, text=f"Slow queries (over {profiler.slow_ms} ms)", font=('Arial', 12, 'bold'),
+                bg='white', fg='#2c3e50').pack(anchor='w', padx=20)
+        slow_frame = tk.Frame(diag_window, bg='white')
+        slow_frame.pack(fill='both', expand=True, padx=20, pady=(5, 10))
+        slow_columns = ('Time', 'Method', 'ms', 'Rows', 'Query')
+        slow_tree = ttk.Treeview(slow_frame, columns=slow_columns, show='headings', height=8)
+        for col, width in zip(slow_columns, (140, 180, 70, 60, 520)):
+            slow_tree.heading(col, text=col)
+            slow_tree.column(col, width=width, minwidth=50)
+        slow_scroll = ttk.Scrollbar(slow_frame, orient='vertical', command=slow_tree.yview)
+        slow_tree.configure(yscrollcommand=slow_scroll.set)
+        slow_tree.pack(side='left', fill='both', expand=True)
+        slow_scroll.pack(side='right', fill='y')
+        
+        def refresh():
+            data = profiler.as_dict()
+            if profiler.enabled:
+                since_label.config(text=f"Since {data['since'].replace('T', ' ')}")
+            else:
+                since_label.config(text="Profiling is off; switch it on to collect query timings")
+            methods_tree.delete(*methods_tree.get_children())
+            for name, stats in data['methods'].items():
+                methods_tree.insert('', 'end', values=(
+                    name, stats['calls'], stats['p50_ms'], stats['p95_ms'], stats['p99_ms'], stats['max_ms'],
+                    stats['total_ms'], stats['rows'], round(stats['bytes'] / 1024, 1)))
+            slow_tree.delete(*slow_tree.get_children())
+            for query in reversed(data['slow_queries']):
+                slow_tree.insert('', 'end', values=(query['at'].replace('T', ' '), query['method'], query['ms'],
+                                                    query['rows'], query['query']))
+        
+        def reset():
+            profiler.reset()
+            refresh()
+        
+        def toggle_profiling():
+            profiler.enabled = profiling_var.get()
+            if profiler.enabled:
+                profiler.reset()  # timings start from when profiling was switched on
+            refresh()
+        
+        def save():
+            path = filedialog.asksaveasfilename(
+                parent=diag_window, title="Save Query Diagnostics", defaultextension=".json",
+                initialfile=f"query-diagnostics-{datetime.now():%Y%m%d-%H%M%S}.json",
+                filetypes=[("JSON", "*.json")])
+            if path:
+                try:
+                    profiler.dump(path)
+                except OSError as e:
+                    messagebox.showerror("Error", f"Could not save diagnostics: {e}", parent=diag_window)
+        
+        button_frame = tk.Frame(diag_window, bg='white')
+        button_frame.pack(pady=(0, 15))
+        for text, color, command in (("Refresh", '#3498db', refresh), ("Reset", '#e74c3c', reset),
+                                     ("Save JSON...", '#16a085', save)):
+            tk.Button(button_frame, text=text, font=('Arial', 11), bg=color, fg='white', relief='flat',
+                      cursor='hand2', command=command).pack(side='left', padx=5, ipadx=10, ipady=3)
+        refresh()
@@ -15,10 +15,16 @@ from patients import PatientsPage
 from doctors import DoctorsPage
 from appointments import AppointmentsPage
 from staff import StaffPage
-from db import Database
+from db import open_database
+from dbworker import DBWorker
+from notifier import ChangeNotifier
+from pagemanager import PageManager
 from admin import AdminPage
 from patientdashboard import PatientDashboard
 from doctordashboard import DoctorDashboard
+from logs import configure as configure_logging, get_logger
+
+log = get_logger(__name__)
 
 
 class HealthNetApp:
@@ -28,10 +34,22 @@ class HealthNetApp:
         self.root.geometry("1200x800")
         self.root.configure(bg='#f0f0f0')
         
-        # Initialize database
-        self.db = Database()
+        # Initialize database (HEALTHNET_DATABASE_URL=sqlite:///file.db runs without a MySQL server)
+        self.db = open_database(os.environ.get("HEALTHNET_DATABASE_URL"))
         self.db.connect()
         self.db.create_tables()
+        # Query profiling is opt-in: HEALTHNET_PROFILE_QUERIES=1, or the switch in Query Diagnostics
+        self.db.profiler.enabled = os.environ.get("HEALTHNET_PROFILE_QUERIES", "") not in ("", "0")
+
+        # Background worker so database calls never block the Tk main loop
+        self.worker = DBWorker(self.root)
+        self.schedule_stats_reconcile()
+
+        # One shared change-log poller; pages subscribe instead of polling their own counts
+        self.notifier = ChangeNotifier(self.root, self.db, self.worker)
+
+        # Visited pages stay built and are shown again instead of rebuilt
+        self.pages = PageManager(self.root, self.worker, max_pages=4)
         
         # Current user and page tracking
         self.current_user = None
@@ -67,21 +85,32 @@ class HealthNetApp:
                        font=('Arial', 12, 'bold'),
                        padding=(20, 10))
     
+    def schedule_stats_reconcile(self, interval=60 * 60 * 1000):
+        """Rebuild the dashboard counters and trim the change log every interval ms"""
+        def run():
+            self.worker.submit(self.db.reconcile_stats)
+            self.worker.submit(self.db.prune_change_log)
+            self.root.after(interval, run)
+        self.root.after(interval, run)
+
     def clear_window(self):
-        """Clear all widgets from the window"""
-        for widget in self.root.winfo_children():
-            widget.destroy()
+        """Destroy every page, cached ones included"""
+        self.pages.clear()
+        self.current_page = None
+
+    def show_page(self, name, page_class, *args, cache=True):
+        """Show a page, reusing its cached instance when there is one"""
+        self.current_page = self.pages.show(name, lambda container: page_class(container, self, *args), cache)
 
     def show_login(self):
         """Show login page"""
         self.clear_window()
         self.current_user = None  #  CHANGED: hard reset session to avoid leaking old user data
-        self.current_page = LoginPage(self.root, self)
+        self.show_page('login', LoginPage, cache=False)
     
     def show_signup(self):
         """Show signup page"""
-        self.clear_window()
-        self.current_page = SignupPage(self.root, self)
+        self.show_page('signup', SignupPage, cache=False)
     
     def show_dashboard(self):
         """Show dashboard page (non-patient users)"""
@@ -90,40 +119,35 @@ class HealthNetApp:
             self.show_login()
             return
         
-        self.clear_window()
-        self.current_page = DashboardPage(self.root, self)
+        self.show_page('dashboard', DashboardPage)
     
     def show_patients(self):
         """Show patients page"""
         if not self.current_user:
             self.show_login()
             return
-        self.clear_window()
-        self.current_page = PatientsPage(self.root, self)
+        self.show_page('patients', PatientsPage)
     
     def show_doctors(self):
         """Show doctors page"""
         if not self.current_user:
             self.show_login()
             return
-        self.clear_window()
-        self.current_page = DoctorsPage(self.root, self)
+        self.show_page('doctors', DoctorsPage)
     
     def show_appointments(self):
         """Show appointments page"""
         if not self.current_user:
             self.show_login()
             return
-        self.clear_window()
-        self.current_page = AppointmentsPage(self.root, self)
+        self.show_page('appointments', AppointmentsPage)
     
     def show_staff(self):
         """Show staff page"""
         if not self.current_user:
             self.show_login()
             return
-        self.clear_window()
-        self.current_page = StaffPage(self.root, self)
+        self.show_page('staff', StaffPage)
     
     def show_admin(self):
         """Show admin page"""
@@ -133,8 +157,7 @@ class HealthNetApp:
         if self.current_user.get('role') != 'Admin':
             messagebox.showerror("Access Denied", "Admin access required")
             return
-        self.clear_window()
-        self.current_page = AdminPage(self.root, self)
+        self.show_page('admin', AdminPage)
 
     # NEW: small helper to enrich the logged-in user with domain IDs safely
     def _enrich_user_context(self, user_dict: dict) -> dict:
@@ -148,36 +171,34 @@ class HealthNetApp:
             # Attach patient_id if this is a Patient account
             if role == "Patient" and base_user_id:
                 try:
-                    self.db.cursor.execute("SELECT id FROM patients WHERE user_id = %s LIMIT 1", (base_user_id,))
-                    patient = self.db.cursor.fetchone()
-                    if patient:
-                        user["patient_id"] = patient["id"]
-                        print(f"DEBUG - Attached patient_id={patient['id']} to user {base_user_id}")
+                    patient_id = self.db.get_patient_id_for_user(base_user_id)
+                    if patient_id:
+                        user["patient_id"] = patient_id
+                        log.debug("Attached patient_id=%s to user %s", patient_id, base_user_id)
                     else:
-                        print(f"DEBUG - No patient record found for user_id={base_user_id}")
+                        log.debug("No patient record found for user_id=%s", base_user_id)
                         user["patient_id"] = None
                 except Exception as e:
-                    print(f"❌ Error fetching patient_id: {e}")
+                    log.error("Error fetching patient_id: %s", e)
                     user["patient_id"] = None
     
             # Attach doctor_id if this is a Doctor account
             if role == "Doctor" and base_user_id:
                 try:
-                    self.db.cursor.execute("SELECT id FROM doctors WHERE user_id = %s LIMIT 1", (base_user_id,))
-                    doctor = self.db.cursor.fetchone()
-                    if doctor:
-                        user["doctor_id"] = doctor["id"]
-                        print(f"DEBUG - Attached doctor_id={doctor['id']} to user {base_user_id}")
+                    doctor_id = self.db.get_doctor_id_for_user(base_user_id)
+                    if doctor_id:
+                        user["doctor_id"] = doctor_id
+                        log.debug("Attached doctor_id=%s to user %s", doctor_id, base_user_id)
                     else:
-                        print(f"DEBUG - No doctor record found for user_id={base_user_id}")
+                        log.debug("No doctor record found for user_id=%s", base_user_id)
                         user["doctor_id"] = None
                 except Exception as e:
-                    print(f"❌ Error fetching doctor_id: {e}")
+                    log.error("Error fetching doctor_id: %s", e)
                     user["doctor_id"] = None
     
         except Exception as e:
             # If something goes wrong, fallback to the original user data
-            print(f"DEBUG - _enrich_user_context failed: {e}")
+            log.exception("Could not load the linked patient/doctor of user %s", user.get("id"))
     
         return user
     
@@ -185,6 +206,7 @@ class HealthNetApp:
         """Set current user after successful login"""
         # CHANGED: ensure we always work with a fresh, enriched user context
         self.current_user = self._enrich_user_context(user)
+        self.db.audit_user = self.current_user.get('username')
 
         # Route based on role
         role = self.current_user.get('role')
@@ -205,9 +227,8 @@ class HealthNetApp:
         if self.current_user.get('role') != 'Patient':
             messagebox.showerror("Access Denied", "Patient access required")
             return
-        self.clear_window()
         # NOTE: PatientDashboard continues to receive the authoritative current_user
-        self.current_page = PatientDashboard(self.root, self, self.current_user)
+        self.show_page('patient_dashboard', PatientDashboard, self.current_user)
 
     def show_doctor_dashboard(self):
         """Show doctor dashboard"""
@@ -217,19 +238,25 @@ class HealthNetApp:
         if self.current_user.get('role') != 'Doctor':
             messagebox.showerror("Access Denied", "Doctor access required")
             return
-        self.clear_window()
-        self.current_page = DoctorDashboard(self.root, self, self.current_user)
+        self.show_page('doctor_dashboard', DoctorDashboard, self.current_user)
 
     def logout_user(self):
         """Logout current user"""
+        if self.current_user:
+            self.db.audit.record("logout", "users", self.current_user.get('id'), self.current_user.get('username'))
         self.current_user = None
+        self.db.audit_user = None
         self.show_login()
     
     def run(self):
         """Start the application"""
         self.root.mainloop()
+        self.notifier.stop()
+        self.worker.shutdown()
+        self.db.close()  # also flushes pending audit events
 
 
 if __name__ == "__main__":
+    configure_logging()
     app = HealthNetApp()
     app.run()
@@ -1,6 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import date
+from datetime import date, datetime, timedelta
+from widgets import LoadingOverlay, PagedTreeview, TypeaheadCombobox, ExportDialog
+from exporter import Exporter, EXPORT_FORMATS
+from scheduling import DEFAULT_DURATION
 
 class AppointmentsPage:
     def __init__(self, root, app):
@@ -41,12 +44,18 @@ class AppointmentsPage:
         tk.Button(control_frame, text="Cancel Appointment", font=('Arial', 12),
                   bg='#e74c3c', fg='white', relief='flat', cursor='hand2',
                   command=self.cancel_appointment).pack(side='left', padx=5)
+        tk.Button(control_frame, text="Find Free Slots", font=('Arial', 12),
+                  bg='#8e44ad', fg='white', relief='flat', cursor='hand2',
+                  command=self.find_free_slots).pack(side='left', padx=5)
+        tk.Button(control_frame, text="Export...", font=('Arial', 12),
+                  bg='#16a085', fg='white', relief='flat', cursor='hand2',
+                  command=self.export_appointments).pack(side='left', padx=5)
 
         # Table
         table_frame = tk.Frame(main_frame, bg='white', relief='raised', bd=1)
         table_frame.pack(fill='both', expand=True, padx=20, pady=10)
 
-        columns = ('ID', 'Patient', 'Doctor', 'Date', 'Time', 'Status', 'Notes')
+        columns = ('ID', 'Patient', 'Doctor', 'Date', 'Time', 'Duration', 'Status', 'Notes')
         self.appointments_tree = ttk.Treeview(table_frame, columns=columns, show='headings', height=15)
         for col in columns:
             self.appointments_tree.heading(col, text=col)
@@ -58,30 +67,46 @@ class AppointmentsPage:
         self.appointments_tree.pack(side='left', fill='both', expand=True)
         v_scrollbar.pack(side='right', fill='y')
         h_scrollbar.pack(side='bottom', fill='x')
+        self.loading = LoadingOverlay(table_frame)
+        self.table = PagedTreeview(self.appointments_tree, v_scrollbar, self.app.worker, self,
+                                   fetch_page=self.app.db.get_appointments_page,
+                                   row_values=self.appointment_values,
+                                   row_key=lambda a: (a['appointment_date'], a['appointment_time'], a['id']),
+                                   indicator=self.loading,
+                                   fetch_watermark=self.app.db.get_change_watermark,
+                                   fetch_changes=self.app.db.get_appointment_changes,
+                                   on_error=lambda e: messagebox.showerror("Error", str(e)))
 
         self.load_appointments()
 
     # ---------------- Load Appointments ----------------
     def load_appointments(self):
-        try:
-            appointments = self.app.db.get_all_appointments()
-            for item in self.appointments_tree.get_children():
-                self.appointments_tree.delete(item)
-
-            for appt in appointments:
-                patient_name = f"{appt['patient_first']} {appt['patient_last']}"
-                doctor_name = f"{appt['doctor_first']} {appt['doctor_last']}"
-                self.appointments_tree.insert('', 'end', values=(
-                    appt['id'],
-                    f"{appt['patient_id']} - {patient_name}",
-                    f"{appt['doctor_id']} - {doctor_name}",
-                    appt.get('appointment_date', ''),
-                    appt.get('appointment_time', ''),
-                    appt.get('status', ''),
-                    appt.get('notes', '')
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        self.table.reload()
+
+    def refresh_appointments(self):
+        """Pick up changes after a save/cancel without reloading the whole table"""
+        if self.search_entry.get().strip():
+            self.search_appointments()
+        else:
+            self.table.sync()
+
+    def on_show(self):
+        """Called by the page manager when this cached page is shown again"""
+        self.refresh_appointments()
+
+    def appointment_values(self, appt):
+        patient_name = f"{appt['patient_first']} {appt['patient_last']}"
+        doctor_name = f"{appt['doctor_first']} {appt['doctor_last']}"
+        return (
+            appt['id'],
+            f"{appt['patient_id']} - {patient_name}",
+            f"{appt['doctor_id']} - {doctor_name}",
+            appt.get('appointment_date', ''),
+            appt.get('appointment_time', ''),
+            appt.get('duration_minutes', ''),
+            appt.get('status', ''),
+            appt.get('notes', '')
+        )
 
     # ---------------- Search ----------------
     def search_appointments(self):
@@ -89,23 +114,9 @@ class AppointmentsPage:
         if not term:
             self.load_appointments()
             return
-        try:
-            appointments = self.app.db.search_appointments(term)
-            for item in self.appointments_tree.get_children():
-                self.appointments_tree.delete(item)
-            for appt in appointments:
-                patient_name = f"{appt['patient_first']} {appt['patient_last']}"
-                doctor_name = f"{appt['doctor_first']} {appt['doctor_last']}"
-                self.appointments_tree.insert('', 'end', values=(
-                    appt['id'], f"{appt['patient_id']} - {patient_name}",
-                    f"{appt['doctor_id']} - {doctor_name}",
-                    appt.get('appointment_date', ''),
-                    appt.get('appointment_time', ''),
-                    appt.get('status', ''),
-                    appt.get('notes', '')
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        self.app.worker.submit(self.app.db.search_appointments, term, owner=self, indicator=self.loading,
+                               on_success=self.table.show_rows,
+                               on_error=lambda e: messagebox.showerror("Error", str(e)))
 
     # ---------------- Appointment Actions ----------------
     def add_appointment(self):
@@ -116,25 +127,120 @@ class AppointmentsPage:
         if not selected:
             messagebox.showwarning("Warning", "Select an appointment to edit")
             return
-        data = self.appointments_tree.item(selected[0])['values']
-        self.appointment_form_window("Edit Appointment", data)
+        # Item iids are the appointment ids; the table keeps the row behind each one
+        self.appointment_form_window("Edit Appointment", self.table.row(selected[0]))
 
     def cancel_appointment(self):
         selected = self.appointments_tree.selection()
         if not selected:
             messagebox.showwarning("Warning", "Select an appointment to cancel")
             return
-        data = self.appointments_tree.item(selected[0])['values']
+        appointment_id = int(selected[0])
         if messagebox.askyesno("Confirm Cancel", "Cancel this appointment?"):
             try:
-                self.app.db.update_appointment_status(data[0], 'Cancelled')
-                messagebox.showinfo("Success", "Appointment cancelled")
-                self.load_appointments()
+                self.app.worker.submit(self.app.db.update_appointment_status, appointment_id, 'Cancelled',
+                                       owner=self, indicator=self.loading,
+                                       on_success=lambda success: self.on_appointment_saved(
+                                           None, success, "Appointment cancelled", "Failed to cancel appointment"),
+                                       on_error=lambda e: messagebox.showerror("Error", str(e)))
             except Exception as e:
                 messagebox.showerror("Error", str(e))
 
+    # ---------------- Free Slot Search ----------------
+    def export_appointments(self):
+        ExportDialog(self.root, self.app.worker, self, "Export Appointments",
+                     list(self.app.db.EXPORT_SPECS["appointments"]["columns"]), EXPORT_FORMATS,
+                     lambda path, columns, start, end, fmt, compress, progress, cancel: Exporter(
+                         self.app.db, "appointments", path, columns, start, end, fmt, compress,
+                         progress=progress, cancel_event=cancel),
+                     date_label="Appointment")
+
+    def find_free_slots(self):
+        window = tk.Toplevel(self.root)
+        window.title("Find Free Slots")
+        window.geometry("700x500")
+        window.transient(self.root)
+        window.grab_set()
+
+        form = tk.Frame(window, bg='white')
+        form.pack(fill='x', padx=10, pady=10)
+        inputs = {}
+        for column, (label, key, default) in enumerate([
+            ("Specialization", "specialization", "Any"),
+            ("From", "start", date.today().strftime('%Y-%m-%d')),
+            ("To", "end", (date.today() + timedelta(days=14)).strftime('%Y-%m-%d')),
+            ("Minutes", "duration", str(DEFAULT_DURATION)),
+            ("Results", "count", "10"),
+        ]):
+            tk.Label(form, text=label, font=('Arial', 10, 'bold'), bg='white').grid(row=0, column=column, sticky='w', padx=4)
+            widget = ttk.Combobox(form, width=16) if key == "specialization" else tk.Entry(form, width=11)
+            widget.grid(row=1, column=column, padx=4)
+            widget.insert(0, default)
+            inputs[key] = widget
+        inputs['specialization']['values'] = [
+            "Any", "Cardiology", "Neurology", "Orthopedics", "Pediatrics",
+            "Dermatology", "Psychiatry", "General Medicine", "Surgery",
+        ]
+
+        results_frame = tk.Frame(window, bg='white')
+        results_frame.pack(fill='both', expand=True, padx=10)
+        columns = ('Doctor', 'Date', 'Time', 'Duration')
+        results = ttk.Treeview(results_frame, columns=columns, show='headings', height=12)
+        for col in columns:
+            results.heading(col, text=col)
+            results.column(col, width=150)
+        results.pack(fill='both', expand=True)
+        results_loading = LoadingOverlay(results_frame)
+        slots = {}
+
+        def show_slots(rows):
+            if not window.winfo_exists():
+                return
+            results.delete(*results.get_children())
+            slots.clear()
+            for i, row in enumerate(rows):
+                slots[str(i)] = row
+                results.insert('', 'end', iid=str(i), values=(
+                    row['doctor_name'], row['appointment_date'], row['appointment_time'], row['duration_minutes']
+                ))
+            if not rows:
+                messagebox.showinfo("Find Free Slots", "No free slots in that range", parent=window)
+
+        def search():
+            try:
+                start = datetime.strptime(inputs['start'].get().strip(), '%Y-%m-%d').date()
+                end = datetime.strptime(inputs['end'].get().strip(), '%Y-%m-%d').date()
+                duration = int(inputs['duration'].get())
+                count = int(inputs['count'].get())
+            except ValueError:
+                messagebox.showerror("Error", "Use YYYY-MM-DD dates and whole numbers", parent=window)
+                return
+            specialization = inputs['specialization'].get().strip()
+            self.app.worker.submit(self.app.db.find_free_slots,
+                                   None if specialization in ("", "Any") else specialization,
+                                   start, end, count=count, duration_minutes=duration,
+                                   owner=self, indicator=results_loading, on_success=show_slots,
+                                   on_error=lambda e: messagebox.showerror("Error", str(e), parent=window))
+
+        def book():
+            selected = results.selection()
+            if not selected:
+                messagebox.showwarning("Warning", "Select a slot to book", parent=window)
+                return
+            slot = slots[selected[0]]
+            window.destroy()
+            self.appointment_form_window("Schedule New Appointment", slot=slot)
+
+        buttons = tk.Frame(window, bg='white')
+        buttons.pack(fill='x', padx=10, pady=10)
+        tk.Button(buttons, text="Search", font=('Arial', 11, 'bold'), bg='#3498db', fg='white',
+                  relief='flat', cursor='hand2', command=search).pack(side='left', padx=5, ipadx=15)
+        tk.Button(buttons, text="Book Selected", font=('Arial', 11, 'bold'), bg='#27ae60', fg='white',
+                  relief='flat', cursor='hand2', command=book).pack(side='left', padx=5, ipadx=15)
+        results.bind('<Double-1>', lambda _e: book())
+
     # ---------------- Appointment Form ----------------
-    def appointment_form_window(self, title, appointment_data=None):
+    def appointment_form_window(self, title, appointment=None, slot=None):
         form_window = tk.Toplevel(self.root)
         form_window.title(title)
         form_window.geometry("500x500")
@@ -156,10 +262,11 @@ class AppointmentsPage:
                  bg='white', fg='#2c3e50').pack(pady=10)
 
         for label, key, widget in [
-            ("Patient:", "patient", ttk.Combobox),
-            ("Doctor:", "doctor", ttk.Combobox),
+            ("Patient (type a name or ID):", "patient", ttk.Combobox),
+            ("Doctor (type a name or ID):", "doctor", ttk.Combobox),
             ("Date (YYYY-MM-DD):", "date", tk.Entry),
             ("Time (HH:MM):", "time", tk.Entry),
+            ("Duration (minutes):", "duration", ttk.Combobox),
             ("Status:", "status", ttk.Combobox),
             ("Notes:", "notes", tk.Text)
         ]:
@@ -172,38 +279,38 @@ class AppointmentsPage:
             fields[key].pack(fill='x', ipady=8, pady=(0, 10))
 
         fields['status']['values'] = ['Scheduled', 'Confirmed', 'Completed', 'Cancelled']
+        fields['duration']['values'] = ['15', '30', '45', '60', '90']
 
         # --- Load Patients and Doctors ---
-        try:
-            patients = self.app.db.get_all_patients_combobox()
-            self.patient_map = {f"{p['id']} - {p['first_name']} {p['last_name']}": p['id'] for p in patients}
-            fields['patient']['values'] = list(self.patient_map.keys())
-
-            doctors = self.app.db.get_all_doctors_combobox()
-            self.doctor_map = {f"{d['id']} - {d['first_name']} {d['last_name']}": d['id'] for d in doctors}
-            fields['doctor']['values'] = list(self.doctor_map.keys())
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load patients or doctors:\n{e}")
+        # --- Patient and Doctor pickers (looked up as the user types) ---
+        picker_error = lambda e: messagebox.showerror("Error", f"Failed to look up names:\n{e}")
+        self.patient_picker = TypeaheadCombobox(fields['patient'], self.app.worker, self,
+                                                self.app.db.lookup_patients, on_error=picker_error)
+        self.doctor_picker = TypeaheadCombobox(fields['doctor'], self.app.worker, self,
+                                               self.app.db.lookup_doctors, on_error=picker_error)
+        if slot:
+            self.doctor_picker.set(slot['doctor_id'], slot['doctor_name'])
+        if appointment:
+            self.patient_picker.set(appointment['patient_id'],
+                                    f"{appointment['patient_first']} {appointment['patient_last']}")
+            self.doctor_picker.set(appointment['doctor_id'],
+                                   f"{appointment['doctor_first']} {appointment['doctor_last']}")
 
         # --- Prefill for Edit ---
-        if appointment_data:
-            fields['date'].insert(0, appointment_data[3])
-            fields['time'].insert(0, appointment_data[4])
-            fields['status'].set(appointment_data[5])
-            fields['notes'].insert('1.0', appointment_data[6])
-
-            patient_id = int(str(appointment_data[1]).split(' - ')[0])
-            doctor_id = int(str(appointment_data[2]).split(' - ')[0])
-
-            patient_key = next((k for k, v in self.patient_map.items() if v == patient_id), None)
-            doctor_key = next((k for k, v in self.doctor_map.items() if v == doctor_id), None)
-
-            if patient_key:
-                fields['patient'].set(patient_key)
-            if doctor_key:
-                fields['doctor'].set(doctor_key)
+        if appointment:
+            fields['date'].insert(0, str(appointment['appointment_date']))
+            fields['time'].insert(0, str(appointment['appointment_time']))
+            fields['duration'].set(str(appointment['duration_minutes']))
+            fields['status'].set(appointment['status'])
+            fields['notes'].insert('1.0', appointment['notes'] or '')
+        elif slot:
+            fields['date'].insert(0, str(slot['appointment_date']))
+            fields['time'].insert(0, slot['appointment_time'])
+            fields['duration'].set(str(slot['duration_minutes']))
+            fields['status'].set('Scheduled')
         else:
             fields['date'].insert(0, date.today().strftime('%Y-%m-%d'))
+            fields['duration'].set(str(DEFAULT_DURATION))
             fields['status'].set('Scheduled')
 
         # --- Buttons ---
@@ -211,49 +318,66 @@ class AppointmentsPage:
         btn_frame.pack(fill='x', pady=20)
         tk.Button(btn_frame, text="Save", font=('Arial', 12, 'bold'),
                   bg='#27ae60', fg='white', relief='flat', cursor='hand2',
-                  command=lambda: self.save_appointment(form_window, fields, appointment_data)).pack(side='left', padx=10, ipadx=20, ipady=8)
+                  command=lambda: self.save_appointment(form_window, fields, appointment)).pack(side='left', padx=10, ipadx=20, ipady=8)
         tk.Button(btn_frame, text="Cancel", font=('Arial', 12),
                   bg='#95a5a6', fg='white', relief='flat', cursor='hand2',
                   command=form_window.destroy).pack(side='left', ipadx=20, ipady=8)
 
     # ---------------- Save Appointment ----------------
-    def save_appointment(self, window, fields, appointment_data=None):
+    def save_appointment(self, window, fields, appointment=None):
         try:
-            patient_selection = fields['patient'].get()
-            doctor_selection = fields['doctor'].get()
-            if not patient_selection or not doctor_selection:
-                messagebox.showerror("Error", "Select patient and doctor")
+            patient_id = self.patient_picker.get_id()
+            doctor_id = self.doctor_picker.get_id()
+            if not patient_id or not doctor_id:
+                messagebox.showerror("Error", "Select patient and doctor from the suggestions")
                 return
 
-            patient_id = self.patient_map.get(patient_selection)
-            doctor_id = self.doctor_map.get(doctor_selection)
             appointment_date = fields['date'].get().strip()
             appointment_time = fields['time'].get().strip()
+            duration = fields['duration'].get().strip()
             status = fields['status'].get().strip()
             notes = fields['notes'].get('1.0', 'end').strip()
 
-            required_fields = [patient_id, doctor_id, appointment_date, appointment_time, status]
+            required_fields = [patient_id, doctor_id, appointment_date, appointment_time, duration, status]
             if any(not f for f in required_fields):
                 messagebox.showerror("Error", "Fill all required fields")
                 return
+            if not duration.isdigit() or int(duration) <= 0:
+                messagebox.showerror("Error", "Duration must be a whole number of minutes")
+                return
+            duration = int(duration)
 
-            if appointment_data:  # Edit
+            if appointment:  # Edit
                 data = {
-                    'id': appointment_data[0],
+                    'id': appointment['id'],
                     'patient_id': patient_id,
                     'doctor_id': doctor_id,
                     'appointment_date': appointment_date,
                     'appointment_time': appointment_time,
+                    'duration_minutes': duration,
                     'status': status,
                     'notes': notes
                 }
-                self.app.db.update_appointment(data)
-                messagebox.showinfo("Success", "Appointment updated")
+                self.app.worker.submit(self.app.db.update_appointment, data, owner=self, indicator=self.loading,
+                                       on_success=lambda success: self.on_appointment_saved(
+                                           window, success, "Appointment updated", "Failed to update appointment"),
+                                       on_error=lambda e: messagebox.showerror("Error", str(e)))
             else:  # New
-                self.app.db.add_appointment(patient_id, doctor_id, appointment_date, appointment_time, status, notes)
-                messagebox.showinfo("Success", "Appointment scheduled")
-
-            window.destroy()
-            self.load_appointments()
+                self.app.worker.submit(self.app.db.add_appointment, patient_id, doctor_id, appointment_date,
+                                       appointment_time, status, notes, duration_minutes=duration,
+                                       owner=self, indicator=self.loading,
+                                       on_success=lambda success: self.on_appointment_saved(
+                                           window, success, "Appointment scheduled", "Failed to schedule appointment"),
+                                       on_error=lambda e: messagebox.showerror("Error", str(e)))
         except Exception as e:
             messagebox.showerror("Error", str(e))
+
+    def on_appointment_saved(self, window, success, message, failure):
+        """Report a finished write; on failure the form stays open to retry"""
+        if not success:
+            messagebox.showerror("Error", failure)
+            return
+        messagebox.showinfo("Success", message)
+        if window is not None:
+            window.destroy()
+        self.refresh_appointments()
@@ -0,0 +1,162 @@
+"""
+Audit Log
+Records who changed what, written to the database in the background
+"""
+import functools
+import inspect
+import queue
+import threading
+import time
+from datetime import datetime
+
+from logs import get_logger
+
+log = get_logger(__name__)
+
+# Never copied into an event's details
+PRIVATE_FIELDS = {"password", "notes", "medical_history", "address", "chunks", "rows"}
+# Keys of a record dict (e.g. update_patient(data)) worth naming in the details
+SUMMARY_FIELDS = ("patient_id", "first_name", "last_name", "full_name", "role", "specialization",
+                  "doctor_id", "appointment_date", "appointment_time", "status")
+DETAILS_LENGTH = 255
+
+
+class AuditLog:
+    """In-memory queue of audit events, flushed to the database by a background thread.
+
+    ``record`` only appends to the queue, so auditing adds no latency to the
+    write it describes. A daemon thread collects events for up to
+    ``flush_interval`` seconds (or until ``batch_size`` are waiting) and
+    hands each batch to ``write_batch(events)`` in one call. A batch that
+    fails to write is retried; when more than ``max_pending`` events are
+    waiting, new ones are dropped and counted in ``dropped``.
+    """
+
+    _STOP = object()
+
+    def __init__(self, write_batch, flush_interval=1.0, batch_size=500, max_pending=50000, retry_delay=5.0):
+        self.write_batch = write_batch
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def record(self, action, table=None, row_id=None, username=None, status="ok", details=None):
+        event = (datetime.now(), username, action, table, row_id, status,
+                 details[:DETAILS_LENGTH] if details else None)
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is self._STOP:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    event = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if event is self._STOP:
+                    stopping = True
+                    break
+                batch.append(event)
+            self._write(batch, retry=not stopping)
+
+    def _write(self, batch, retry=True):
+        while True:
+            try:
+                self.write_batch(batch)
+                return
+            except Exception as e:
+                log.error("Error writing audit log (%s events): %s", len(batch), e)
+                if not retry:
+                    return
+                time.sleep(self.retry_delay)
+
+    def close(self, timeout=5.0):
+        """Flush waiting events and stop the background thread"""
+        if self._thread is None:
+            return
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+        # Events recorded after the stop marker are written here, on the caller's thread
+        leftover = []
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if event is not self._STOP:
+                leftover.append(event)
+        if leftover:
+            self._write(leftover, retry=False)
+        self._thread = None
+
+
+def _event_fields(signature, action, table, self, args, kwargs):
+    """(table, row_id, details) of a call, leaving out private values"""
+    arguments = list(signature.bind_partial(self, *args, **kwargs).arguments.items())[1:]
+    row_id = None
+    parts = []
+    for i, (name, value) in enumerate(arguments):
+        if name in PRIVATE_FIELDS:
+            continue
+        if isinstance(value, dict):
+            if i == 0 and action != "add":
+                row_id = value.get("id")
+            parts.extend(f"{k}={value[k]}" for k in SUMMARY_FIELDS if value.get(k) not in (None, ""))
+        elif isinstance(value, (str, int, float)) or value is None or hasattr(value, "isoformat"):
+            if i == 0 and action != "add" and name.endswith("_id"):
+                row_id = value
+            elif name == "table" and table is None:
+                table = value
+            else:
+                parts.append(f"{name}={value}")
+    return table, row_id, ", ".join(parts)
+
+
+def audited(action, table=None):
+    """Record an audit event in ``self.audit`` each time a Database write method runs.
+
+    The event names the signed-in user (``self.audit_user``), the row id
+    (taken from the arguments for updates and deletes, from the returned id
+    for adds) and a short summary of the arguments. A method that returns
+    False is recorded as failed; one that raises as an error.
+    ``table`` defaults to the method's own ``table`` argument.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            event_table, row_id, details = _event_fields(signature, action, table, self, args, kwargs)
+            try:
+                result = fn(self, *args, **kwargs)
+            except Exception as e:
+                self.audit.record(action, event_table, row_id, self.audit_user, "error", f"{e}; {details}")
+                raise
+            if action == "add" and row_id is None and type(result) is int:
+                row_id = result  # the new row's id
+            self.audit.record(action, event_table, row_id, self.audit_user,
+                              "failed" if result is False else "ok", details)
+            return result
+        return wrapper
+    return decorator
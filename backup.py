@@ -0,0 +1,173 @@
+"""
+Database Backup
+Consistent, compressed snapshots of the database and restoring them
+"""
+import hashlib
+import json
+import os
+import time
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+
+class BackupError(Exception):
+    """Raised for an archive that is not a backup or fails its checksums"""
+
+
+def default_backup_path(directory="backups"):
+    return os.path.join(directory, f"healthnet-{datetime.now():%Y%m%d-%H%M%S}.zip")
+
+
+def _encode(value):
+    """JSON form of a column value that MySQL accepts back as a literal"""
+    if isinstance(value, timedelta):
+        # mysql.connector returns TIME columns as timedelta
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    if isinstance(value, (date, datetime, Decimal)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).decode("utf-8")
+    raise TypeError(f"Cannot back up value of type {type(value).__name__}")
+
+
+class Backup:
+    """Write a consistent snapshot of ``Database.BACKUP_TABLES`` to a zip archive.
+
+    Each chunk of ``chunk_size`` rows becomes one deflate-compressed JSON
+    Lines member (``<table>/<n>.jsonl``) and its SHA-256 is recorded in
+    ``manifest.json`` with the table's columns and row counts. The archive
+    is written to ``<path>.part`` and renamed when complete, so an
+    interrupted backup never looks like a valid one.
+    ``progress(table, rows_written)`` is called after each chunk; setting
+    ``cancel_event`` stops the backup and removes the partial file.
+    """
+
+    def __init__(self, db, path, chunk_size=5000, progress=None, cancel_event=None):
+        self.db = db
+        self.path = path
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.cancel_event = cancel_event
+
+    def run(self):
+        started = time.monotonic()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        part_path = self.path + ".part"
+        manifest = {"format": FORMAT_VERSION, "created_at": datetime.now().isoformat(timespec="seconds"),
+                    "tables": {}}
+        written = 0
+        cancelled = False
+        chunks = self.db.iter_snapshot(chunk_size=self.chunk_size)
+        try:
+            with zipfile.ZipFile(part_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as archive:
+                for table, columns, rows in chunks:
+                    entry = manifest["tables"].setdefault(table, {"columns": columns, "rows": 0, "chunks": []})
+                    if rows:
+                        name = f"{table}/{len(entry['chunks']):05d}.jsonl"
+                        data = "".join(json.dumps(row, default=_encode, ensure_ascii=False) + "\n"
+                                       for row in rows).encode("utf-8")
+                        archive.writestr(name, data)
+                        entry["chunks"].append({"name": name, "rows": len(rows),
+                                                "sha256": hashlib.sha256(data).hexdigest()})
+                        entry["rows"] += len(rows)
+                        written += len(rows)
+                    if self.progress:
+                        self.progress(table, written)
+                    if self.cancel_event is not None and self.cancel_event.is_set():
+                        cancelled = True
+                        break
+                else:
+                    archive.writestr(MANIFEST, json.dumps(manifest, indent=2))
+        except BaseException:
+            chunks.close()
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        chunks.close()
+        if cancelled:
+            os.remove(part_path)
+        else:
+            os.replace(part_path, self.path)
+        return {
+            "path": None if cancelled else self.path,
+            "tables": {table: entry["rows"] for table, entry in manifest["tables"].items()},
+            "rows": written,
+            "cancelled": cancelled,
+            "seconds": round(time.monotonic() - started, 1),
+        }
+
+
+def read_manifest(archive):
+    try:
+        manifest = json.loads(archive.read(MANIFEST))
+    except KeyError:
+        raise BackupError("Not a HealthNet backup (no manifest)")
+    if manifest.get("format") != FORMAT_VERSION:
+        raise BackupError(f"Unsupported backup format {manifest.get('format')}")
+    return manifest
+
+
+def verify_backup(path):
+    """Check every chunk of a backup against its recorded SHA-256; returns the manifest"""
+    with zipfile.ZipFile(path) as archive:
+        manifest = read_manifest(archive)
+        for table, entry in manifest["tables"].items():
+            for chunk in entry["chunks"]:
+                digest = hashlib.sha256()
+                with archive.open(chunk["name"]) as member:
+                    for block in iter(lambda: member.read(1 << 16), b""):
+                        digest.update(block)
+                if digest.hexdigest() != chunk["sha256"]:
+                    raise BackupError(f"Checksum mismatch in {chunk['name']}")
+    return manifest
+
+
+class Restore:
+    """Replace the database contents with a backup archive.
+
+    The whole archive is verified first, so a damaged backup is refused
+    before anything is deleted. Rows are then loaded chunk by chunk through
+    ``Database.restore_tables`` in batches of ``batch_size``.
+    ``progress(table, rows_restored, total_rows)`` is called after each chunk.
+    """
+
+    def __init__(self, db, path, batch_size=1000, progress=None):
+        self.db = db
+        self.path = path
+        self.batch_size = batch_size
+        self.progress = progress
+
+    def run(self):
+        started = time.monotonic()
+        manifest = verify_backup(self.path)
+        unknown = set(manifest["tables"]) - set(self.db.BACKUP_TABLES)
+        if unknown:
+            raise BackupError(f"Backup contains unknown tables: {', '.join(sorted(unknown))}")
+        total = sum(entry["rows"] for entry in manifest["tables"].values())
+        with zipfile.ZipFile(self.path) as archive:
+            restored = self.db.restore_tables(self._chunks(archive, manifest, total), self.batch_size)
+        return {
+            "path": self.path,
+            "created_at": manifest["created_at"],
+            "tables": restored,
+            "rows": sum(restored.values()),
+            "seconds": round(time.monotonic() - started, 1),
+        }
+
+    def _chunks(self, archive, manifest, total):
+        done = 0
+        for table, entry in manifest["tables"].items():
+            columns = entry["columns"]
+            yield table, columns, []
+            for chunk in entry["chunks"]:
+                with archive.open(chunk["name"]) as member:
+                    rows = [tuple(json.loads(line)) for line in member if line.strip()]
+                yield table, columns, rows
+                done += len(rows)
+                if self.progress:
+                    self.progress(table, done, total)
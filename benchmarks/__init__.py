@@ -0,0 +1,7 @@
+"""
+Benchmarks
+Synthetic data and latency benchmarks for the Database layer and password hashing
+
+    python -m benchmarks.run --url sqlite:///bench.db --scale 0.01 --output results.json
+    python -m benchmarks.passwords --target-ms 250 --logins-per-second 20
+"""
@@ -0,0 +1,149 @@
+"""
+Synthetic Data
+Fills the schema with realistic, reproducible volumes through bulk inserts
+"""
+import random
+import time
+from datetime import date, timedelta
+
+FIRST_NAMES = ["James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+               "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Ahmed", "Fatima",
+               "Chen", "Mei", "Carlos", "Sofia", "Ivan", "Olga", "Kwame", "Amara", "Raj", "Priya", "Yusuf", "Aisha",
+               "Liam", "Emma", "Noah", "Olivia", "Mateo", "Lucia", "Hiro", "Yuki"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+              "Hernandez", "Lopez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee",
+              "Khan", "Ali", "Wang", "Li", "Zhang", "Patel", "Singh", "Kumar", "Okafor", "Mensah", "Ivanov",
+              "Petrov", "Nguyen", "Tanaka", "Sato", "Silva", "Santos", "Rossi", "Muller", "Schmidt"]
+SPECIALIZATIONS = ["Cardiology", "Dermatology", "Neurology", "Pediatrics", "Orthopedics", "Oncology",
+                   "Psychiatry", "Radiology", "General Practice", "Gynecology", "Ophthalmology", "ENT"]
+DEPARTMENTS = ["Emergency", "Surgery", "Pharmacy", "Laboratory", "Radiology", "Administration", "Nursing",
+               "Maintenance"]
+STAFF_ROLES = ["Nurse", "Technician", "Pharmacist", "Receptionist", "Porter", "Administrator"]
+SCHEDULES = ["Mon-Fri 08:00-16:00", "Mon-Fri 09:00-17:00", "Mon-Thu 10:00-18:00", "Tue-Sat 08:00-14:00"]
+STATUSES = ["Scheduled", "Confirmed", "Completed", "Cancelled"]
+
+# Appointment slots per doctor per day (08:00 to 17:30 every 30 minutes)
+SLOTS_PER_DAY = 20
+
+VOLUMES = {"patients": 1_000_000, "doctors": 5_000, "staff": 2_000, "appointments": 10_000_000}
+
+
+def scaled_volumes(scale=1.0, **overrides):
+    """VOLUMES multiplied by ``scale`` (at least one row each), then any explicit overrides"""
+    volumes = {table: max(int(count * scale), 1) for table, count in VOLUMES.items()}
+    volumes.update({table: count for table, count in overrides.items() if count is not None})
+    return volumes
+
+
+def _person(rng):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return first, last, f"{first.lower()}.{last.lower()}{rng.randrange(1000)}@example.com", \
+        f"+1{rng.randrange(10 ** 9, 10 ** 10)}"
+
+
+def patient_rows(count, rng, today):
+    for i in range(count):
+        first, last, email, phone = _person(rng)
+        dob = today - timedelta(days=rng.randrange(365, 95 * 365))
+        yield (f"BP{i:08d}", first, last, (today - dob).days // 365, dob,
+               rng.choice(("Male", "Female", "Other")), phone, email,
+               f"{rng.randrange(1, 9999)} {rng.choice(LAST_NAMES)} Street", "", f"{rng.choice(FIRST_NAMES)} {phone}")
+
+
+def doctor_rows(count, rng):
+    for _ in range(count):
+        first, last, email, phone = _person(rng)
+        yield first, last, rng.choice(SPECIALIZATIONS), phone, email, rng.choice(SCHEDULES)
+
+
+def staff_rows(count, rng, today):
+    for _ in range(count):
+        first, last, email, phone = _person(rng)
+        yield (f"{first} {last}", rng.choice(STAFF_ROLES), rng.choice(DEPARTMENTS), phone, email,
+               today - timedelta(days=rng.randrange(30, 20 * 365)), rng.randrange(2500000, 15000000) / 100)
+
+
+def appointment_rows(count, doctor_ids, patient_ids, rng, today):
+    """Conflict-free bookings: doctor slots are filled in order, centred on ``today``"""
+    days = -(-count // (len(doctor_ids) * SLOTS_PER_DAY))
+    first_day = today - timedelta(days=days // 2)
+    for i in range(count):
+        doctor = doctor_ids[i % len(doctor_ids)]
+        slot = i // len(doctor_ids)
+        day = first_day + timedelta(days=slot // SLOTS_PER_DAY)
+        minutes = 8 * 60 + (slot % SLOTS_PER_DAY) * 30
+        if day < today:
+            status = rng.choices(STATUSES, weights=(5, 5, 75, 15))[0]
+        else:
+            status = rng.choices(STATUSES, weights=(60, 30, 0, 10))[0]
+        yield (rng.choice(patient_ids), doctor, day, f"{minutes // 60:02d}:{minutes % 60:02d}:00", 30, status, "")
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _ids(db, table):
+    with db.pool.cursor(dictionary=False) as cursor:
+        cursor.execute(f"SELECT id FROM {table} ORDER BY id")
+        return [row[0] for row in cursor.fetchall()]
+
+
+PATIENT_COLUMNS = ["patient_id", "first_name", "last_name", "age", "date_of_birth", "gender", "phone", "email",
+                   "address", "medical_history", "emergency_contact"]
+DOCTOR_COLUMNS = ["first_name", "last_name", "specialization", "phone", "email", "schedule"]
+STAFF_COLUMNS = ["full_name", "role", "department", "phone", "email", "hire_date", "salary"]
+APPOINTMENT_COLUMNS = ["patient_id", "doctor_id", "appointment_date", "appointment_time", "duration_minutes",
+                       "status", "notes"]
+
+
+def generate(db, volumes, batch_size=10000, seed=0, progress=None):
+    """Bulk-insert ``volumes`` ({table: rows}) of synthetic data into an empty schema.
+
+    Patients, doctors and staff go through ``Database.bulk_insert`` like a
+    CSV import; appointments (which the importer does not take) are
+    inserted in the same batched way and the counters rebuilt afterwards.
+    The same ``seed`` always produces the same data.
+    ``progress(table, rows_done, rows_total)`` is called after each batch.
+    Returns {table: seconds taken}.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    timings = {}
+    sources = (("patients", PATIENT_COLUMNS, lambda: patient_rows(volumes["patients"], rng, today)),
+               ("doctors", DOCTOR_COLUMNS, lambda: doctor_rows(volumes["doctors"], rng)),
+               ("staff", STAFF_COLUMNS, lambda: staff_rows(volumes["staff"], rng, today)))
+    for table, columns, rows in sources:
+        started = time.monotonic()
+        done = 0
+        for batch in _batches(rows(), batch_size):
+            done += db.bulk_insert(table, columns, batch)
+            if progress:
+                progress(table, done, volumes[table])
+        db.finish_import(table)
+        timings[table] = round(time.monotonic() - started, 2)
+
+    started = time.monotonic()
+    rows = appointment_rows(volumes["appointments"], _ids(db, "doctors"), _ids(db, "patients"), rng, today)
+    query = (f"INSERT INTO appointments ({', '.join(APPOINTMENT_COLUMNS)}) "
+             f"VALUES ({', '.join(['%s'] * len(APPOINTMENT_COLUMNS))})")
+    done = 0
+    for batch in _batches(rows, batch_size):
+        with db.pool.cursor() as cursor:
+            cursor.executemany(query, batch)
+        done += len(batch)
+        if progress:
+            progress("appointments", done, volumes["appointments"])
+    db.reconcile_stats()
+    with db.pool.cursor() as cursor:
+        db._log_change(cursor, "appointments", None, "reload")
+    db.cache.invalidate()
+    timings["appointments"] = round(time.monotonic() - started, 2)
+    return timings
@@ -0,0 +1,111 @@
+"""
+Password Hashing Benchmark
+Times scrypt / PBKDF2 costs to pick password_params for a login-throughput target
+
+    python -m benchmarks.passwords --target-ms 250 --logins-per-second 20 --workers 4
+"""
+import argparse
+import hashlib
+import json
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import passwords
+from profiler import summarize
+
+SCRYPT_COSTS = [{"scheme": passwords.SCRYPT, "ln": ln, "r": 8, "p": 1} for ln in range(12, 18)]
+PBKDF2_COSTS = [{"scheme": passwords.PBKDF2, "i": i} for i in (100000, 200000, 400000, 600000, 1200000)]
+
+
+def time_verify(params, repeat):
+    """summarize() of ``repeat`` single verifications"""
+    stored = passwords.hash_password("benchmark-password", params)
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        passwords.verify_password("benchmark-password", stored)
+        durations.append(time.perf_counter() - started)
+    return summarize(durations)
+
+
+def throughput(params, workers, seconds):
+    """Verifications per second with ``workers`` concurrent logins (hashlib releases the GIL)"""
+    stored = passwords.hash_password("benchmark-password", params)
+    deadline = time.perf_counter() + seconds
+
+    def run():
+        done = 0
+        while time.perf_counter() < deadline:
+            passwords.verify_password("benchmark-password", stored)
+            done += 1
+        return done
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        done = sum(executor.map(lambda _i: run(), range(workers)))
+    return done / (time.perf_counter() - started)
+
+
+def recommend(results, target_ms, logins_per_second):
+    """The most expensive cost per scheme whose p95 and throughput still meet the targets"""
+    best = {}
+    for result in results:
+        if result["p95_ms"] <= target_ms and result["logins_per_second"] >= logins_per_second:
+            best[result["params"]["scheme"]] = result["params"]
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune the password hashing cost")
+    parser.add_argument("--target-ms", type=float, default=250, help="longest acceptable p95 login delay")
+    parser.add_argument("--logins-per-second", type=float, default=10,
+                        help="peak logins the server must verify per second")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent logins during the throughput run")
+    parser.add_argument("--repeat", type=int, default=10, help="timed verifications per cost")
+    parser.add_argument("--seconds", type=float, default=2, help="length of each throughput run")
+    parser.add_argument("--scheme", choices=[passwords.SCRYPT, passwords.PBKDF2],
+                        help="only benchmark this scheme")
+    parser.add_argument("--output", default=f"passwords-{datetime.now():%Y%m%d-%H%M%S}.json")
+    args = parser.parse_args(argv)
+
+    costs = []
+    if args.scheme != passwords.PBKDF2 and hasattr(hashlib, "scrypt"):
+        costs += SCRYPT_COSTS
+    if args.scheme != passwords.SCRYPT:
+        costs += PBKDF2_COSTS
+
+    results = []
+    for params in costs:
+        result = {"params": params, **time_verify(params, args.repeat),
+                  "logins_per_second": round(throughput(params, args.workers, args.seconds), 1)}
+        results.append(result)
+        settings = ",".join(f"{k}={v}" for k, v in params.items() if k != "scheme")
+        print(f"  {params['scheme']:<14} {settings:<16} p50 {result['p50_ms']:>9.1f} ms   "
+              f"p95 {result['p95_ms']:>9.1f} ms   {result['logins_per_second']:>8.1f} logins/s")
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "target_ms": args.target_ms,
+        "logins_per_second": args.logins_per_second,
+        "workers": args.workers,
+        "current": passwords.DEFAULT_PARAMS,
+        "results": results,
+        "recommended": recommend(results, args.target_ms, args.logins_per_second),
+    }
+    for scheme, params in report["recommended"].items():
+        print(f"✅ {scheme}: {params}")
+    if not report["recommended"]:
+        print("❌ No cost meets the targets; lower --logins-per-second or raise --target-ms")
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+    return 0 if report["recommended"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
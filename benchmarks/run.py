@@ -0,0 +1,173 @@
+"""
+Database Benchmarks
+Times the Database methods against synthetic data and writes p50/p95/p99 as JSON
+
+    python -m benchmarks.run --url sqlite:///:memory: --scale 0.001
+    python -m benchmarks.run --url sqlite:///bench.db --skip-generate --baseline last.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from db import open_database
+from profiler import summarize
+from benchmarks.datagen import FIRST_NAMES, LAST_NAMES, SPECIALIZATIONS, generate, scaled_volumes
+
+
+class Context:
+    """Random but reproducible arguments for the benchmark cases"""
+
+    def __init__(self, db, seed):
+        self.rng = random.Random(seed)
+        self.today = date.today()
+        with db.pool.cursor(dictionary=False) as cursor:
+            cursor.execute("SELECT MIN(id), MAX(id) FROM patients")
+            self.patients = cursor.fetchone()
+            cursor.execute("SELECT MIN(id), MAX(id) FROM doctors")
+            self.doctors = cursor.fetchone()
+        self.users_created = 0
+
+    def patient_id(self):
+        return self.rng.randint(*self.patients)
+
+    def doctor_id(self):
+        return self.rng.randint(*self.doctors)
+
+    def name(self):
+        return self.rng.choice(FIRST_NAMES + LAST_NAMES)
+
+    def prefix(self):
+        return self.name()[:self.rng.randint(1, 3)]
+
+    def username(self):
+        self.users_created += 1
+        return f"bench_{os.getpid()}_{self.users_created}"
+
+
+# (name, call(db, ctx), heavy) -- heavy cases read whole tables and run --heavy-repeat times
+CASES = [
+    ("get_all_appointments", lambda db, c: db.get_all_appointments(), True),
+    ("get_all_patients", lambda db, c: db.get_all_patients(), True),
+    ("get_all_doctors", lambda db, c: db.get_all_doctors(), True),
+    ("get_all_staff", lambda db, c: db.get_all_staff(), True),
+    ("get_appointments_page", lambda db, c: db.get_appointments_page(limit=100), False),
+    ("get_patients_page", lambda db, c: db.get_patients_page(limit=100), False),
+    ("search_patients", lambda db, c: db.search_patients(c.name()), False),
+    ("search_doctors", lambda db, c: db.search_doctors(c.name()), False),
+    ("search_staff", lambda db, c: db.search_staff(c.name()), False),
+    ("search_appointments", lambda db, c: db.search_appointments(c.name()), False),
+    ("lookup_patients", lambda db, c: db.lookup_patients(c.prefix()), False),
+    ("get_doctor_schedule", lambda db, c: db.get_doctor_schedule(c.doctor_id(), c.today,
+                                                                 c.today + timedelta(days=7)), False),
+    ("get_patient_appointments", lambda db, c: db.get_patient_appointments(c.patient_id()), False),
+    ("find_free_slots", lambda db, c: db.find_free_slots(c.rng.choice(SPECIALIZATIONS), count=10), False),
+    ("count_patients", lambda db, c: db.count_patients(), False),
+    ("count_doctors", lambda db, c: db.count_doctors(), False),
+    ("count_staff", lambda db, c: db.count_staff(), False),
+    ("count_todays_appointments", lambda db, c: db.count_todays_appointments(), False),
+    ("get_dashboard_stats", lambda db, c: db.get_dashboard_stats(), False),
+    ("get_system_statistics", lambda db, c: db.get_system_statistics(), False),
+    ("create_user", lambda db, c: db.create_user(c.patient_id(), "Patient", c.username(), "bench-password"), False),
+]
+
+
+def run_cases(db, ctx, repeat, heavy_repeat, warmup=1, warm_cache=False, only=None):
+    """{case: summarize(durations)} for every case (or those named in ``only``)"""
+    results = {}
+    for name, call, heavy in CASES:
+        if only and name not in only:
+            continue
+        durations = []
+        for i in range(warmup + (heavy_repeat if heavy else repeat)):
+            if not warm_cache:
+                db.cache.invalidate()
+            started = time.perf_counter()
+            call(db, ctx)
+            if i >= warmup:
+                durations.append(time.perf_counter() - started)
+        results[name] = summarize(durations)
+        print(f"  {name:<28} p50 {results[name]['p50_ms']:>10.3f} ms   p99 {results[name]['p99_ms']:>10.3f} ms")
+    return results
+
+
+def compare(baseline, results, tolerance):
+    """Cases whose p95 grew by more than ``tolerance`` (0.2 = 20%) over ``baseline``"""
+    regressions = {}
+    for name, current in results.items():
+        before = baseline.get("results", {}).get(name)
+        if before and before.get("p95_ms") and current["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions[name] = {"baseline_p95_ms": before["p95_ms"], "p95_ms": current["p95_ms"]}
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the HealthNet Database layer")
+    parser.add_argument("--url", default="sqlite:///:memory:",
+                        help="database URL for open_database (empty for the MySQL server in Database.config)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="fraction of 1M patients / 5k doctors / 2k staff / 10M appointments")
+    for table in ("patients", "doctors", "staff", "appointments"):
+        parser.add_argument(f"--{table}", type=int, help=f"number of {table} (overrides --scale)")
+    parser.add_argument("--skip-generate", action="store_true", help="benchmark the data already in the database")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=100, help="timed calls per case")
+    parser.add_argument("--heavy-repeat", type=int, default=5, help="timed calls per whole-table case")
+    parser.add_argument("--warm-cache", action="store_true", help="keep the query cache between calls")
+    parser.add_argument("--only", nargs="*", help="case names to run")
+    parser.add_argument("--output", default=f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json")
+    parser.add_argument("--baseline", help="earlier results JSON to compare p95 against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 growth over the baseline")
+    args = parser.parse_args(argv)
+
+    db = open_database(args.url or None)
+    if not db.connect():
+        return 2
+    db.create_tables()
+    volumes = scaled_volumes(args.scale, patients=args.patients, doctors=args.doctors, staff=args.staff,
+                             appointments=args.appointments)
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "url": args.url,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "heavy_repeat": args.heavy_repeat,
+        "warm_cache": args.warm_cache,
+    }
+    try:
+        if not args.skip_generate:
+            print(f"Generating {volumes}")
+            report["volumes"] = volumes
+            report["generate_seconds"] = generate(
+                db, volumes, args.batch_size, args.seed,
+                progress=lambda table, done, total: print(f"\r  {table}: {done}/{total}", end="", flush=True))
+            print()
+        report["rows"] = {name: db._count(f"SELECT COUNT(*) AS count FROM {name}")
+                          for name in ("patients", "doctors", "staff", "appointments")}
+        print("Running benchmarks")
+        report["results"] = run_cases(db, Context(db, args.seed), args.repeat, args.heavy_repeat,
+                                      warm_cache=args.warm_cache, only=args.only)
+    finally:
+        db.close()
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["regressions"] = compare(json.load(f), report["results"], args.tolerance)
+        for name, change in report["regressions"].items():
+            print(f"❌ {name}: p95 {change['baseline_p95_ms']} ms -> {change['p95_ms']} ms")
+        status = 1 if report["regressions"] else 0
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Query Cache
+In-process read-through cache for reference data
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+
+class QueryCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds.
+
+    Each entry records the tables it was read from; ``invalidate(table)``
+    drops every entry that depends on that table. The TTL bounds how long
+    changes made from another desk can go unseen.
+    """
+
+    def __init__(self, maxsize=64, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, tables, value)
+        self._generation = {}  # table -> invalidation count
+        self._epoch = 0  # full invalidation count
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, loader, tables=()):
+        """Return the cached value for ``key``, calling ``loader()`` on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            generations = self._generations(tables)
+        value = loader()
+        with self._lock:
+            # Don't store a result that a write invalidated while it was loading
+            if generations == self._generations(tables):
+                self._entries[key] = (time.monotonic() + self.ttl, tuple(tables), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, *tables):
+        """Drop entries read from any of ``tables`` (everything when none given)"""
+        with self._lock:
+            if not tables:
+                self._epoch += 1
+                self._entries.clear()
+                return
+            for table in tables:
+                self._generation[table] = self._generation.get(table, 0) + 1
+            stale = [k for k, (_exp, deps, _v) in self._entries.items() if set(deps) & set(tables)]
+            for key in stale:
+                del self._entries[key]
+
+    def _generations(self, tables):
+        """Invalidation counts a load of ``tables`` is checked against; call with the lock held"""
+        return self._epoch, [self._generation.get(t, 0) for t in tables]
+
+
+def cached(*tables):
+    """Serve a Database method's result from ``self.cache``, keyed by its arguments"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+            return self.cache.get(key, lambda: fn(self, *args, **kwargs), tables)
+        return wrapper
+    return decorator
+
+
+def invalidates(*tables):
+    """Invalidate ``self.cache`` for ``tables`` once a Database write method returns.
+
+    Runs after the method's transaction has committed (or failed), so a
+    concurrent read can't re-cache the old rows.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return fn(self, *args, **kwargs)
+            finally:
+                self.cache.invalidate(*tables)
+        return wrapper
+    return decorator
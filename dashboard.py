@@ -1,15 +1,24 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import traceback
+from widgets import LoadingOverlay, RefreshScheduler
+from logs import get_logger
+
+log = get_logger(__name__)
 
 class DashboardPage:
+    # Tables whose changes move the stat cards
+    WATCHED_TABLES = ('patients', 'doctors', 'appointments', 'staff')
+
     def __init__(self, root, app):
         self.root = root
         self.app = app
         self.user = app.current_user
         self.stats = {}  # <-- initialize stats
         self.create_widgets()
-        self.auto_refresh()  # Start auto-refreshing stats
+        # Changes are pushed by the app's notifier; the slow timer only catches
+        # the date rolling over (today's appointments) and anything missed
+        self.refresher = RefreshScheduler(self.stats_grid, self.refresh_stats, interval=60000, max_interval=300000)
+        self.on_show()
 
     def create_widgets(self):
         """Create dashboard widgets"""
@@ -55,8 +64,8 @@ class DashboardPage:
 
         self.stats_grid = tk.Frame(stats_frame, bg='white')  # Keep reference for refresh
         self.stats_grid.pack(expand=True, fill='both', padx=20, pady=20)
-
-        self.refresh_stats()  # load stats immediately
+        self.stat_labels = self.create_stats_cards(self.stats_grid)
+        self.loading = LoadingOverlay(stats_frame)
 
     def create_navigation_buttons(self, parent):
         """Create navigation buttons based on user role"""
@@ -92,13 +101,14 @@ class DashboardPage:
             )
             btn.grid(row=0, column=i, padx=10, pady=10)
 
-    def create_stats_cards(self, parent, stats):
-        """Create statistics cards with live counts"""
-        for i, (title, value, color) in enumerate([
-            ("Total Patients", stats.get('patients', 0), '#4CAF50'),
-            ("Total Doctors", stats.get('doctors', 0), '#2196F3'),
-            ("Today's Appointments", stats.get('appointments_today', 0), '#FF9800'),
-            ("Total Staff", stats.get('staff', 0), '#9C27B0'),
+    def create_stats_cards(self, parent):
+        """Create the statistics cards once; returns {stat key: value label}"""
+        labels = {}
+        for i, (key, title, color) in enumerate([
+            ('patients', "Total Patients", '#4CAF50'),
+            ('doctors', "Total Doctors", '#2196F3'),
+            ('appointments_today', "Today's Appointments", '#FF9800'),
+            ('staff', "Total Staff", '#9C27B0'),
         ]):
             card_frame = tk.Frame(parent, bg=color, relief='raised', bd=2)
             card_frame.grid(row=0, column=i, padx=10, pady=10, sticky='nsew')
@@ -106,7 +116,7 @@ class DashboardPage:
             parent.grid_rowconfigure(0, weight=1)
 
             value_label = tk.Label(
-                card_frame, text=str(value), 
+                card_frame, text="–", 
                 font=('Arial', 24, 'bold'), bg=color, fg='white'
             )
             value_label.pack(pady=(20, 5))
@@ -116,34 +126,50 @@ class DashboardPage:
                 font=('Arial', 12), bg=color, fg='white'
             )
             title_label.pack(pady=(0, 20))
+            labels[key] = value_label
+        return labels
 
     def get_system_stats(self):
-        """Get live statistics from database (uses db.py helper methods)"""
+        """Get live statistics from the materialized counters (one round trip)"""
         stats = {}
         try:
-            stats['patients'] = self.app.db.count_patients()
-            stats['doctors'] = self.app.db.count_doctors()
-            stats['staff'] = self.app.db.count_staff()
-            stats['appointments_today'] = self.app.db.count_todays_appointments()
+            stats = self.app.db.get_dashboard_stats()
         except Exception as e:
-            print("Error fetching system stats:", str(e))
-            traceback.print_exc()
+            log.exception("Error fetching system stats: %s", e)
         return stats
 
     def refresh_stats(self):
         if not self.stats_grid or not self.stats_grid.winfo_exists():
             return  # Frame is gone, skip refresh
-        for widget in self.stats_grid.winfo_children():
-            widget.destroy()
-        self.stats = self.get_system_stats()
-        self.create_stats_cards(self.stats_grid, self.stats)
-
-    def auto_refresh(self, interval=5000):
-        if self.stats_grid and self.stats_grid.winfo_exists():
-            self.refresh_stats()
-        self.after_id = self.root.after(interval, self.auto_refresh)
+        # First load shows a loading badge; periodic refreshes update silently
+        indicator = None if self.stats else self.loading
+        self.app.worker.submit(self.get_system_stats, owner=self, indicator=indicator,
+                               on_success=self.show_stats)
+
+    def show_stats(self, stats):
+        if not self.stats_grid.winfo_exists():
+            return
+        # Only touch the labels whose value changed; Tk redraws nothing otherwise
+        for key, label in self.stat_labels.items():
+            value = stats.get(key, 0)
+            if key not in self.stats or self.stats[key] != value:
+                label.config(text=str(value))
+        self.stats = stats
+
+    def on_data_changed(self, tables):
+        self.refresh_stats()
+
+    def on_show(self):
+        """Called by the page manager when this cached page is shown again"""
+        self.app.notifier.subscribe(self, self.WATCHED_TABLES, self.on_data_changed)
+        self.refresher.start()
+
+    def on_hide(self):
+        self.app.notifier.unsubscribe(self)
+        self.refresher.stop()
+
+    on_destroy = on_hide
 
     def on_close(self):
-        if hasattr(self, "after_id"):
-            self.root.after_cancel(self.after_id)
+        self.on_hide()
         self.root.destroy()
@@ -4,14 +4,216 @@ MySQL (XAMPP) Integration
 """
 import mysql.connector
 from mysql.connector import Error
-import hashlib
-from datetime import datetime, date
+from mysql.connector.errors import PoolError
+import re
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+import passwords
+from audit import AuditLog, audited
+from cache import QueryCache, cached, invalidates
+from profiler import QueryProfiler
+from logs import get_logger
+from scheduling import (AppointmentConflictError, DEFAULT_DURATION, appointment_interval,
+                        parse_weekly_schedule, find_free_slots)
+
+
+log = get_logger(__name__)
+
+
+def age_from_dob(dob, today=None):
+    """Age in whole years for a date of birth (date or 'YYYY-MM-DD'); None when unknown"""
+    if not dob:
+        return None
+    birth_date = datetime.strptime(dob, "%Y-%m-%d").date() if isinstance(dob, str) else dob
+    today = today or date.today()
+    return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+
+
+class ConnectionPool:
+    """Thread-safe pool of MySQL connections.
+
+    Connections are opened lazily up to ``size``. A connection that has been
+    idle longer than ``health_check_interval`` seconds is pinged (and
+    reconnected if MySQL dropped it) before it is lent out again, and a
+    connection that fails mid-query is discarded instead of being returned,
+    so a restarted server never requires restarting the app.
+    """
+
+    def __init__(self, config, size=5, timeout=10, health_check_interval=30, profiler=None):
+        self.config = config
+        self.profiler = profiler
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        return mysql.connector.connect(**self.config)
+
+    def _reserve_slot(self):
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return True
+        return False
+
+    def _release_slot(self):
+        with self._lock:
+            self._created -= 1
+
+    def _open_in_slot(self):
+        try:
+            return self._open()
+        except Error:
+            self._release_slot()
+            raise
+
+    def acquire(self):
+        """Borrow a healthy connection, waiting up to ``timeout`` seconds."""
+        try:
+            conn, last_used = self._idle.get_nowait()
+        except queue.Empty:
+            if self._reserve_slot():
+                return self._open_in_slot()
+            try:
+                conn, last_used = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise PoolError(f"No database connection available after {self.timeout}s")
+        return self._ensure_healthy(conn, last_used)
+
+    def _ensure_healthy(self, conn, last_used):
+        if time.monotonic() - last_used < self.health_check_interval:
+            return conn
+        try:
+            conn.ping(reconnect=True, attempts=3, delay=1)
+            return conn
+        except Error:
+            # Reopen under the slot this connection already holds; releasing
+            # it first would let another thread take it and overfill the pool
+            try:
+                conn.close()
+            except Error:
+                pass
+            return self._open_in_slot()
+
+    def release(self, conn):
+        """Return a connection to the pool."""
+        self._idle.put((conn, time.monotonic()))
+
+    def discard(self, conn):
+        """Drop a broken connection and free its slot."""
+        try:
+            conn.close()
+        except Error:
+            pass
+        self._release_slot()
+
+    @contextmanager
+    def cursor(self, dictionary=True, buffered=True, label=None):
+        """Lend a connection and cursor for one unit of work.
+
+        Commits when the block finishes and rolls back if it raises. With
+        ``buffered=False`` rows stream from the server as they are fetched;
+        if such a block is abandoned part way, the connection still has
+        unread rows on the wire and is discarded rather than reused.
+        ``label`` names the work in the query profiler (the Database method).
+        """
+        conn = self.acquire()
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=dictionary, buffered=buffered)
+            if self.profiler is not None:
+                cursor = self.profiler.wrap(cursor, label, buffered)
+            yield cursor
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except Error:
+                pass
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Error:
+                    pass
+                cursor = None
+            if buffered and conn.is_connected():
+                self.release(conn)
+            else:
+                self.discard(conn)
+            raise
+        else:
+            cursor.close()
+            self.release(conn)
+
+    def close_all(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self.discard(conn)
 
 
 class Database:
-    def __init__(self):
-        self.connection = None
-        self.cursor = None
+    # Columns added to existing tables by create_tables: (table, column, definition)
+    COLUMNS = [
+        ("patients", "updated_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"),
+        ("doctors", "updated_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"),
+        ("staff", "updated_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"),
+        ("appointments", "duration_minutes", f"INT NOT NULL DEFAULT {DEFAULT_DURATION}"),
+        ("patients", "first_name_soundex", "VARCHAR(32) AS (SOUNDEX(first_name)) STORED"),
+        ("patients", "last_name_soundex", "VARCHAR(32) AS (SOUNDEX(last_name)) STORED"),
+        ("doctors", "first_name_soundex", "VARCHAR(32) AS (SOUNDEX(first_name)) STORED"),
+        ("doctors", "last_name_soundex", "VARCHAR(32) AS (SOUNDEX(last_name)) STORED"),
+        ("users", "is_active", "BOOLEAN NOT NULL DEFAULT TRUE"),
+        ("users", "last_login", "DATETIME NULL"),
+        # Never-logged-in users sort as oldest; keeps the keyset predicate NULL-free
+        ("users", "last_login_sort", "DATETIME AS (COALESCE(last_login, '1000-01-01 00:00:00')) STORED"),
+    ]
+
+    # Secondary indexes created (or migrated onto existing tables) by create_tables:
+    # (table, name, columns, kind)
+    INDEXES = [
+        ("appointments", "idx_appointments_date_time", "appointment_date, appointment_time", "INDEX"),
+        ("appointments", "idx_appointments_doctor_date", "doctor_id, appointment_date, appointment_time", "INDEX"),
+        ("appointments", "idx_appointments_patient_date", "patient_id, appointment_date, appointment_time", "INDEX"),
+        ("patients", "idx_patients_first_name", "first_name", "INDEX"),
+        ("patients", "idx_patients_last_name", "last_name", "INDEX"),
+        ("patients", "idx_patients_first_name_soundex", "first_name_soundex", "INDEX"),
+        ("patients", "idx_patients_last_name_soundex", "last_name_soundex", "INDEX"),
+        ("patients", "ft_patients_search", "first_name, last_name, email", "FULLTEXT INDEX"),
+        ("doctors", "idx_doctors_first_name", "first_name", "INDEX"),
+        ("doctors", "idx_doctors_specialization", "specialization", "INDEX"),
+        ("doctors", "idx_doctors_last_name", "last_name", "INDEX"),
+        ("doctors", "idx_doctors_first_name_soundex", "first_name_soundex", "INDEX"),
+        ("doctors", "idx_doctors_last_name_soundex", "last_name_soundex", "INDEX"),
+        ("doctors", "ft_doctors_search", "first_name, last_name, specialization, email", "FULLTEXT INDEX"),
+        ("staff", "idx_staff_full_name", "full_name", "INDEX"),
+        ("staff", "ft_staff_search", "full_name, role, department, email", "FULLTEXT INDEX"),
+        ("users", "idx_users_full_name", "full_name", "INDEX"),
+        ("users", "idx_users_last_login_sort", "last_login_sort", "INDEX"),
+        ("users", "idx_users_created_at", "created_at", "INDEX"),
+        ("users", "idx_users_role", "role", "INDEX"),
+    ]
+
+    # Open bounds for the optional date-range filters (MySQL DATE limits)
+    DATE_MIN = date(1000, 1, 1)
+    DATE_MAX = date(9999, 12, 31)
+
+    def __init__(self, pool_size=5):
+        self.pool = None
+        self.pool_size = pool_size
+        self.cache = QueryCache(maxsize=256, ttl=300)
+        self.audit = AuditLog(self._write_audit_events)
+        self.audit_user = None  # username recorded with audit events; set at login
+        self.profiler = QueryProfiler()
+        self.password_params = passwords.DEFAULT_PARAMS  # cost of new hashes; see benchmarks.passwords
 
         self.config = {
             'host': '127.0.0.1',
@@ -32,11 +234,11 @@ class Database:
             temp_cursor.close()
             temp_connection.close()
 
-            self.connection = mysql.connector.connect(**self.config)
-            self.cursor = self.connection.cursor(dictionary=True)
-            print("✅ Connected to MySQL database successfully")
+            self.pool = ConnectionPool(self.config, size=self.pool_size, profiler=self.profiler)
+            self.pool.release(self.pool.acquire())  # fail fast if the server is unreachable
+            log.info("Connected to MySQL database successfully")
         except Error as e:
-            print(f"❌ Error connecting to MySQL: {e}")
+            log.error("Error connecting to MySQL: %s", e)
             return False
         return True
 
@@ -71,6 +273,7 @@ class Database:
                 medical_history TEXT,
                 emergency_contact VARCHAR(100),
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
                 FOREIGN KEY (user_id) REFERENCES users(id)
             )
             """
@@ -84,7 +287,8 @@ class Database:
                 phone VARCHAR(20) NOT NULL,
                 email VARCHAR(150) NOT NULL,
                 schedule TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
             )
             """
 
@@ -98,17 +302,19 @@ class Database:
                 email VARCHAR(150),
                 hire_date DATE,
                 salary DECIMAL(10,2),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
             )
             """
 
-            appointments_table = """
+            appointments_table = f"""
             CREATE TABLE IF NOT EXISTS appointments (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 patient_id INT NOT NULL,
                 doctor_id INT NOT NULL,
                 appointment_date DATE NOT NULL,
                 appointment_time TIME NOT NULL,
+                duration_minutes INT NOT NULL DEFAULT {DEFAULT_DURATION},
                 status ENUM('Scheduled','Confirmed','Completed','Cancelled') DEFAULT 'Scheduled',
                 notes TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -118,95 +324,278 @@ class Database:
             )
             """
 
-            self.cursor.execute(users_table)
-            self.cursor.execute(patients_table)
-            self.cursor.execute(doctors_table)
-            self.cursor.execute(staff_table)
-            self.cursor.execute(appointments_table)
-            self.connection.commit()
+            # Materialized counters so the dashboard never runs COUNT(*) scans
+            stats_counters_table = """
+            CREATE TABLE IF NOT EXISTS stats_counters (
+                name VARCHAR(50) PRIMARY KEY,
+                value BIGINT NOT NULL DEFAULT 0
+            )
+            """
+
+            appointment_daily_counts_table = """
+            CREATE TABLE IF NOT EXISTS appointment_daily_counts (
+                appointment_date DATE PRIMARY KEY,
+                total INT NOT NULL DEFAULT 0
+            )
+            """
+
+            # Append-only log of row changes; pages sync incrementally from it
+            change_log_table = """
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+                table_name VARCHAR(30) NOT NULL,
+                row_id INT,
+                operation VARCHAR(10) NOT NULL,
+                changed_at TIMESTAMP(3) DEFAULT CURRENT_TIMESTAMP(3),
+                INDEX idx_change_log_table_seq (table_name, seq),
+                INDEX idx_change_log_changed_at (changed_at)
+            )
+            """
+
+            # Structured availability: weekly blocks (weekday 0 = Monday) plus
+            # dated exceptions (days off, or extra hours when available = 1)
+            doctor_availability_table = """
+            CREATE TABLE IF NOT EXISTS doctor_availability (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                doctor_id INT NOT NULL,
+                weekday TINYINT NOT NULL,
+                start_time TIME NOT NULL,
+                end_time TIME NOT NULL,
+                INDEX idx_availability_doctor_weekday (doctor_id, weekday),
+                FOREIGN KEY (doctor_id) REFERENCES doctors(id) ON DELETE CASCADE
+            )
+            """
+
+            doctor_availability_exceptions_table = """
+            CREATE TABLE IF NOT EXISTS doctor_availability_exceptions (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                doctor_id INT NOT NULL,
+                exception_date DATE NOT NULL,
+                start_time TIME NULL,
+                end_time TIME NULL,
+                available BOOLEAN NOT NULL DEFAULT FALSE,
+                reason VARCHAR(255),
+                INDEX idx_availability_exceptions_doctor_date (doctor_id, exception_date),
+                FOREIGN KEY (doctor_id) REFERENCES doctors(id) ON DELETE CASCADE
+            )
+            """
+
+            # Append-only audit trail, written in batches by AuditLog
+            audit_log_table = """
+            CREATE TABLE IF NOT EXISTS audit_log (
+                id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                occurred_at TIMESTAMP(3) NOT NULL,
+                username VARCHAR(50),
+                action VARCHAR(20) NOT NULL,
+                table_name VARCHAR(40),
+                row_id INT,
+                status VARCHAR(10) NOT NULL,
+                details VARCHAR(255),
+                INDEX idx_audit_log_username (username, id),
+                INDEX idx_audit_log_action (action, id),
+                INDEX idx_audit_log_table (table_name, id)
+            )
+            """
+
+            with self.pool.cursor(label="create_tables") as cursor:
+                cursor.execute(users_table)
+                cursor.execute(patients_table)
+                cursor.execute(doctors_table)
+                cursor.execute(staff_table)
+                cursor.execute(appointments_table)
+                cursor.execute(stats_counters_table)
+                cursor.execute(appointment_daily_counts_table)
+                cursor.execute(change_log_table)
+                cursor.execute(doctor_availability_table)
+                cursor.execute(doctor_availability_exceptions_table)
+                cursor.execute(audit_log_table)
+                for table, column, definition in self.COLUMNS:
+                    self._ensure_column(cursor, table, column, definition)
+                for table, name, columns, kind in self.INDEXES:
+                    self._ensure_index(cursor, table, name, columns, kind)
             self.create_default_admin()
-            print("✅ Database tables created successfully")
+            self.migrate_doctor_schedules()
+            self.reconcile_stats()
+            log.info("Database tables created successfully")
         except Error as e:
-            print(f"❌ Error creating tables: {e}")
+            log.error("Error creating tables: %s", e)
+
+    def _ensure_column(self, cursor, table, column, definition):
+        """Add a column to an existing table unless it is already there"""
+        cursor.execute("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+            LIMIT 1
+        """, (table, column))
+        if not cursor.fetchone():
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            log.info("Added column %s to %s", column, table)
+
+    def _ensure_index(self, cursor, table, name, columns, kind="INDEX"):
+        """Add an index to an existing table unless it is already there"""
+        cursor.execute("""
+            SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+            LIMIT 1
+        """, (table, name))
+        if not cursor.fetchone():
+            cursor.execute(f"ALTER TABLE {table} ADD {kind} {name} ({columns})")
+            log.info("Added index %s on %s", name, table)
 
     def create_default_admin(self):
         try:
-            self.cursor.execute("SELECT * FROM users WHERE username = 'admin'")
-            if self.cursor.fetchone():
-                return
-            password_hash = hashlib.sha256('admin123'.encode()).hexdigest()
-            query = """
-            INSERT INTO users (username, password, role, full_name, email, phone)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            self.cursor.execute(query, ('admin', password_hash, 'Admin',
-                                        'System Administrator',
-                                        'admin@healthnet.com',
-                                        '1234567890'))
-            self.connection.commit()
-            print("✅ Default admin user created: admin/admin123")
+            with self.pool.cursor(label="create_default_admin") as cursor:
+                cursor.execute("SELECT * FROM users WHERE username = 'admin'")
+                if cursor.fetchone():
+                    return
+                password_hash = self.hash_password('admin123')
+                query = """
+                INSERT INTO users (username, password, role, full_name, email, phone)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                """
+                cursor.execute(query, ('admin', password_hash, 'Admin',
+                                       'System Administrator',
+                                       'admin@healthnet.com',
+                                       '1234567890'))
+            log.info("Default admin user created: admin/admin123")
         except Error as e:
-            print(f"❌ Error creating default admin: {e}")
+            log.error("Error creating default admin: %s", e)
 
     def hash_password(self, password):
-        return hashlib.sha256(password.encode()).hexdigest()
-
-    def get_all_patients_for_signup(self):
-       self.cursor.execute("SELECT id, first_name, last_name FROM patients")
-       return self.cursor.fetchall()
-
-    def get_all_doctors_for_signup(self):
-        self.cursor.execute("SELECT id, first_name, last_name FROM doctors")
-        return self.cursor.fetchall()
+        """Salted hash of ``password`` with the current ``password_params``"""
+        return passwords.hash_password(password, self.password_params)
 
+    @audited("add", "users")
     def create_user(self, linked_id, role, username, password, email="", phone=""):
         try:
             password_hash = self.hash_password(password)
-            if role == "Patient":
-                self.cursor.execute("SELECT first_name, last_name FROM patients WHERE id=%s", (linked_id,))
-                user = self.cursor.fetchone()
-                full_name = f"{user['first_name']} {user['last_name']}" if user else "Patient User"
-            elif role == "Doctor":
-                self.cursor.execute("SELECT first_name, last_name FROM doctors WHERE id=%s", (linked_id,))
-                user = self.cursor.fetchone()
-                full_name = f"Dr. {user['first_name']} {user['last_name']}" if user else "Doctor User"
-            else:
-                full_name = "Staff User"
+            with self.pool.cursor(label="create_user") as cursor:
+                if role == "Patient":
+                    cursor.execute("SELECT first_name, last_name FROM patients WHERE id=%s", (linked_id,))
+                    user = cursor.fetchone()
+                    full_name = f"{user['first_name']} {user['last_name']}" if user else "Patient User"
+                elif role == "Doctor":
+                    cursor.execute("SELECT first_name, last_name FROM doctors WHERE id=%s", (linked_id,))
+                    user = cursor.fetchone()
+                    full_name = f"Dr. {user['first_name']} {user['last_name']}" if user else "Doctor User"
+                else:
+                    full_name = "Staff User"
 
-            query = """
-            INSERT INTO users (username, password, role, full_name, email, phone)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            self.cursor.execute(query, (username, password_hash, role, full_name, email, phone))
-            self.connection.commit()
-            return True
+                query = """
+                INSERT INTO users (username, password, role, full_name, email, phone)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                """
+                cursor.execute(query, (username, password_hash, role, full_name, email, phone))
+                user_id = cursor.lastrowid
+                self._log_change(cursor, "users", user_id, "upsert")
+            return user_id
         except Error as e:
-            print(f"❌ Error creating user: {e}")
+            log.error("Error creating user: %s", e)
             return False
 
     def authenticate_user(self, username, password):
-        password_hash = self.hash_password(password)
-        query = "SELECT * FROM users WHERE username=%s AND password=%s"
-        self.cursor.execute(query, (username, password_hash))
-        return self.cursor.fetchone()
+        """The user row for valid credentials of an active account, else None; stamps last_login.
+
+        The key derivation is deliberately slow, so call this off the Tk
+        thread; no connection is held while it runs. A hash made with
+        older parameters (or a legacy SHA-256 digest) is replaced with one
+        using ``password_params`` once the password has been verified.
+        """
+        with self.pool.cursor(label="authenticate_user") as cursor:
+            cursor.execute("SELECT * FROM users WHERE username=%s", (username,))
+            user = cursor.fetchone()
+        # An unknown username costs the same as a wrong password
+        if not passwords.verify_password(password, user["password"] if user else None, self.password_params):
+            user = None
+        if user and user["is_active"]:
+            rehashed = None
+            if passwords.needs_rehash(user["password"], self.password_params):
+                rehashed = self.hash_password(password)
+            with self.pool.cursor(label="authenticate_user") as cursor:
+                cursor.execute("UPDATE users SET last_login = %s WHERE id = %s", (datetime.now(), user["id"]))
+                if rehashed:
+                    # Only if the password wasn't changed meanwhile
+                    cursor.execute("UPDATE users SET password = %s WHERE id = %s AND password = %s",
+                                   (rehashed, user["id"], user["password"]))
+                    if cursor.rowcount:
+                        log.info("Upgraded the password hash of user %s", user["id"])
+        if user and not user["is_active"]:
+            self.audit.record("login", "users", user["id"], username, "disabled")
+            return None
+        self.audit.record("login", "users", user["id"] if user else None, username, "ok" if user else "failed")
+        return user
+
+    # ---------- User management ----------
+    USER_COLUMNS = "id, username, full_name, role, email, phone, is_active, last_login, last_login_sort, created_at"
+    # Sortable columns of the user list and their keyset keys (each backed by an index)
+    USER_SORTS = {
+        "username": ("username", "id"),
+        "full_name": ("full_name", "id"),
+        "last_login": ("last_login_sort", "id"),
+        "created_at": ("created_at", "id"),
+    }
+
+    def get_all_users(self):
+        with self.pool.cursor(label="get_all_users") as cursor:
+            cursor.execute(f"SELECT {self.USER_COLUMNS} FROM users ORDER BY username")
+            return cursor.fetchall()
+
+    def get_users_page(self, after_key=None, limit=100, before_key=None, sort="username", descending=False,
+                       role=None, active=None, search=None):
+        """One page of users in ``sort`` order, optionally filtered.
+
+        Keys are (sort column, id) tuples; ``search`` matches a username or
+        full name prefix and ``active`` is True/False for the account flag.
+        """
+        filters, params = [], []
+        if role:
+            filters.append("role = %s")
+            params.append(role)
+        if active is not None:
+            filters.append("is_active = %s")
+            params.append(bool(active))
+        if search:
+            filters.append("(username LIKE %s OR full_name LIKE %s)")
+            params.extend([self._like_prefix(search)] * 2)
+        return self._keyset_page(f"SELECT {self.USER_COLUMNS} FROM users", self.USER_SORTS[sort], descending,
+                                 after_key, before_key, limit, filters, params, label="get_users_page")
+
+    @audited("status", "users")
+    def set_user_active(self, user_id, active):
+        with self.pool.cursor(label="set_user_active") as cursor:
+            cursor.execute("UPDATE users SET is_active = %s WHERE id = %s", (bool(active), user_id))
+            updated = cursor.rowcount > 0
+            if updated:
+                self._log_change(cursor, "users", user_id, "upsert")
+            return updated
+
+    def get_patient_id_for_user(self, user_id):
+        """Return the patients.id linked to a login account, or None."""
+        with self.pool.cursor(label="get_patient_id_for_user") as cursor:
+            cursor.execute("SELECT id FROM patients WHERE user_id = %s LIMIT 1", (user_id,))
+            row = cursor.fetchone()
+            return row["id"] if row else None
+
+    def get_doctor_id_for_user(self, user_id):
+        """Return the doctors.id linked to a login account, or None."""
+        with self.pool.cursor(label="get_doctor_id_for_user") as cursor:
+            cursor.execute("SELECT id FROM doctors WHERE user_id = %s LIMIT 1", (user_id,))
+            row = cursor.fetchone()
+            return row["id"] if row else None
 
 
     # ----------------------
     # ✅ PATIENT CRUD METHODS
     # ----------------------
-   
-    
+
+
+    @audited("add", "patients")
+    @invalidates("patients")
     def add_patient(self, data):
-        """Insert new patient"""
+        """Insert new patient; returns its id (False on error)"""
         try:
             # Calculate age from DOB
-            dob = data.get("date_of_birth")
-            if dob:
-                birth_date = datetime.strptime(dob, "%Y-%m-%d").date()
-                today = date.today()
-                data['age'] = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-            else:
-                data['age'] = None
+            data['age'] = age_from_dob(data.get("date_of_birth"))
 
             query = """
             INSERT INTO patients (
@@ -228,43 +617,66 @@ class Database:
                 data.get("medical_history"),
                 data.get("emergency_contact"),
             )
-            self.cursor.execute(query, values)
-            self.connection.commit()
-            return True
+            with self.pool.cursor(label="add_patient") as cursor:
+                cursor.execute(query, values)
+                patient_id = cursor.lastrowid
+                self._log_change(cursor, "patients", patient_id, "upsert")
+                self._bump_counter(cursor, "patients", 1)
+            return patient_id
         except Error as e:
-            print(f"Error adding patient: {e}")
+            log.error("Error adding patient: %s", e)
             return False
 
+    PATIENT_COLUMNS = """
+        id, patient_id, first_name, last_name, age, date_of_birth, gender, phone, email, address,
+        medical_history, emergency_contact, created_at
+    """
+
     def get_all_patients(self):
         try:
-            self.cursor.execute("""
-                SELECT id, patient_id, first_name, last_name, age, date_of_birth, gender, phone, email, address,
-                       medical_history, emergency_contact, created_at
-                FROM patients
-                ORDER BY created_at DESC
-            """)
-            return self.cursor.fetchall()
+            with self.pool.cursor(label="get_all_patients") as cursor:
+                cursor.execute(f"""
+                    SELECT {self.PATIENT_COLUMNS}
+                    FROM patients
+                    ORDER BY created_at DESC
+                """)
+                return cursor.fetchall()
         except Error as e:
-            print(f"Error fetching patients: {e}")
+            log.error("Error fetching patients: %s", e)
             return []
 
+    def get_patients_page(self, after_key=None, limit=100, before_key=None):
+        """One page of patients, newest first, keyed by id"""
+        return self._keyset_page(f"SELECT {self.PATIENT_COLUMNS} FROM patients",
+                                 ("id",), True, after_key, before_key, limit, label="get_patients_page")
+
+    def search_patients(self, term, limit=50):
+        """Ranked prefix/fuzzy search over patient names and email (top ``limit``)"""
+        try:
+            return self._search("patients", self.PATIENT_COLUMNS, term, limit, label="search_patients")
+        except Error as e:
+            log.error("Error searching patients: %s", e)
+            return []
+
+    def get_patients_by_ids(self, ids):
+        return self._rows_by_ids(f"SELECT {self.PATIENT_COLUMNS} FROM patients", "id", ids, label="get_patients_by_ids")
+
+    def get_patient_changes(self, since):
+        return self._changes("patients", since, self.get_patients_by_ids, label="get_patient_changes")
+
+    @audited("update", "patients")
+    @invalidates("patients")
     def update_patient(self, data):
         """Update existing patient"""
         try:
             # Calculate age from DOB
-            dob = data.get("date_of_birth")
-            if dob:
-                birth_date = datetime.strptime(dob, "%Y-%m-%d").date()
-                today = date.today()
-                data['age'] = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-            else:
-                data['age'] = None
+            data['age'] = age_from_dob(data.get("date_of_birth"))
 
             query = """
-            UPDATE patients SET 
+            UPDATE patients SET
                 first_name=%s, last_name=%s, age=%s, date_of_birth=%s, gender=%s, phone=%s, email=%s,
                 address=%s, medical_history=%s, emergency_contact=%s
-            WHERE patient_id=%s
+            WHERE id=%s
             """
             values = (
                 data.get("first_name"),
@@ -277,68 +689,154 @@ class Database:
                 data.get("address"),
                 data.get("medical_history"),
                 data.get("emergency_contact"),
-                data.get("patient_id")
+                data.get("id")
             )
-            self.cursor.execute(query, values)
-            self.connection.commit()
+            with self.pool.cursor(label="update_patient") as cursor:
+                cursor.execute(query, values)
+                self._log_change(cursor, "patients", data.get("id"), "upsert")
             return True
         except Error as e:
-            print(f"Error updating patient: {e}")
+            log.error("Error updating patient: %s", e)
             return False
 
+    @audited("delete", "patients")
+    @invalidates("patients")
     def delete_patient(self, patient_id):
         try:
-            self.cursor.execute("DELETE FROM patients WHERE patient_id = %s", (patient_id,))
-            self.connection.commit()
-            return True
+            with self.pool.cursor(label="delete_patient") as cursor:
+                cursor.execute("DELETE FROM patients WHERE id = %s", (patient_id,))
+                deleted = cursor.rowcount
+                if deleted:
+                    self._log_change(cursor, "patients", patient_id, "delete")
+                    self._bump_counter(cursor, "patients", -deleted)
+            return deleted > 0
         except Error as e:
-            print(f"Error deleting patient: {e}")
+            log.error("Error deleting patient: %s", e)
             return False
-        
+
             # ----------------------
     # ✅ DASHBOARD STATS METHODS
     # ----------------------
-    def count_patients(self):
+    # Counters live in stats_counters / appointment_daily_counts and are
+    # bumped inside the same transaction as every add/delete, so the
+    # dashboard reads them instead of scanning the base tables.
+    COUNTED_TABLES = ("patients", "doctors", "staff", "appointments")
+
+    def _bump_counter(self, cursor, name, delta):
+        if not delta:
+            return
+        cursor.execute("""
+            INSERT INTO stats_counters (name, value) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE value = value + VALUES(value)
+        """, (name, delta))
+
+    def _bump_appointment_day(self, cursor, appointment_date, delta):
+        cursor.execute("""
+            INSERT INTO appointment_daily_counts (appointment_date, total) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE total = total + VALUES(total)
+        """, (appointment_date, delta))
+
+    def get_dashboard_stats(self):
+        """All dashboard numbers in one primary-key read of the counters tables."""
+        stats = {name: 0 for name in self.COUNTED_TABLES}
+        stats["appointments_today"] = 0
         try:
-            self.cursor.execute("SELECT COUNT(*) as count FROM patients")
-            result = self.cursor.fetchone()
+            with self.pool.cursor(label="get_dashboard_stats") as cursor:
+                cursor.execute("""
+                    SELECT name, value FROM stats_counters
+                    UNION ALL
+                    SELECT 'appointments_today', total FROM appointment_daily_counts
+                    WHERE appointment_date = %s
+                """, (date.today(),))
+                for row in cursor.fetchall():
+                    stats[row["name"]] = int(row["value"])
+        except Error as e:
+            log.error("Error fetching dashboard stats: %s", e)
+        return stats
+
+    def reconcile_stats(self):
+        """Rebuild the counters tables from the base tables.
+
+        The counter rows are locked first, then recounted, so no write can
+        land between a count and its counter. Those FOR UPDATE locks are held
+        across full COUNT(*) scans of every counted table and the
+        appointments GROUP BY: every add or delete blocks until the whole
+        reconcile commits. Run it at startup, after bulk loads and on the
+        hourly timer, not on a request path.
+        """
+        try:
+            with self.pool.cursor(label="reconcile_stats") as cursor:
+                cursor.execute("SELECT name FROM stats_counters FOR UPDATE")
+                cursor.fetchall()
+                cursor.execute("SELECT appointment_date FROM appointment_daily_counts FOR UPDATE")
+                cursor.fetchall()
+                for table in self.COUNTED_TABLES:
+                    cursor.execute(f"SELECT COUNT(*) AS count FROM {table}")
+                    count = cursor.fetchone()["count"]
+                    cursor.execute("""
+                        INSERT INTO stats_counters (name, value) VALUES (%s, %s)
+                        ON DUPLICATE KEY UPDATE value = VALUES(value)
+                    """, (table, count))
+                cursor.execute("DELETE FROM appointment_daily_counts")
+                cursor.execute("""
+                    INSERT INTO appointment_daily_counts (appointment_date, total)
+                    SELECT appointment_date, COUNT(*) FROM appointments GROUP BY appointment_date
+                """)
+            return True
+        except Error as e:
+            log.error("Error reconciling stats counters: %s", e)
+            return False
+
+    def _count(self, query, params=(), label=None):
+        with self.pool.cursor(label=label) as cursor:
+            cursor.execute(query, params)
+            result = cursor.fetchone()
             return result["count"] if result else 0
+
+    def count_patients(self):
+        try:
+            return self._count("SELECT COUNT(*) as count FROM patients", label="count_patients")
         except Error as e:
-            print("Error counting patients:", e)
+            log.error("Error counting patients: %s", e)
             return 0
 
     def count_doctors(self):
         try:
-            self.cursor.execute("SELECT COUNT(*) as count FROM doctors")
-            result = self.cursor.fetchone()
-            return result["count"] if result else 0
+            return self._count("SELECT COUNT(*) as count FROM doctors", label="count_doctors")
         except Error as e:
-            print("Error counting doctors:", e)
+            log.error("Error counting doctors: %s", e)
             return 0
 
     def count_staff(self):
         try:
-            self.cursor.execute("SELECT COUNT(*) as count FROM staff")
-            result = self.cursor.fetchone()
-            return result["count"] if result else 0
+            return self._count("SELECT COUNT(*) as count FROM staff", label="count_staff")
         except Error as e:
-            print("Error counting staff:", e)
+            log.error("Error counting staff: %s", e)
             return 0
 
+    COUNT_APPOINTMENTS_BETWEEN_QUERY = """
+        SELECT COUNT(*) as count FROM appointments
+        WHERE appointment_date BETWEEN %s AND %s
+    """
+
     def count_todays_appointments(self):
+        today = date.today()
+        return self.count_appointments_between(today, today)
+
+    def count_appointments_between(self, start_date, end_date):
+        """Count appointments whose date falls in [start_date, end_date]"""
         try:
-            self.cursor.execute(
-                "SELECT COUNT(*) as count FROM appointments WHERE DATE(appointment_date) = CURDATE()"
-            )
-            result = self.cursor.fetchone()
-            return result["count"] if result else 0
+            return self._count(self.COUNT_APPOINTMENTS_BETWEEN_QUERY, (start_date, end_date),
+                               label="count_appointments_between")
         except Error as e:
-            print("Error counting today's appointments:", e)
+            log.error("Error counting appointments: %s", e)
             return 0
-        
+
         # ---------------- DOCTORS ----------------
   # ---------------------- Doctor Methods ----------------------
 
+    @audited("add", "doctors")
+    @invalidates("doctors")
     def add_doctor(self, data):
         query = """
             INSERT INTO doctors (first_name, last_name, specialization, phone, email, schedule)
@@ -352,13 +850,20 @@ class Database:
             data.get("email"),
             data.get("schedule"),
         )
-        self.cursor.execute(query, values)
-        self.connection.commit()
-        return self.cursor.lastrowid
+        blocks = parse_weekly_schedule(data.get("schedule"))
+        with self.pool.cursor(label="add_doctor") as cursor:
+            cursor.execute(query, values)
+            doctor_id = cursor.lastrowid
+            self._save_weekly_blocks(cursor, doctor_id, blocks)
+            self._log_change(cursor, "doctors", doctor_id, "upsert")
+            self._bump_counter(cursor, "doctors", 1)
+            return doctor_id
 
+    @audited("update", "doctors")
+    @invalidates("doctors")
     def update_doctor(self, data):
         query = """
-            UPDATE doctors 
+            UPDATE doctors
             SET first_name=%s, last_name=%s, specialization=%s, phone=%s, email=%s, schedule=%s
             WHERE id=%s
         """
@@ -371,28 +876,44 @@ class Database:
             data.get("schedule"),
             data.get("id"),
         )
-        self.cursor.execute(query, values)
-        self.connection.commit()
+        blocks = parse_weekly_schedule(data.get("schedule"))
+        with self.pool.cursor(label="update_doctor") as cursor:
+            cursor.execute(query, values)
+            self._save_weekly_blocks(cursor, data.get("id"), blocks)
+            self._log_change(cursor, "doctors", data.get("id"), "upsert")
+        return True
 
+    @audited("delete", "doctors")
+    @invalidates("doctors")
     def delete_doctor(self, doctor_id):
         query = "DELETE FROM doctors WHERE id=%s"
-        self.cursor.execute(query, (doctor_id,))
-        self.connection.commit()
+        with self.pool.cursor(label="delete_doctor") as cursor:
+            cursor.execute(query, (doctor_id,))
+            deleted = cursor.rowcount
+            if deleted:
+                self._log_change(cursor, "doctors", doctor_id, "delete")
+                self._bump_counter(cursor, "doctors", -deleted)
+        return deleted > 0
 
     def get_all_doctors(self):
-        self.cursor.execute("SELECT * FROM doctors ORDER BY id DESC")
-        return self.cursor.fetchall()
+        with self.pool.cursor(label="get_all_doctors") as cursor:
+            cursor.execute("SELECT * FROM doctors ORDER BY id DESC")
+            return cursor.fetchall()
+
+    def get_doctors_page(self, after_key=None, limit=100, before_key=None):
+        """One page of doctors, newest first, keyed by id"""
+        return self._keyset_page("SELECT * FROM doctors", ("id",), True, after_key, before_key, limit,
+                                 label="get_doctors_page")
+
+    def get_doctors_by_ids(self, ids):
+        return self._rows_by_ids("SELECT * FROM doctors", "id", ids, label="get_doctors_by_ids")
+
+    def get_doctor_changes(self, since):
+        return self._changes("doctors", since, self.get_doctors_by_ids, label="get_doctor_changes")
+
+    def search_doctors(self, term, limit=50):
+        return self._search("doctors", "*", term, limit, label="search_doctors")
 
-    def search_doctors(self, term):
-        like_term = f"%{term}%"
-        query = """
-            SELECT * FROM doctors
-            WHERE first_name LIKE %s OR last_name LIKE %s OR specialization LIKE %s 
-                  OR phone LIKE %s OR email LIKE %s
-        """
-        self.cursor.execute(query, (like_term, like_term, like_term, like_term, like_term))
-        return self.cursor.fetchall()
-    
     def get_doctor_by_id(self, doctor_id):
         """
         Fetch a doctor's details by their ID.
@@ -402,168 +923,434 @@ class Database:
             FROM doctors
             WHERE id = %s
         """
-        self.cursor.execute(query, (doctor_id,))
-        row = self.cursor.fetchone()
-    
+        with self.pool.cursor(label="get_doctor_by_id") as cursor:
+            cursor.execute(query, (doctor_id,))
+            row = cursor.fetchone()
+
         if row:
             return {
                 "full_name": f"{row['first_name']} {row['last_name']}",
                 "specialization": row["specialization"]
             }
         return None
-    
+
    # ---------------- STAFF METHODS ----------------
+    @audited("add", "staff")
+    @invalidates("staff")
     def add_staff(self, data):
         query = """
             INSERT INTO staff (full_name, role, department, phone, email, hire_date, salary)
             VALUES (%s, %s, %s, %s, %s, %s, %s)
         """
-        self.cursor.execute(query, (
-            data['full_name'],
-            data['role'],
-            data['department'],
-            data['phone'],
-            data['email'],
-            data['hire_date'],
-            data['salary']
-        ))
-        self.connection.commit()
+        with self.pool.cursor(label="add_staff") as cursor:
+            cursor.execute(query, (
+                data['full_name'],
+                data['role'],
+                data['department'],
+                data['phone'],
+                data['email'],
+                data['hire_date'],
+                data['salary']
+            ))
+            staff_id = cursor.lastrowid
+            self._log_change(cursor, "staff", staff_id, "upsert")
+            self._bump_counter(cursor, "staff", 1)
+        return staff_id
 
+    @audited("update", "staff")
+    @invalidates("staff")
     def update_staff(self, data):
         query = """
-            UPDATE staff 
+            UPDATE staff
             SET full_name=%s, role=%s, department=%s, phone=%s, email=%s, hire_date=%s, salary=%s
             WHERE id=%s
         """
-        self.cursor.execute(query, (
-            data['full_name'],
-            data['role'],
-            data['department'],
-            data['phone'],
-            data['email'],
-            data['hire_date'],
-            data['salary'],
-            data['id']
-        ))
-        self.connection.commit()
+        with self.pool.cursor(label="update_staff") as cursor:
+            cursor.execute(query, (
+                data['full_name'],
+                data['role'],
+                data['department'],
+                data['phone'],
+                data['email'],
+                data['hire_date'],
+                data['salary'],
+                data['id']
+            ))
+            self._log_change(cursor, "staff", data['id'], "upsert")
+        return True
 
+    @audited("delete", "staff")
+    @invalidates("staff")
     def delete_staff(self, staff_id):
         query = "DELETE FROM staff WHERE id=%s"
-        self.cursor.execute(query, (staff_id,))
-        self.connection.commit()
+        with self.pool.cursor(label="delete_staff") as cursor:
+            cursor.execute(query, (staff_id,))
+            deleted = cursor.rowcount
+            if deleted:
+                self._log_change(cursor, "staff", staff_id, "delete")
+                self._bump_counter(cursor, "staff", -deleted)
+        return deleted > 0
 
     def get_all_staff(self):
-        self.cursor.execute("SELECT * FROM staff ORDER BY id DESC")
-        return self.cursor.fetchall()
+        with self.pool.cursor(label="get_all_staff") as cursor:
+            cursor.execute("SELECT * FROM staff ORDER BY id DESC")
+            return cursor.fetchall()
 
-    def search_staff(self, term):
-        like_term = f"%{term}%"
-        query = """
-            SELECT * FROM staff 
-            WHERE full_name LIKE %s 
-               OR role LIKE %s 
-               OR department LIKE %s 
-               OR email LIKE %s
-        """
-        self.cursor.execute(query, (like_term, like_term, like_term, like_term))
-        return self.cursor.fetchall()
+    def get_staff_page(self, after_key=None, limit=100, before_key=None):
+        """One page of staff, newest first, keyed by id"""
+        return self._keyset_page("SELECT * FROM staff", ("id",), True, after_key, before_key, limit,
+                                 label="get_staff_page")
+
+    def get_staff_by_ids(self, ids):
+        return self._rows_by_ids("SELECT * FROM staff", "id", ids, label="get_staff_by_ids")
+
+    def get_staff_changes(self, since):
+        return self._changes("staff", since, self.get_staff_by_ids, label="get_staff_changes")
+
+    def search_staff(self, term, limit=50):
+        return self._search("staff", "*", term, limit, label="search_staff")
 
 
     # ---------------------- APPOINTMENTS ----------------------
-    def add_appointment(self, patient_id, doctor_id, appointment_date, appointment_time, status="Scheduled", notes=""):
+    @audited("add", "appointments")
+    def add_appointment(self, patient_id, doctor_id, appointment_date, appointment_time, status="Scheduled", notes="",
+                        duration_minutes=DEFAULT_DURATION):
+        """Book an appointment and return its id; raises AppointmentConflictError if the doctor is taken"""
         try:
             query = """
-                INSERT INTO appointments (patient_id, doctor_id, appointment_date, appointment_time, status, notes)
-                VALUES (%s, %s, %s, %s, %s, %s)
+                INSERT INTO appointments (patient_id, doctor_id, appointment_date, appointment_time,
+                                          duration_minutes, status, notes)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
             """
-            self.cursor.execute(query, (patient_id, doctor_id, appointment_date, appointment_time, status, notes))
-            self.connection.commit()
-            return True
+            start, end = appointment_interval(appointment_date, appointment_time, duration_minutes)
+            with self.pool.cursor(label="add_appointment") as cursor:
+                if status != "Cancelled":
+                    self._check_slot(cursor, doctor_id, start, end)
+                cursor.execute(query, (patient_id, doctor_id, appointment_date, appointment_time,
+                                       duration_minutes, status, notes))
+                appointment_id = cursor.lastrowid
+                self._log_change(cursor, "appointments", appointment_id, "upsert")
+                self._bump_counter(cursor, "appointments", 1)
+                self._bump_appointment_day(cursor, appointment_date, 1)
+            return appointment_id
         except Error as e:
-            print(f"❌ Error adding appointment: {e}")
+            log.error("Error adding appointment: %s", e)
             return False
 
+    APPOINTMENT_LIST_QUERY = """
+        SELECT a.id, a.patient_id, a.doctor_id,
+               p.first_name AS patient_first, p.last_name AS patient_last,
+               d.first_name AS doctor_first, d.last_name AS doctor_last,
+               a.appointment_date, a.appointment_time, a.duration_minutes, a.status, a.notes
+        FROM appointments a
+        JOIN patients p ON a.patient_id = p.id
+        JOIN doctors d ON a.doctor_id = d.id
+    """
+
     def get_all_appointments(self):
         try:
-            query = """
-                SELECT a.id, a.patient_id, a.doctor_id,
-                       p.first_name AS patient_first, p.last_name AS patient_last,
-                       d.first_name AS doctor_first, d.last_name AS doctor_last,
-                       a.appointment_date, a.appointment_time, a.status, a.notes
-                FROM appointments a
-                JOIN patients p ON a.patient_id = p.id
-                JOIN doctors d ON a.doctor_id = d.id
-                ORDER BY a.appointment_date, a.appointment_time
-            """
-            self.cursor.execute(query)
-            return self.cursor.fetchall()
+            query = self.APPOINTMENT_LIST_QUERY + " ORDER BY a.appointment_date, a.appointment_time"
+            with self.pool.cursor(label="get_all_appointments") as cursor:
+                cursor.execute(query)
+                return cursor.fetchall()
         except Error as e:
-            print(f"❌ Error fetching appointments: {e}")
+            log.error("Error fetching appointments: %s", e)
             return []
 
+    def get_appointments_page(self, after_key=None, limit=100, before_key=None):
+        """One page of appointments in date/time order.
+
+        Keys are (appointment_date, appointment_time, id) tuples.
+        """
+        return self._keyset_page(self.APPOINTMENT_LIST_QUERY,
+                                 ("a.appointment_date", "a.appointment_time", "a.id"),
+                                 False, after_key, before_key, limit, label="get_appointments_page")
+
+    @audited("update", "appointments")
     def update_appointment(self, data):
+        """Update an appointment; raises AppointmentConflictError if the new slot is taken"""
         try:
             query = """
                 UPDATE appointments
                 SET patient_id=%s, doctor_id=%s, appointment_date=%s,
-                    appointment_time=%s, status=%s, notes=%s
+                    appointment_time=%s, duration_minutes=%s, status=%s, notes=%s
                 WHERE id=%s
             """
-            self.cursor.execute(query, (
-                data['patient_id'], data['doctor_id'], data['appointment_date'],
-                data['appointment_time'], data['status'], data['notes'], data['id']
-            ))
-            self.connection.commit()
+            duration = data.get('duration_minutes') or DEFAULT_DURATION
+            start, end = appointment_interval(data['appointment_date'], data['appointment_time'], duration)
+            with self.pool.cursor(label="update_appointment") as cursor:
+                cursor.execute("SELECT appointment_date FROM appointments WHERE id=%s FOR UPDATE", (data['id'],))
+                previous = cursor.fetchone()
+                if data['status'] != "Cancelled":
+                    self._check_slot(cursor, data['doctor_id'], start, end, exclude_id=data['id'])
+                cursor.execute(query, (
+                    data['patient_id'], data['doctor_id'], data['appointment_date'],
+                    data['appointment_time'], duration, data['status'], data['notes'], data['id']
+                ))
+                self._log_change(cursor, "appointments", data['id'], "upsert")
+                if previous and str(previous['appointment_date']) != str(data['appointment_date']):
+                    self._bump_appointment_day(cursor, previous['appointment_date'], -1)
+                    self._bump_appointment_day(cursor, data['appointment_date'], 1)
             return True
         except Error as e:
-            print(f"❌ Error updating appointment: {e}")
+            log.error("Error updating appointment: %s", e)
             return False
 
-    def search_appointments(self, term):
+    @audited("status", "appointments")
+    def update_appointment_status(self, appointment_id, status):
+        with self.pool.cursor(label="update_appointment_status") as cursor:
+            cursor.execute("""
+                SELECT doctor_id, appointment_date, appointment_time, duration_minutes, status
+                FROM appointments WHERE id=%s FOR UPDATE
+            """, (appointment_id,))
+            current = cursor.fetchone()
+            if not current:
+                return False
+            start, end = appointment_interval(current['appointment_date'], current['appointment_time'],
+                                              current['duration_minutes'])
+            reopening = current['status'] == "Cancelled" and status != "Cancelled"
+            if reopening:
+                # The slot may have been given away while this booking was cancelled
+                self._check_slot(cursor, current['doctor_id'], start, end, exclude_id=appointment_id)
+            cursor.execute("UPDATE appointments SET status=%s WHERE id=%s", (status, appointment_id))
+            self._log_change(cursor, "appointments", appointment_id, "upsert")
+        return True
+
+    # ---------- Conflict detection ----------
+    # Bookings that overlap [start, end) for one doctor; answered from
+    # idx_appointments_doctor_date (doctor_id, appointment_date, appointment_time).
+    # The previous day is included for appointments that run past midnight.
+    SLOT_CONFLICT_QUERY = """
+        SELECT id, appointment_date, appointment_time, duration_minutes
+        FROM appointments
+        WHERE doctor_id = %s
+          AND appointment_date BETWEEN %s AND %s
+          AND status <> 'Cancelled'
+          AND id <> %s
+        ORDER BY appointment_date, appointment_time
+    """
+
+    def _check_slot(self, cursor, doctor_id, start, end, exclude_id=None):
+        """Raise AppointmentConflictError if [start, end) overlaps a booking of ``doctor_id``.
+
+        Locks the doctor's row first, so concurrent bookings for the same
+        doctor are serialized until the caller's transaction commits; two
+        desks can never both see the slot as free.
+        """
+        cursor.execute("SELECT id FROM doctors WHERE id = %s FOR UPDATE", (doctor_id,))
+        if not cursor.fetchone():
+            raise AppointmentConflictError(f"Doctor {doctor_id} does not exist")
+        cursor.execute(self.SLOT_CONFLICT_QUERY, (
+            doctor_id, start.date() - timedelta(days=1), (end - timedelta(microseconds=1)).date(),
+            exclude_id or 0
+        ))
+        for row in cursor.fetchall():
+            other_start, other_end = appointment_interval(row['appointment_date'], row['appointment_time'],
+                                                          row['duration_minutes'])
+            if other_start < end and other_end > start:
+                raise AppointmentConflictError(
+                    f"The doctor already has an appointment from {other_start:%Y-%m-%d %H:%M} "
+                    f"to {other_end:%H:%M}"
+                )
+
+    # ---------------------- DOCTOR AVAILABILITY ----------------------
+    def _save_weekly_blocks(self, cursor, doctor_id, blocks):
+        cursor.execute("DELETE FROM doctor_availability WHERE doctor_id = %s", (doctor_id,))
+        if blocks:
+            cursor.executemany(
+                "INSERT INTO doctor_availability (doctor_id, weekday, start_time, end_time) VALUES (%s, %s, %s, %s)",
+                [(doctor_id, weekday, start, end) for weekday, start, end in blocks]
+            )
+
+    def migrate_doctor_schedules(self):
+        """Build weekly blocks for doctors whose free-text schedule has none yet"""
         try:
-            query = """
-                SELECT a.id, a.patient_id, a.doctor_id,
-                       p.first_name AS patient_first, p.last_name AS patient_last,
-                       d.first_name AS doctor_first, d.last_name AS doctor_last,
-                       a.appointment_date, a.appointment_time, a.status, a.notes
-                FROM appointments a
-                JOIN patients p ON a.patient_id = p.id
-                JOIN doctors d ON a.doctor_id = d.id
-                WHERE p.first_name LIKE %s OR p.last_name LIKE %s
-                   OR d.first_name LIKE %s OR d.last_name LIKE %s
-                ORDER BY a.appointment_date, a.appointment_time
-            """
-            term_wild = f"%{term}%"
-            self.cursor.execute(query, (term_wild, term_wild, term_wild, term_wild))
-            return self.cursor.fetchall()
+            with self.pool.cursor(label="migrate_doctor_schedules") as cursor:
+                cursor.execute("""
+                    SELECT d.id, d.schedule FROM doctors d
+                    WHERE d.schedule IS NOT NULL AND d.schedule <> ''
+                      AND NOT EXISTS (SELECT 1 FROM doctor_availability a WHERE a.doctor_id = d.id)
+                """)
+                for row in cursor.fetchall():
+                    try:
+                        self._save_weekly_blocks(cursor, row["id"], parse_weekly_schedule(row["schedule"]))
+                    except ValueError as e:
+                        log.warning("Could not read schedule of doctor %s: %s", row['id'], e)
+        except Error as e:
+            log.error("Error migrating doctor schedules: %s", e)
+
+    def get_doctor_availability(self, doctor_id):
+        with self.pool.cursor(label="get_doctor_availability") as cursor:
+            cursor.execute("""
+                SELECT weekday, start_time, end_time FROM doctor_availability
+                WHERE doctor_id = %s ORDER BY weekday, start_time
+            """, (doctor_id,))
+            return cursor.fetchall()
+
+    @audited("add", "doctor_availability_exceptions")
+    def add_availability_exception(self, doctor_id, exception_date, start_time=None, end_time=None,
+                                   available=False, reason=""):
+        """Mark a doctor off (or, with available=True, on) for a date or part of it"""
+        with self.pool.cursor(label="add_availability_exception") as cursor:
+            cursor.execute("""
+                INSERT INTO doctor_availability_exceptions
+                    (doctor_id, exception_date, start_time, end_time, available, reason)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (doctor_id, exception_date, start_time or None, end_time or None, available, reason))
+            return cursor.lastrowid
+
+    def get_availability_exceptions(self, doctor_id, start_date=None, end_date=None):
+        with self.pool.cursor(label="get_availability_exceptions") as cursor:
+            cursor.execute("""
+                SELECT id, exception_date, start_time, end_time, available, reason
+                FROM doctor_availability_exceptions
+                WHERE doctor_id = %s AND exception_date BETWEEN %s AND %s
+                ORDER BY exception_date, start_time
+            """, (doctor_id, start_date or self.DATE_MIN, end_date or self.DATE_MAX))
+            return cursor.fetchall()
+
+    @audited("delete", "doctor_availability_exceptions")
+    def delete_availability_exception(self, exception_id):
+        with self.pool.cursor(label="delete_availability_exception") as cursor:
+            cursor.execute("DELETE FROM doctor_availability_exceptions WHERE id = %s", (exception_id,))
+            return cursor.rowcount > 0
+
+    def find_free_slots(self, specialization=None, start_date=None, end_date=None, count=10,
+                        duration_minutes=DEFAULT_DURATION, not_before=None):
+        """The ``count`` earliest free appointment slots for a specialization.
+
+        Three indexed queries load the weekly blocks, exceptions and bookings
+        of every matching doctor in the date range; the slots are then found
+        by sweeping each doctor's open hours against the bookings (see
+        ``scheduling.find_free_slots``). Returns dicts with doctor_id,
+        doctor_name, appointment_date, appointment_time and duration_minutes.
+        """
+        start_date = start_date or date.today()
+        end_date = end_date or start_date + timedelta(days=14)
+        if not_before is None:
+            not_before = datetime.now()
+        where, params = ("WHERE d.specialization = %s", [specialization]) if specialization else ("", [])
+        with self.pool.cursor(label="find_free_slots") as cursor:
+            cursor.execute(f"""
+                SELECT d.id, d.first_name, d.last_name, a.weekday, a.start_time, a.end_time
+                FROM doctors d JOIN doctor_availability a ON a.doctor_id = d.id
+                {where}
+            """, params)
+            doctors, names = {}, {}
+            for row in cursor.fetchall():
+                info = doctors.setdefault(row["id"], {"blocks": [], "exceptions": {}, "bookings": []})
+                info["blocks"].append((row["weekday"], self._as_time(row["start_time"]),
+                                       self._as_time(row["end_time"])))
+                names[row["id"]] = f"Dr. {row['first_name']} {row['last_name']}"
+            if not doctors:
+                return []
+
+            cursor.execute(f"""
+                SELECT e.doctor_id, e.exception_date, e.start_time, e.end_time, e.available
+                FROM doctor_availability_exceptions e JOIN doctors d ON d.id = e.doctor_id
+                {where} {"AND" if where else "WHERE"} e.exception_date BETWEEN %s AND %s
+            """, params + [start_date, end_date])
+            for row in cursor.fetchall():
+                if row["doctor_id"] in doctors:
+                    doctors[row["doctor_id"]]["exceptions"].setdefault(row["exception_date"], []).append((
+                        self._as_time(row["start_time"]), self._as_time(row["end_time"]), bool(row["available"])
+                    ))
+
+            # The day before is included for bookings that run past midnight
+            cursor.execute(f"""
+                SELECT a.doctor_id, a.appointment_date, a.appointment_time, a.duration_minutes
+                FROM appointments a JOIN doctors d ON d.id = a.doctor_id
+                {where} {"AND" if where else "WHERE"} a.appointment_date BETWEEN %s AND %s
+                  AND a.status <> 'Cancelled'
+                ORDER BY a.doctor_id, a.appointment_date, a.appointment_time
+            """, params + [start_date - timedelta(days=1), end_date])
+            for row in cursor.fetchall():
+                if row["doctor_id"] in doctors:
+                    doctors[row["doctor_id"]]["bookings"].append(appointment_interval(
+                        row["appointment_date"], row["appointment_time"], row["duration_minutes"]
+                    ))
+
+        return [
+            {
+                "doctor_id": doctor_id,
+                "doctor_name": names[doctor_id],
+                "appointment_date": start.date(),
+                "appointment_time": start.strftime("%H:%M"),
+                "duration_minutes": duration_minutes,
+            }
+            for start, _end, doctor_id in find_free_slots(doctors, start_date, end_date, duration_minutes,
+                                                          count, not_before)
+        ]
+
+    @staticmethod
+    def _as_time(value):
+        """TIME columns come back as timedelta; turn them into datetime.time (None stays None)"""
+        if value is None or not isinstance(value, timedelta):
+            return value
+        seconds = int(value.total_seconds())
+        if seconds >= 24 * 3600:
+            return datetime.max.time()
+        return (datetime.min + value).time()
+
+    def get_appointments_by_ids(self, ids):
+        return self._rows_by_ids(self.APPOINTMENT_LIST_QUERY, "a.id", ids, label="get_appointments_by_ids")
+
+    def get_appointment_changes(self, since):
+        return self._changes("appointments", since, self.get_appointments_by_ids, label="get_appointment_changes")
+
+    def search_appointments(self, term, limit=200):
+        """Appointments for the patients and doctors matching ``term``"""
+        try:
+            patient_ids = [p["id"] for p in self.search_patients(term)]
+            doctor_ids = [d["id"] for d in self.search_doctors(term)]
+            clauses, params = [], []
+            for column, ids in (("a.patient_id", patient_ids), ("a.doctor_id", doctor_ids)):
+                if ids:
+                    clauses.append(f"{column} IN ({', '.join(['%s'] * len(ids))})")
+                    params.extend(ids)
+            if not clauses:
+                return []
+            query = (self.APPOINTMENT_LIST_QUERY + " WHERE " + " OR ".join(clauses)
+                     + " ORDER BY a.appointment_date, a.appointment_time LIMIT %s")
+            with self.pool.cursor(label="search_appointments") as cursor:
+                cursor.execute(query, params + [limit])
+                return cursor.fetchall()
         except Error as e:
-            print(f"❌ Error searching appointments: {e}")
+            log.error("Error searching appointments: %s", e)
             return []
 
-    def get_all_patients_combobox(self):
-        query = "SELECT id, first_name, last_name FROM patients ORDER BY first_name"
-        self.cursor.execute(query)
-        return self.cursor.fetchall()
+    # ---------- Typeahead lookups for the patient/doctor/staff pickers ----------
+    @cached("patients")
+    def lookup_patients(self, text, limit=20):
+        return self._lookup("patients", "CONCAT(first_name, ' ', last_name)",
+                            ("first_name", "last_name"), text, limit, label="lookup_patients")
+
+    @cached("doctors")
+    def lookup_doctors(self, text, limit=20):
+        return self._lookup("doctors", "CONCAT(first_name, ' ', last_name)",
+                            ("first_name", "last_name"), text, limit, label="lookup_doctors")
 
-    def get_all_doctors_combobox(self):
-        query = "SELECT id, first_name, last_name FROM doctors ORDER BY first_name"
-        self.cursor.execute(query)
-        return self.cursor.fetchall()
+    @cached("staff")
+    def lookup_staff(self, text, limit=20):
+        return self._lookup("staff", "full_name", ("full_name",), text, limit, label="lookup_staff")
 
            # ---------- Fetching patient appointment and medical records ----------
-    
-    def get_patient_appointments(self, patient_id):
-        query = """
-            SELECT appointment_date, appointment_time, doctor_id
-            FROM appointments
-            WHERE patient_id = %s
-            ORDER BY appointment_date ASC, appointment_time ASC
-        """
-        self.cursor.execute(query, (patient_id,))
-        rows = self.cursor.fetchall()
-    
-        print(f"DEBUG - Fetched rows for patient {patient_id}: {rows}") 
-    
+
+    PATIENT_APPOINTMENTS_QUERY = """
+        SELECT appointment_date, appointment_time, doctor_id
+        FROM appointments
+        WHERE patient_id = %s AND appointment_date BETWEEN %s AND %s
+        ORDER BY appointment_date ASC, appointment_time ASC
+    """
+
+    def get_patient_appointments(self, patient_id, start_date=None, end_date=None):
+        with self.pool.cursor(label="get_patient_appointments") as cursor:
+            cursor.execute(self.PATIENT_APPOINTMENTS_QUERY,
+                           (patient_id, start_date or self.DATE_MIN, end_date or self.DATE_MAX))
+            rows = cursor.fetchall()
+
+        log.debug("Fetched %s appointments for patient %s", len(rows), patient_id)
+
         return [
             {
                 "appointment_date": str(row["appointment_date"]) if row["appointment_date"] else None,
@@ -572,19 +1359,22 @@ class Database:
             }
             for row in rows
         ]
-    
-    
-    def get_doctor_schedule(self, doctor_id):
-        query = """
-            SELECT CONCAT(p.first_name, ' ', p.last_name) AS patient_name,
+
+
+    DOCTOR_SCHEDULE_QUERY = """
+        SELECT CONCAT(p.first_name, ' ', p.last_name) AS patient_name,
                a.appointment_date, a.appointment_time, a.status
         FROM appointments a
         JOIN patients p ON a.patient_id = p.id
-        WHERE a.doctor_id = %s
+        WHERE a.doctor_id = %s AND a.appointment_date BETWEEN %s AND %s
         ORDER BY a.appointment_date ASC, a.appointment_time ASC
-        """
-        self.cursor.execute(query, (doctor_id,))
-        rows = self.cursor.fetchall()
+    """
+
+    def get_doctor_schedule(self, doctor_id, start_date=None, end_date=None):
+        with self.pool.cursor(label="get_doctor_schedule") as cursor:
+            cursor.execute(self.DOCTOR_SCHEDULE_QUERY,
+                           (doctor_id, start_date or self.DATE_MIN, end_date or self.DATE_MAX))
+            rows = cursor.fetchall()
         return [
             {
             "patient_name": row["patient_name"],
@@ -594,55 +1384,639 @@ class Database:
         }
         for row in rows
       ]
-        
-        
-        
+
+    def check_query_plans(self):
+        """EXPLAIN the appointment date queries and return any that use a full scan.
+
+        Returns a dict of method name -> offending EXPLAIN row; an empty dict
+        means every query is served by one of the INDEXES above. A full
+        index scan (type "index") counts as a full scan too: only range
+        and ref lookups keep the cost independent of the table size.
+        """
+        today = date.today()
+        week_end = today + timedelta(days=7)
+        checks = {
+            "count_todays_appointments": (self.COUNT_APPOINTMENTS_BETWEEN_QUERY, (today, today)),
+            "get_doctor_schedule": (self.DOCTOR_SCHEDULE_QUERY, (1, today, week_end)),
+            "get_patient_appointments": (self.PATIENT_APPOINTMENTS_QUERY, (1, today, week_end)),
+            "_check_slot": (self.SLOT_CONFLICT_QUERY, (1, today, today, 0)),
+        }
+        full_scans = {}
+        with self.pool.cursor(label="check_query_plans") as cursor:
+            for name, (query, params) in checks.items():
+                cursor.execute("EXPLAIN " + query, params)
+                for row in cursor.fetchall():
+                    if row.get("table") in ("a", "appointments") and row.get("type") in ("ALL", "index"):
+                        full_scans[name] = row
+        return full_scans
+
+
+
     def get_patient_medical_history(self, patient_id):
         query = """
             SELECT created_at, medical_history
             FROM patients
             WHERE id = %s
         """
-        self.cursor.execute(query, (patient_id,))
-        row = self.cursor.fetchone()
-    
+        with self.pool.cursor(label="get_patient_medical_history") as cursor:
+            cursor.execute(query, (patient_id,))
+            row = cursor.fetchone()
+
         if row:
-            print(f"DEBUG - Medical history row: {row}")  # <-- helpful for debugging
             return [{
                 "record_date": row["created_at"],
                 "medical_history": row["medical_history"]
             }]
         else:
-            print(f"DEBUG - No medical history found for patient {patient_id}")
+            log.debug("No medical history found for patient %s", patient_id)
             return []
-    
+
     def get_system_statistics(self):
-         try:
-            self.cursor.execute("""
-             SELECT 
-                (SELECT COUNT(*) FROM doctors) AS total_doctors,
-                (SELECT COUNT(*) FROM patients) AS total_patients,
-                (SELECT COUNT(*) FROM appointments) AS total_appointments
-
-             """)
-            result = self.cursor.fetchone()
-            return {
-                "doctors": result[0],
-                "patients": result[1], 
-                 "appointments": result[2]
-                }
-         except Exception as e:
-                print(f"Error fetching system statistics: {e}")
-                return {"doctors": 0, "patients": 0, "appointments": 0}   
+        stats = self.get_dashboard_stats()
+        return {
+            "doctors": stats["doctors"],
+            "patients": stats["patients"],
+            "appointments": stats["appointments"],
+            "total_doctors": stats["doctors"],
+            "total_patients": stats["patients"],
+            "total_staff": stats["staff"],
+            "todays_appointments": stats["appointments_today"],
+            "active_users": self._count("SELECT COUNT(*) AS count FROM users WHERE is_active",
+                                        label="get_system_statistics"),
+        }
+
+
+    # ---------------------- SEARCH ----------------------
+    # Per table: FULLTEXT columns for ranked prefix matching, B-tree indexed
+    # columns for terms shorter than the FULLTEXT token size, and names with a
+    # *_soundex column for the fuzzy fallback.
+    SEARCH_SPECS = {
+        "patients": {"fulltext": "first_name, last_name, email",
+                     "prefix": ("first_name", "last_name"),
+                     "soundex": ("first_name", "last_name")},
+        "doctors": {"fulltext": "first_name, last_name, specialization, email",
+                    "prefix": ("first_name", "last_name"),
+                    "soundex": ("first_name", "last_name")},
+        "staff": {"fulltext": "full_name, role, department, email",
+                  "prefix": ("full_name",),
+                  "soundex": ()},
+    }
+    FULLTEXT_MIN_TOKEN = 3  # InnoDB innodb_ft_min_token_size default
+
+    def _search(self, table, columns, term, limit, label=None):
+        """Top ``limit`` rows of ``table`` matching ``term``, best match first.
+
+        Every word must match as a prefix (FULLTEXT boolean mode, ranked by
+        relevance); if that leaves room, names that sound like the longest
+        word (SOUNDEX) are appended.
+        """
+        spec = self.SEARCH_SPECS[table]
+        words = re.findall(r"\w+", term)
+        if not words:
+            return []
+        long_words = [w for w in words if len(w) >= self.FULLTEXT_MIN_TOKEN]
+        with self.pool.cursor(label=label) as cursor:
+            if long_words:
+                match = f"MATCH({spec['fulltext']}) AGAINST (%s IN BOOLEAN MODE)"
+                boolean_query = " ".join(f"+{w}*" for w in long_words)
+                cursor.execute(f"""
+                    SELECT {columns}, {match} AS relevance FROM {table}
+                    WHERE {match}
+                    ORDER BY relevance DESC, id DESC
+                    LIMIT %s
+                """, (boolean_query, boolean_query, limit))
+            else:
+                selects = [f"(SELECT {columns}, 0 AS relevance FROM {table} WHERE {c} LIKE %s LIMIT %s)"
+                           for c in spec["prefix"]]
+                params = []
+                for _ in spec["prefix"]:
+                    params.extend([words[0] + "%", limit])
+                cursor.execute(" UNION ".join(selects) + " LIMIT %s", params + [limit])
+            rows = cursor.fetchall()
+
+            if len(rows) < limit and spec["soundex"]:
+                longest = max(words, key=len)
+                seen = [row["id"] for row in rows] or [0]
+                placeholders = ", ".join(["%s"] * len(seen))
+                selects = [f"(SELECT {columns}, 0 AS relevance FROM {table} "
+                           f"WHERE {c}_soundex = SOUNDEX(%s) AND id NOT IN ({placeholders}) LIMIT %s)"
+                           for c in spec["soundex"]]
+                params = []
+                for _ in spec["soundex"]:
+                    params.extend([longest] + seen + [limit])
+                cursor.execute(" UNION ".join(selects) + " LIMIT %s", params + [limit - len(rows)])
+                rows.extend(cursor.fetchall())
+        return rows[:limit]
+
+    # ---------------------- BULK IMPORT ----------------------
+    IMPORT_TABLES = ("patients", "doctors", "staff")
+
+    def bulk_insert(self, table, columns, rows):
+        """Insert ``rows`` (tuples in ``columns`` order) in one transaction.
+
+        executemany sends the batch as a single multi-row INSERT. Rows are not
+        written to the change log one by one; call ``finish_import`` once the
+        whole file is in.
+        """
+        if table not in self.IMPORT_TABLES:
+            raise ValueError(f"Cannot import into {table}")
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+        with self.pool.cursor(label="bulk_insert") as cursor:
+            cursor.executemany(query, rows)
+            self._bump_counter(cursor, table, len(rows))
+        return len(rows)
+
+    @audited("import")
+    def finish_import(self, table):
+        """Make open pages and caches pick up a bulk import into ``table``"""
+        with self.pool.cursor(label="finish_import") as cursor:
+            self._log_change(cursor, table, None, "reload")
+        if table == "doctors":
+            self.migrate_doctor_schedules()
+        self.cache.invalidate(table)
+
+    # ---------------------- EXPORT ----------------------
+    # Exportable datasets: the FROM clause, the column used by the date
+    # filter, the streaming order and, per column, its SQL expression and type
+    # (int, str, date, time, datetime or decimal) for typed output formats.
+    EXPORT_SPECS = {
+        "patients": {
+            "from": "patients p",
+            "date_column": "p.created_at",
+            "order": "p.id",
+            "columns": {
+                "id": ("p.id", "int"),
+                "patient_id": ("p.patient_id", "str"),
+                "first_name": ("p.first_name", "str"),
+                "last_name": ("p.last_name", "str"),
+                "age": ("p.age", "int"),
+                "date_of_birth": ("p.date_of_birth", "date"),
+                "gender": ("p.gender", "str"),
+                "phone": ("p.phone", "str"),
+                "email": ("p.email", "str"),
+                "address": ("p.address", "str"),
+                "medical_history": ("p.medical_history", "str"),
+                "emergency_contact": ("p.emergency_contact", "str"),
+                "created_at": ("p.created_at", "datetime"),
+            },
+        },
+        "appointments": {
+            "from": "appointments a JOIN patients p ON a.patient_id = p.id JOIN doctors d ON a.doctor_id = d.id",
+            "date_column": "a.appointment_date",
+            "order": "a.appointment_date, a.appointment_time, a.id",
+            "columns": {
+                "id": ("a.id", "int"),
+                "patient_id": ("a.patient_id", "int"),
+                "patient_name": ("CONCAT(p.first_name, ' ', p.last_name)", "str"),
+                "doctor_id": ("a.doctor_id", "int"),
+                "doctor_name": ("CONCAT(d.first_name, ' ', d.last_name)", "str"),
+                "specialization": ("d.specialization", "str"),
+                "appointment_date": ("a.appointment_date", "date"),
+                "appointment_time": ("a.appointment_time", "time"),
+                "duration_minutes": ("a.duration_minutes", "int"),
+                "status": ("a.status", "str"),
+                "notes": ("a.notes", "str"),
+            },
+        },
+        "doctors": {
+            "from": "doctors d",
+            "date_column": "d.created_at",
+            "order": "d.id",
+            "columns": {
+                "id": ("d.id", "int"),
+                "first_name": ("d.first_name", "str"),
+                "last_name": ("d.last_name", "str"),
+                "specialization": ("d.specialization", "str"),
+                "phone": ("d.phone", "str"),
+                "email": ("d.email", "str"),
+                "schedule": ("d.schedule", "str"),
+                "created_at": ("d.created_at", "datetime"),
+            },
+        },
+        "staff": {
+            "from": "staff s",
+            "date_column": "s.created_at",
+            "order": "s.id",
+            "columns": {
+                "id": ("s.id", "int"),
+                "full_name": ("s.full_name", "str"),
+                "role": ("s.role", "str"),
+                "department": ("s.department", "str"),
+                "phone": ("s.phone", "str"),
+                "email": ("s.email", "str"),
+                "hire_date": ("s.hire_date", "date"),
+                "salary": ("s.salary", "decimal"),
+                "created_at": ("s.created_at", "datetime"),
+            },
+        },
+    }
 
+    def stream_export(self, dataset, columns=None, start_date=None, end_date=None, chunk_size=5000):
+        """Yield lists of up to ``chunk_size`` row dicts of an export dataset.
 
-    
+        Rows come from an unbuffered cursor, so they are read off the wire a
+        chunk at a time instead of being loaded into memory first.
+        ``start_date``/``end_date`` filter the dataset's date column
+        (inclusive); ``columns`` picks and orders the output columns.
+        """
+        spec = self.EXPORT_SPECS[dataset]
+        columns = list(columns or spec["columns"])
+        unknown = [c for c in columns if c not in spec["columns"]]
+        if unknown:
+            raise ValueError(f"Unknown {dataset} columns: {', '.join(unknown)}")
+        select = ", ".join(f"{spec['columns'][c][0]} AS {c}" for c in columns)
+        clauses, params = [], []
+        if start_date:
+            clauses.append(f"{spec['date_column']} >= %s")
+            params.append(start_date)
+        if end_date:
+            clauses.append(f"{spec['date_column']} < %s")
+            params.append(end_date + timedelta(days=1))
+        where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+        with self.pool.cursor(buffered=False, label="stream_export") as cursor:
+            cursor.execute(f"SELECT {select} FROM {spec['from']} {where} ORDER BY {spec['order']}", params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+
+    # ---------------------- REPORTS ----------------------
+    # Each report is a single aggregate query over an inclusive date range and
+    # returns (columns, rows) ready to render; nothing is summed in Python.
+    REPORTS = {
+        "appointments_per_doctor": "Appointments per doctor per day",
+        "appointment_outcomes": "Appointment outcomes (no-show and cancellation rates)",
+        "patient_demographics": "Patient age and gender distribution",
+        "salary_by_department": "Staff salary totals by department",
+    }
+
+    # Tables the reports read; ReportEngine reuses its files until one of them changes
+    REPORT_TABLES = ("appointments", "doctors", "patients", "staff")
+
+    def run_report(self, name, start_date, end_date, today=None):
+        if name not in self.REPORTS:
+            raise ValueError(f"Unknown report '{name}'")
+        return getattr(self, f"report_{name}")(start_date, end_date, today or date.today())
+
+    def _report(self, query, params, label=None):
+        with self.pool.cursor(dictionary=False, label=label) as cursor:
+            cursor.execute(query, params)
+            return [d[0] for d in cursor.description], cursor.fetchall()
+
+    def report_appointments_per_doctor(self, start_date, end_date, today):
+        return self._report("""
+            SELECT a.appointment_date AS day, d.id AS doctor_id,
+                   CONCAT(d.first_name, ' ', d.last_name) AS doctor, d.specialization,
+                   COUNT(*) AS appointments,
+                   SUM(a.status = 'Completed') AS completed,
+                   SUM(a.status = 'Cancelled') AS cancelled,
+                   SUM(CASE WHEN a.status <> 'Cancelled' THEN a.duration_minutes ELSE 0 END) AS booked_minutes
+            FROM appointments a
+            JOIN doctors d ON d.id = a.doctor_id
+            WHERE a.appointment_date BETWEEN %s AND %s
+            GROUP BY a.appointment_date, d.id
+            ORDER BY day, doctor
+        """, (start_date, end_date), label="report_appointments_per_doctor")
+
+    def report_appointment_outcomes(self, start_date, end_date, today):
+        # There is no no-show status: a booking still Scheduled/Confirmed once
+        # its day has passed is counted as a no-show.
+        return self._report("""
+            SELECT o.outcome, COUNT(*) AS appointments,
+                   ROUND(100.0 * COUNT(*) / t.total, 1) AS percent
+            FROM (
+                SELECT CASE WHEN status IN ('Scheduled', 'Confirmed') AND appointment_date < %s
+                            THEN 'No-show' ELSE status END AS outcome
+                FROM appointments
+                WHERE appointment_date BETWEEN %s AND %s
+            ) o
+            CROSS JOIN (
+                SELECT COUNT(*) AS total FROM appointments WHERE appointment_date BETWEEN %s AND %s
+            ) t
+            GROUP BY o.outcome, t.total
+            ORDER BY appointments DESC
+        """, (today, start_date, end_date, start_date, end_date), label="report_appointment_outcomes")
+
+    def report_patient_demographics(self, start_date, end_date, today):
+        # Patients seen (booked) in the range, aged as of the end of the range
+        return self._report("""
+            SELECT CASE WHEN age IS NULL THEN 'Unknown'
+                        ELSE CONCAT(FLOOR(age / 10) * 10, '-', FLOOR(age / 10) * 10 + 9) END AS age_band,
+                   COALESCE(gender, 'Unknown') AS gender,
+                   COUNT(*) AS patients
+            FROM (
+                SELECT TIMESTAMPDIFF(YEAR, p.date_of_birth, %s) AS age, p.gender
+                FROM patients p
+                WHERE p.id IN (SELECT patient_id FROM appointments WHERE appointment_date BETWEEN %s AND %s)
+            ) seen
+            GROUP BY age_band, gender
+            ORDER BY MIN(COALESCE(age, 999)), gender
+        """, (end_date, start_date, end_date), label="report_patient_demographics")
+
+    def report_salary_by_department(self, start_date, end_date, today):
+        # Staff employed by the end of the range
+        return self._report("""
+            SELECT COALESCE(department, 'Unassigned') AS department,
+                   COUNT(*) AS staff,
+                   SUM(salary) AS total_salary,
+                   ROUND(AVG(salary), 2) AS average_salary,
+                   MIN(salary) AS min_salary,
+                   MAX(salary) AS max_salary
+            FROM staff
+            WHERE hire_date IS NULL OR hire_date <= %s
+            GROUP BY department
+            ORDER BY total_salary DESC
+        """, (end_date,), label="report_salary_by_department")
+
+    # ---------------------- BACKUP / RESTORE ----------------------
+    # Tables in a backup, parents before children. The counters tables and the
+    # change log are derived data and are rebuilt after a restore instead.
+    BACKUP_TABLES = ("users", "patients", "doctors", "staff", "appointments",
+                     "doctor_availability", "doctor_availability_exceptions")
+
+    def _stored_columns(self, cursor, table):
+        """Columns of ``table`` that hold data (generated columns such as *_soundex are left out)"""
+        cursor.execute("""
+            SELECT COLUMN_NAME FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND EXTRA NOT LIKE %s
+            ORDER BY ORDINAL_POSITION
+        """, (table, "%GENERATED%"))
+        return [row[0] for row in cursor.fetchall()]
+
+    def iter_snapshot(self, tables=None, chunk_size=5000):
+        """Yield (table, columns, rows) chunks of every backup table from one snapshot.
+
+        All tables are read inside a single START TRANSACTION WITH CONSISTENT
+        SNAPSHOT on one connection, so the chunks describe the database at a
+        single point in time while other desks keep writing. Rows are tuples
+        streamed through an unbuffered cursor; an empty table yields one chunk
+        with no rows so it is still recorded.
+        """
+        with self.pool.cursor(dictionary=False, buffered=False, label="iter_snapshot") as cursor:
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+            for table in tables or self.BACKUP_TABLES:
+                columns = self._stored_columns(cursor, table)
+                cursor.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+                rows = cursor.fetchmany(chunk_size)
+                yield table, columns, rows
+                while rows:
+                    rows = cursor.fetchmany(chunk_size)
+                    if rows:
+                        yield table, columns, rows
+
+    def restore_tables(self, chunks, batch_size=1000):
+        """Replace the backup tables with the (table, columns, rows) ``chunks``.
+
+        Runs on one connection with foreign key checks off: every backup table
+        is truncated, then rows are inserted ``batch_size`` at a time with
+        one commit per batch, so a large restore never builds one huge
+        transaction. Returns {table: rows restored}.
+        """
+        conn = self.pool.acquire()
+        restored = {}
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+            for table in reversed(self.BACKUP_TABLES):
+                cursor.execute(f"TRUNCATE TABLE {table}")
+            for table, columns, rows in chunks:
+                if table not in self.BACKUP_TABLES:
+                    raise ValueError(f"Cannot restore into {table}")
+                restored.setdefault(table, 0)
+                query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+                for start in range(0, len(rows), batch_size):
+                    cursor.executemany(query, rows[start:start + batch_size])
+                    conn.commit()
+                restored[table] += len(rows)
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+            cursor.close()
+        except BaseException:
+            # The session still has foreign key checks off; never lend it out again
+            self.pool.discard(conn)
+            raise
+        self.pool.release(conn)
+        self.finish_restore()
+        return restored
+
+    @audited("restore")
+    def finish_restore(self):
+        """Rebuild derived data and make open pages reload after a restore"""
+        self.reconcile_stats()
+        with self.pool.cursor(label="finish_restore") as cursor:
+            for table in self.BACKUP_TABLES:
+                self._log_change(cursor, table, None, "reload")
+        self.cache.invalidate()
+
+    # ---------------------- TYPEAHEAD LOOKUP ----------------------
+    @staticmethod
+    def _like_prefix(text):
+        """LIKE pattern matching values that start with ``text`` literally"""
+        return re.sub(r"([\\%_])", r"\\\1", text) + "%"
+
+    def _lookup(self, table, label_sql, name_columns, text, limit, label=None):
+        """Up to ``limit`` {"id", "label"} rows whose name starts with ``text``.
+
+        Each name column is range-scanned on its own index and stops after
+        ``limit`` rows, so the cost does not grow with the table. A number
+        matches the id, and "first last" narrows on both name columns.
+        """
+        text = text.strip()
+        if not text:
+            return []
+        select = f"SELECT id, {label_sql} AS label FROM {table}"
+        with self.pool.cursor(label=label) as cursor:
+            words = text.split()
+            if text.isdigit():
+                cursor.execute(f"{select} WHERE id = %s", (int(text),))
+            elif len(words) > 1 and len(name_columns) > 1:
+                first, last = name_columns[:2]
+                cursor.execute(f"""
+                    {select} WHERE {first} LIKE %s AND {last} LIKE %s
+                    ORDER BY {first}, {last} LIMIT %s
+                """, (self._like_prefix(words[0]), self._like_prefix(" ".join(words[1:])), limit))
+            else:
+                selects = [f"({select} WHERE {c} LIKE %s ORDER BY {c} LIMIT %s)" for c in name_columns]
+                params = []
+                for _ in name_columns:
+                    params.extend([self._like_prefix(text), limit])
+                cursor.execute(" UNION ".join(selects) + " ORDER BY label LIMIT %s", params + [limit])
+            return cursor.fetchall()
+
+    # ---------------------- CHANGE LOG ----------------------
+    # Sequence numbers are assigned at insert time but transactions can commit
+    # out of order, so readers look back a little past their watermark;
+    # re-applying an upsert is harmless.
+    CHANGE_LOG_OVERLAP = 50
+    CHANGE_LOG_BATCH = 1000
+
+    def _log_change(self, cursor, table, row_id, operation):
+        cursor.execute(
+            "INSERT INTO change_log (table_name, row_id, operation) VALUES (%s, %s, %s)",
+            (table, row_id, operation)
+        )
+
+    def get_change_watermark(self, tables=None):
+        """Highest change_log sequence number (0 when empty), optionally only for changes to ``tables``"""
+        with self.pool.cursor(label="get_change_watermark") as cursor:
+            if not tables:
+                cursor.execute("SELECT COALESCE(MAX(seq), 0) AS seq FROM change_log")
+                return cursor.fetchone()["seq"]
+            # One idx_change_log_table_seq lookup per table
+            cursor.execute(f"""
+                SELECT table_name, MAX(seq) AS seq FROM change_log
+                WHERE table_name IN ({', '.join(['%s'] * len(tables))})
+                GROUP BY table_name
+            """, tuple(tables))
+            return max([row["seq"] for row in cursor.fetchall()] + [0])
+
+    def get_changed_tables(self, since):
+        """(seq, table) of change_log entries after watermark ``since``, oldest first.
+
+        Looks back CHANGE_LOG_OVERLAP entries like ``_changes`` (the caller
+        skips sequence numbers it has seen) and returns at most
+        CHANGE_LOG_BATCH; a primary-key range scan, however large the tables.
+        """
+        with self.pool.cursor(label="get_changed_tables") as cursor:
+            cursor.execute("""
+                SELECT seq, table_name FROM change_log
+                WHERE seq > %s
+                ORDER BY seq
+                LIMIT %s
+            """, (max(since - self.CHANGE_LOG_OVERLAP, 0), self.CHANGE_LOG_BATCH))
+            return [(row["seq"], row["table_name"]) for row in cursor.fetchall()]
+
+    def _changes(self, table, since, fetch_rows, label=None):
+        """Rows of ``table`` changed after watermark ``since``.
+
+        Returns {"watermark", "rows", "deleted", "reload"}; "reload" is set
+        when there are too many changes (or a bulk change) to patch in place.
+        """
+        with self.pool.cursor(label=label) as cursor:
+            cursor.execute("""
+                SELECT seq, row_id, operation FROM change_log
+                WHERE table_name = %s AND seq > %s
+                ORDER BY seq
+                LIMIT %s
+            """, (table, max(since - self.CHANGE_LOG_OVERLAP, 0), self.CHANGE_LOG_BATCH))
+            entries = cursor.fetchall()
+        watermark = max([since] + [e["seq"] for e in entries])
+        latest = {}
+        for entry in entries:
+            latest[entry["row_id"]] = entry["operation"]
+        reload = len(entries) >= self.CHANGE_LOG_BATCH or "reload" in latest.values()
+        if reload:
+            return {"watermark": watermark, "rows": [], "deleted": [], "reload": True}
+        upserted = [row_id for row_id, op in latest.items() if op == "upsert"]
+        return {
+            "watermark": watermark,
+            "rows": fetch_rows(upserted) if upserted else [],
+            "deleted": [row_id for row_id, op in latest.items() if op == "delete"],
+            "reload": False,
+        }
+
+    def prune_change_log(self, keep_days=7):
+        """Drop change_log entries older than ``keep_days``"""
+        with self.pool.cursor(label="prune_change_log") as cursor:
+            cursor.execute("DELETE FROM change_log WHERE changed_at < %s",
+                           (datetime.now() - timedelta(days=keep_days),))
+            return cursor.rowcount
+
+    def _rows_by_ids(self, select_sql, id_column, ids, label=None):
+        if not ids:
+            return []
+        placeholders = ", ".join(["%s"] * len(ids))
+        with self.pool.cursor(label=label) as cursor:
+            cursor.execute(f"{select_sql} WHERE {id_column} IN ({placeholders})", list(ids))
+            return cursor.fetchall()
+
+    # ---------------------- AUDIT LOG ----------------------
+    AUDIT_COLUMNS = "id, occurred_at, username, action, table_name, row_id, status, details"
+
+    def _write_audit_events(self, events):
+        """Append a batch of AuditLog events in one multi-row INSERT"""
+        with self.pool.cursor(label="_write_audit_events") as cursor:
+            cursor.executemany("""
+                INSERT INTO audit_log (occurred_at, username, action, table_name, row_id, status, details)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, events)
+
+    def get_audit_watermark(self):
+        """Highest audit_log id (0 when empty); the activity feeds' own change sequence"""
+        with self.pool.cursor(label="get_audit_watermark") as cursor:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) AS id FROM audit_log")
+            return cursor.fetchone()["id"]
+
+    def get_recent_activity(self, limit=20):
+        """The latest audit events, newest first"""
+        return self.get_audit_log_page(limit=limit)
+
+    def get_audit_log_page(self, after_key=None, limit=100, before_key=None, username=None, action=None,
+                           table=None):
+        """One page of audit events, newest first, keyed by id and optionally filtered"""
+        filters, params = [], []
+        for column, value in (("username", username), ("action", action), ("table_name", table)):
+            if value:
+                filters.append(f"{column} = %s")
+                params.append(value)
+        return self._keyset_page(f"SELECT {self.AUDIT_COLUMNS} FROM audit_log", ("id",), True,
+                                 after_key, before_key, limit, filters, params, label="get_audit_log_page")
+
+    def get_audit_usernames(self):
+        with self.pool.cursor(label="get_audit_usernames") as cursor:
+            cursor.execute("SELECT DISTINCT username FROM audit_log WHERE username IS NOT NULL ORDER BY username")
+            return [row["username"] for row in cursor.fetchall()]
+
+    # ---------------------- KEYSET PAGINATION ----------------------
+    def _keyset_page(self, select_sql, key_columns, descending, after_key, before_key, limit,
+                     filters=(), filter_params=(), label=None):
+        """Fetch ``limit`` rows of ``select_sql`` in key order next to a known key.
+
+        ``after_key`` continues forward in display order and ``before_key``
+        pages back towards the start; rows always come back in display order.
+        The seek predicate is expanded (a > x OR (a = x AND b > y) ...) so it
+        can be answered from the index behind ``key_columns``. ``filters``
+        are extra SQL conditions ANDed in, with ``filter_params`` for them.
+        """
+        backwards = before_key is not None
+        key = before_key if backwards else after_key
+        scan_ascending = descending == backwards
+        conditions = list(filters)
+        params = list(filter_params)
+        if key is not None:
+            key = tuple(key) if isinstance(key, (tuple, list)) else (key,)
+            op = ">" if scan_ascending else "<"
+            clauses = []
+            for i, column in enumerate(key_columns):
+                equal = [f"{c} = %s" for c in key_columns[:i]]
+                clauses.append("(" + " AND ".join(equal + [f"{column} {op} %s"]) + ")")
+                params.extend(key[:i + 1])
+            conditions.append("(" + " OR ".join(clauses) + ")")
+        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+        direction = "ASC" if scan_ascending else "DESC"
+        order = ", ".join(f"{c} {direction}" for c in key_columns)
+        with self.pool.cursor(label=label) as cursor:
+            cursor.execute(f"{select_sql} {where} ORDER BY {order} LIMIT %s", params + [limit])
+            rows = cursor.fetchall()
+        if backwards:
+            rows.reverse()
+        return rows
 
-  
     # -------------- Closing ------------
     def close(self):
-        if self.cursor:
-            self.cursor.close()
-        if self.connection:
-            self.connection.close()
-        print("🔒 Database connection closed")
+        if self.pool:
+            self.audit.close()
+            self.pool.close_all()
+        log.info("Database connection closed")
+
+
+def open_database(url=None):
+    """The Database for ``url``: None for the MySQL server in Database.config,
+    "sqlite:///relative/file.db", "sqlite:////absolute/file.db" or "sqlite:///:memory:" for SQLite"""
+    if not url:
+        return Database()
+    if url.startswith("sqlite:///"):
+        from sqlite_backend import SQLiteDatabase
+        return SQLiteDatabase(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported database URL: {url}")
@@ -0,0 +1,124 @@
+"""
+Background Database Worker
+Runs Database calls off the Tk main thread
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from logs import get_logger
+
+log = get_logger(__name__)
+
+
+class _Task:
+    def __init__(self, future, on_success, on_error, owner, indicator):
+        self.future = future
+        self.on_success = on_success
+        self.on_error = on_error
+        self.owner = owner
+        self.indicator = indicator
+        self.cancelled = False
+
+
+class DBWorker:
+    """Thread pool for database calls whose results are delivered on the Tk thread.
+
+    Work runs on background threads; finished tasks are put on a result queue
+    that is drained with ``root.after``, so ``on_success``/``on_error``
+    callbacks can safely touch widgets. Tasks submitted with an ``owner`` can
+    be cancelled as a group when that page is left.
+    """
+
+    def __init__(self, root, max_workers=4, poll_interval=50):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+        self.results = queue.Queue()
+        self._tasks = set()
+        self._lock = threading.Lock()
+        self._poll_id = self.root.after(self.poll_interval, self._poll)
+
+    def submit(self, fn, *args, on_success=None, on_error=None, owner=None, indicator=None, **kwargs):
+        """Run ``fn(*args, **kwargs)`` in the background and return its Future.
+
+        ``indicator`` is any object with ``show()``/``hide()`` (see
+        ``widgets.LoadingOverlay``); it is shown until the result is delivered.
+        """
+        if indicator is not None:
+            indicator.show()
+        future = self.executor.submit(fn, *args, **kwargs)
+        task = _Task(future, on_success, on_error, owner, indicator)
+        with self._lock:
+            self._tasks.add(task)
+        future.add_done_callback(lambda _f: self.results.put(task))
+        return future
+
+    def post(self, fn, *args):
+        """Run ``fn(*args)`` on the Tk thread; safe to call from background work (e.g. progress updates)."""
+        self.results.put((fn, args))
+
+    def _poll(self):
+        while True:
+            try:
+                task = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(task, tuple):
+                fn, args = task
+                try:
+                    fn(*args)
+                except Exception as e:
+                    log.exception("Error in posted callback: %s", e)
+                continue
+            self._deliver(task)
+        self._poll_id = self.root.after(self.poll_interval, self._poll)
+
+    def _deliver(self, task):
+        with self._lock:
+            self._tasks.discard(task)
+        if task.cancelled or task.future.cancelled():
+            return
+        if task.indicator is not None:
+            task.indicator.hide()
+        error = task.future.exception()
+        try:
+            if error is not None:
+                if task.on_error:
+                    task.on_error(error)
+                else:
+                    log.error("Background database task failed: %s", error, exc_info=error)
+            elif task.on_success:
+                task.on_success(task.future.result())
+        except Exception as e:
+            log.exception("Error in background task callback: %s", e)
+
+    def cancel(self, owner):
+        """Cancel every pending task submitted for ``owner``."""
+        with self._lock:
+            tasks = [t for t in self._tasks if t.owner is owner]
+        for task in tasks:
+            self._cancel_task(task)
+
+    def cancel_all(self):
+        with self._lock:
+            tasks = list(self._tasks)
+        for task in tasks:
+            self._cancel_task(task)
+
+    def _cancel_task(self, task):
+        # Work that already started still finishes, but its callbacks are dropped
+        task.cancelled = True
+        task.future.cancel()
+        if task.indicator is not None:
+            task.indicator.hide()
+        with self._lock:
+            self._tasks.discard(task)
+
+    def shutdown(self):
+        self.cancel_all()
+        try:
+            self.root.after_cancel(self._poll_id)
+        except Exception:
+            pass
+        self.executor.shutdown(wait=False, cancel_futures=True)
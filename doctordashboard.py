@@ -2,11 +2,37 @@ import tkinter as tk
 from tkinter import ttk
 
 class DoctorDashboard:
+    # Table each view is read from; a change to it redraws the view
+    VIEW_TABLES = {"schedule": "appointments", "specialization": "doctors"}
+
     def __init__(self, root, app, user):
         self.root = root
         self.app = app
         self.user = user  # doctor user info (contains linked_id to doctors table)
+        self.current_view = None  # view shown in the display area, redrawn when its data changes
         self.build_ui()
+        self.on_show()
+
+    # ---------- Change Notifications ----------
+    def on_show(self):
+        """Called by the page manager when this cached page is shown again"""
+        self.app.notifier.subscribe(self, self.VIEW_TABLES.values(), self.on_data_changed)
+        self.refresh_view()
+
+    def on_hide(self):
+        self.app.notifier.unsubscribe(self)
+
+    on_destroy = on_hide
+
+    def on_data_changed(self, tables):
+        if self.VIEW_TABLES.get(self.current_view) in tables:
+            self.refresh_view()
+
+    def refresh_view(self):
+        if self.current_view == "schedule":
+            self.view_schedule()
+        elif self.current_view == "specialization":
+            self.view_specialization()
 
     def build_ui(self):
         # Clear old widgets
@@ -56,11 +82,17 @@ class DoctorDashboard:
 
     # ---------- Show Doctor's Schedule ----------
     def view_schedule(self):
+        self.current_view = "schedule"
+        self.app.worker.submit(self.app.db.get_doctor_schedule, self.user["id"], owner=self,
+                               on_success=self.show_schedule)
+
+    def show_schedule(self, schedule):
+        if self.current_view != "schedule":
+            return
         self.clear_display()
         label = tk.Label(self.display_frame, text="📅 My Schedule", font=("Arial", 14, "bold"), bg="white")
         label.pack(pady=10)
 
-        schedule = self.app.db.get_doctor_schedule(self.user["id"])  # Fetch from DB
         if schedule:
             cols = ("Patient Name", "Date", "Time", "Status")
             tree = ttk.Treeview(self.display_frame, columns=cols, show="headings", height=10)
@@ -76,11 +108,17 @@ class DoctorDashboard:
 
     # ---------- Show Doctor's Specialization ----------
     def view_specialization(self):
+        self.current_view = "specialization"
+        self.app.worker.submit(self.app.db.get_doctor_by_id, self.user["id"], owner=self,
+                               on_success=self.show_specialization)
+
+    def show_specialization(self, doctor):
+        if self.current_view != "specialization":
+            return
         self.clear_display()
         label = tk.Label(self.display_frame, text="🩺 My Specialization", font=("Arial", 14, "bold"), bg="white")
         label.pack(pady=10)
 
-        doctor = self.app.db.get_doctor_by_id(self.user["id"])
         if doctor:
             tk.Label(
                 self.display_frame,
@@ -3,6 +3,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import uuid
+from datetime import date, datetime
+from widgets import LoadingOverlay, PagedTreeview, ImportDialog
+from importer import Importer
+from scheduling import parse_weekly_schedule
 
 # -----------------------------
 # DoctorsPage UI
@@ -101,6 +105,26 @@ class DoctorsPage:
             relief="flat",
             cursor="hand2",
             command=self.delete_doctor,
+        ).pack(side="left", padx=(0, 10), ipady=8, ipadx=15)
+        tk.Button(
+            buttons_frame,
+            text="Time Off",
+            font=("Arial", 12),
+            bg="#8e44ad",
+            fg="white",
+            relief="flat",
+            cursor="hand2",
+            command=self.time_off,
+        ).pack(side="left", padx=(0, 10), ipady=8, ipadx=15)
+        tk.Button(
+            buttons_frame,
+            text="Import...",
+            font=("Arial", 12),
+            bg="#16a085",
+            fg="white",
+            relief="flat",
+            cursor="hand2",
+            command=self.import_doctors,
         ).pack(side="left", ipady=8, ipadx=15)
 
         # Table
@@ -128,57 +152,72 @@ class DoctorsPage:
         self.doctors_tree.pack(side="left", fill="both", expand=True)
         v_scrollbar.pack(side="right", fill="y")
         h_scrollbar.pack(side="bottom", fill="x")
+        self.loading = LoadingOverlay(tree_frame)
+        self.table = PagedTreeview(
+            self.doctors_tree,
+            v_scrollbar,
+            self.app.worker,
+            self,
+            fetch_page=self.app.db.get_doctors_page,
+            row_values=self.doctor_values,
+            indicator=self.loading,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load doctors: {e}"),
+            fetch_watermark=self.app.db.get_change_watermark,
+            fetch_changes=self.app.db.get_doctor_changes,
+            descending=True,
+        )
 
         self.load_doctors()
 
     # --------------- Data ops ---------------
     def load_doctors(self):
-        try:
-            doctors = self.app.db.get_all_doctors()
-            for item in self.doctors_tree.get_children():
-                self.doctors_tree.delete(item)
-            for d in doctors:
-                self.doctors_tree.insert(
-                    "",
-                    "end",
-                    values=(
-                        d.get("id", ""),
-                        d.get("first_name", ""),
-                        d.get("last_name", ""),
-                        d.get("specialization", ""),
-                        d.get("phone", ""),
-                        d.get("email", ""),
-                        d.get("schedule", ""),
-                    ),
-                )
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load doctors: {e}")
+        self.table.reload()
+
+    def refresh_doctors(self):
+        """Pick up changes after a save/delete without reloading the whole table"""
+        if self.search_entry.get().strip():
+            self.search_doctors()
+        else:
+            self.table.sync()
+
+    def on_show(self):
+        """Called by the page manager when this cached page is shown again"""
+        self.refresh_doctors()
+
+    def doctor_values(self, d):
+        return (
+            d.get("id", ""),
+            d.get("first_name", ""),
+            d.get("last_name", ""),
+            d.get("specialization", ""),
+            d.get("phone", ""),
+            d.get("email", ""),
+            d.get("schedule", ""),
+        )
 
     def search_doctors(self):
         term = self.search_entry.get().strip()
         if not term:
             self.load_doctors()
             return
-        try:
-            results = self.app.db.search_doctors(term)
-            for item in self.doctors_tree.get_children():
-                self.doctors_tree.delete(item)
-            for d in results:
-                self.doctors_tree.insert(
-                    "",
-                    "end",
-                    values=(
-                        d.get("id", ""),
-                        d.get("first_name", ""),
-                        d.get("last_name", ""),
-                        d.get("specialization", ""),
-                        d.get("phone", ""),
-                        d.get("email", ""),
-                        d.get("schedule", ""),
-                    ),
-                )
-        except Exception as e:
-            messagebox.showerror("Error", f"Search failed: {e}")
+        self.app.worker.submit(
+            self.app.db.search_doctors,
+            term,
+            owner=self,
+            indicator=self.loading,
+            on_success=self.table.show_rows,
+            on_error=lambda e: messagebox.showerror("Error", f"Search failed: {e}"),
+        )
+
+    def import_doctors(self):
+        ImportDialog(
+            self.root,
+            self.app.worker,
+            self,
+            "Import Doctors",
+            lambda path, progress, cancel: Importer(self.app.db, "doctors", path, progress=progress, cancel_event=cancel),
+            on_done=lambda _summary: self.refresh_doctors(),
+        )
 
     # --------------- UI actions ---------------
     def add_doctor(self):
@@ -199,12 +238,15 @@ class DoctorsPage:
             return
         values = self.doctors_tree.item(sel[0])["values"]
         if messagebox.askyesno("Confirm Delete", f"Delete doctor '{values[1]} {values[2]}'?"):
-            try:
-                self.app.db.delete_doctor(values[0])
-                messagebox.showinfo("Success", "Doctor deleted successfully")
-                self.load_doctors()
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to delete doctor: {e}")
+            self.app.worker.submit(
+                self.app.db.delete_doctor,
+                values[0],
+                owner=self,
+                indicator=self.loading,
+                on_success=lambda success: self.on_doctor_saved(
+                    None, success, lambda _r: "Doctor deleted successfully", "Failed to delete doctor"),
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to delete doctor: {e}"),
+            )
 
     # --------------- Form window (scrollable) ---------------
     def doctor_form_window(self, title, doctor_data=None):
@@ -245,7 +287,8 @@ class DoctorsPage:
         # Fields
         self._fields = {}
         field_names = ["first_name", "last_name", "specialization", "phone", "email", "schedule"]
-        field_labels = ["First Name", "Last Name", "Specialization", "Phone", "Email", "Schedule"]
+        field_labels = ["First Name", "Last Name", "Specialization", "Phone", "Email",
+                        "Schedule (e.g. Mon-Fri 09:00-17:00; Sat 10:00-13:00)"]
 
         for field, label in zip(field_names, field_labels):
             tk.Label(form, text=f"{label}:", font=("Arial", 12, "bold"), bg="white", fg="#2c3e50").pack(anchor="w", pady=(8, 5))
@@ -334,20 +377,142 @@ class DoctorsPage:
                     messagebox.showerror("Error", f"Please fill in {rf.replace('_', ' ').title()}")
                     return
 
+            try:
+                parse_weekly_schedule(data.get("schedule"))
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid schedule: {e}")
+                return
+
             # Optional: capture current user id if your app provides it
             data["user_id"] = getattr(self.app, "current_user_id", None)
 
             if doctor_data:  # edit existing; doctor_data[0] is primary key id
                 data["id"] = doctor_data[0]
-                self.app.db.update_doctor(data)
-                messagebox.showinfo("Success", "Doctor updated successfully and added to list")
+                save = self.app.db.update_doctor
+                message = lambda _r: "Doctor updated successfully and added to list"
             else:
-                new_code = self.app.db.add_doctor(data)
-                messagebox.showinfo("Success", f"Doctor added successfully (ID: {new_code}) and added to list")
-
-            window.destroy()
-            self.load_doctors()
+                save = self.app.db.add_doctor
+                message = lambda new_code: f"Doctor added successfully (ID: {new_code}) and added to list"
+
+            self.app.worker.submit(
+                save,
+                data,
+                owner=self,
+                indicator=self.loading,
+                on_success=lambda result: self.on_doctor_saved(window, result, message, "Failed to save doctor"),
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to save doctor: {e}"),
+            )
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save doctor: {e}")
 
+    def on_doctor_saved(self, window, result, message, failure):
+        """Report a finished write (``message(result)``); on failure the form stays open to retry"""
+        if not result:
+            messagebox.showerror("Error", failure)
+            return
+        messagebox.showinfo("Success", message(result))
+        if window is not None:
+            window.destroy()
+        self.refresh_doctors()
+
+
 
+    # --------------- Availability exceptions ---------------
+    def time_off(self):
+        sel = self.doctors_tree.selection()
+        if not sel:
+            messagebox.showwarning("Warning", "Please select a doctor")
+            return
+        values = self.doctors_tree.item(sel[0])["values"]
+        doctor_id = values[0]
+
+        win = tk.Toplevel(self.root)
+        win.title("Time Off")
+        win.geometry("520x480")
+        win.configure(bg="white")
+        win.transient(self.root)
+        win.grab_set()
+
+        tk.Label(win, text=f"Time Off - Dr. {values[1]} {values[2]}", font=("Arial", 16, "bold"),
+                 bg="white", fg="#2c3e50").pack(pady=(10, 10))
+
+        entries = {}
+        for key, label in [("date", "Date (YYYY-MM-DD):"), ("start", "From (HH:MM, blank = all day):"),
+                           ("end", "To (HH:MM, blank = all day):"), ("reason", "Reason:")]:
+            tk.Label(win, text=label, font=("Arial", 11, "bold"), bg="white", fg="#2c3e50").pack(anchor="w", padx=20)
+            entries[key] = tk.Entry(win, font=("Arial", 11), relief="solid", bd=1)
+            entries[key].pack(fill="x", padx=20, pady=(0, 6), ipady=4)
+
+        listbox = tk.Listbox(win, font=("Arial", 11), bg="#f8f9fa", relief="solid", bd=1, height=6)
+        exception_ids = []
+
+        def show_exceptions(rows):
+            if not win.winfo_exists():
+                return
+            listbox.delete(0, tk.END)
+            exception_ids[:] = [row["id"] for row in rows]
+            for row in rows:
+                hours = f"{row['start_time']}-{row['end_time']}" if row["start_time"] else "all day"
+                listbox.insert(tk.END, f"{row['exception_date']}  {hours}  {row['reason'] or ''}")
+
+        def load():
+            self.app.worker.submit(
+                self.app.db.get_availability_exceptions,
+                doctor_id,
+                date.today(),
+                owner=self,
+                on_success=show_exceptions,
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to load time off: {e}"),
+            )
+
+        def add():
+            day = entries["date"].get().strip()
+            start, end = entries["start"].get().strip(), entries["end"].get().strip()
+            try:
+                datetime.strptime(day, "%Y-%m-%d")
+                for t in (start, end):
+                    if t:
+                        datetime.strptime(t, "%H:%M")
+            except ValueError:
+                messagebox.showerror("Error", "Use YYYY-MM-DD for the date and HH:MM for times")
+                return
+            if bool(start) != bool(end):
+                messagebox.showerror("Error", "Give both From and To, or neither for the whole day")
+                return
+            self.app.worker.submit(
+                self.app.db.add_availability_exception,
+                doctor_id,
+                day,
+                start or None,
+                end or None,
+                reason=entries["reason"].get().strip(),
+                owner=self,
+                on_success=lambda exception_id: load() if exception_id else messagebox.showerror(
+                    "Error", "Failed to save time off"),
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to save time off: {e}"),
+            )
+
+        def remove():
+            picked = listbox.curselection()
+            if not picked:
+                return
+            self.app.worker.submit(
+                self.app.db.delete_availability_exception,
+                exception_ids[picked[0]],
+                owner=self,
+                on_success=lambda removed: load() if removed else messagebox.showerror(
+                    "Error", "Time off was already removed"),
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to remove time off: {e}"),
+            )
+
+        btn_row = tk.Frame(win, bg="white")
+        btn_row.pack(fill="x", padx=20, pady=(4, 8))
+        tk.Button(btn_row, text="Add", font=("Arial", 11, "bold"), bg="#27ae60", fg="white",
+                  relief="flat", cursor="hand2", command=add).pack(side="left", padx=(0, 10), ipadx=16, ipady=4)
+        tk.Button(btn_row, text="Remove Selected", font=("Arial", 11), bg="#e74c3c", fg="white",
+                  relief="flat", cursor="hand2", command=remove).pack(side="left", ipadx=16, ipady=4)
+
+        tk.Label(win, text="Upcoming time off:", font=("Arial", 11, "bold"), bg="white",
+                 fg="#2c3e50").pack(anchor="w", padx=20)
+        listbox.pack(fill="both", expand=True, padx=20, pady=(0, 10))
+        load()
@@ -0,0 +1,146 @@
+"""
+Exporter
+Streams patients, appointments, doctors and staff to CSV, JSON Lines or Parquet files
+"""
+import csv
+import gzip
+import json
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+EXPORT_FORMATS = {"csv": ".csv", "jsonl": ".jsonl", "parquet": ".parquet"}
+
+
+def _plain(value):
+    """A value as CSV/JSON can hold it"""
+    if isinstance(value, timedelta):
+        # mysql.connector returns TIME columns as timedelta
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class _CsvWriter:
+    def __init__(self, path, columns, types, compress):
+        self.file = gzip.open(path, "wt", newline="", encoding="utf-8") if compress else \
+            open(path, "w", newline="", encoding="utf-8")
+        self.columns = columns
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows([_plain(row[c]) for c in self.columns] for row in rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _JsonLinesWriter:
+    def __init__(self, path, columns, types, compress):
+        self.file = gzip.open(path, "wt", encoding="utf-8") if compress else open(path, "w", encoding="utf-8")
+        self.columns = columns
+
+    def write(self, rows):
+        self.file.writelines(
+            json.dumps({c: _plain(row[c]) for c in self.columns}, ensure_ascii=False) + "\n" for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    """One Parquet row group per fetched chunk, with a fixed schema from the column types"""
+
+    def __init__(self, path, columns, types, compress):
+        if pq is None:
+            raise RuntimeError("Parquet export needs the 'pyarrow' package (pip install pyarrow)")
+        arrow_types = {
+            "int": pa.int64(), "str": pa.string(), "date": pa.date32(), "time": pa.time32("s"),
+            "datetime": pa.timestamp("s"), "decimal": pa.decimal128(12, 2),
+        }
+        self.columns = columns
+        self.types = types
+        self.schema = pa.schema([(c, arrow_types[t]) for c, t in zip(columns, types)])
+        self.writer = pq.ParquetWriter(path, self.schema, compression="gzip" if compress else "snappy")
+
+    def _value(self, value, kind):
+        if kind == "time" and isinstance(value, timedelta):
+            return (datetime.min + value).time()
+        return value
+
+    def write(self, rows):
+        arrays = {c: [self._value(row[c], t) for row in rows] for c, t in zip(self.columns, self.types)}
+        self.writer.write_table(pa.Table.from_pydict(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {"csv": _CsvWriter, "jsonl": _JsonLinesWriter, "parquet": _ParquetWriter}
+
+
+class Exporter:
+    """Write one export dataset (see ``Database.EXPORT_SPECS``) to a file.
+
+    Rows are streamed from the database a chunk at a time and written as they
+    arrive, so memory use does not depend on the size of the table.
+    ``progress(rows_written)`` is called after each chunk; setting
+    ``cancel_event`` stops the export (the partial file is kept).
+    """
+
+    def __init__(self, db, dataset, path, columns=None, start_date=None, end_date=None, fmt="csv",
+                 compress=False, chunk_size=5000, progress=None, cancel_event=None):
+        if fmt not in WRITERS:
+            raise ValueError(f"Unknown export format '{fmt}'")
+        spec = db.EXPORT_SPECS[dataset]
+        self.db = db
+        self.dataset = dataset
+        self.path = path
+        self.columns = list(columns or spec["columns"])
+        self.types = [spec["columns"][c][1] for c in self.columns]
+        self.start_date = start_date
+        self.end_date = end_date
+        self.fmt = fmt
+        self.compress = compress
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.cancel_event = cancel_event
+
+    def run(self):
+        started = time.monotonic()
+        written = 0
+        cancelled = False
+        writer = WRITERS[self.fmt](self.path, self.columns, self.types, self.compress)
+        chunks = self.db.stream_export(self.dataset, self.columns, self.start_date, self.end_date, self.chunk_size)
+        try:
+            for rows in chunks:
+                writer.write(rows)
+                written += len(rows)
+                if self.progress:
+                    self.progress(written)
+                if self.cancel_event is not None and self.cancel_event.is_set():
+                    cancelled = True
+                    break
+        finally:
+            chunks.close()
+            writer.close()
+        return {
+            "dataset": self.dataset,
+            "rows": written,
+            "path": self.path,
+            "cancelled": cancelled,
+            "seconds": round(time.monotonic() - started, 1),
+        }
@@ -0,0 +1,274 @@
+"""
+Bulk Importer
+Streams patients, doctors and staff from CSV/JSON files into the database
+"""
+import csv
+import io
+import json
+import os
+import random
+import time
+from datetime import datetime, date
+from decimal import Decimal, InvalidOperation
+
+from mysql.connector import Error
+
+from db import age_from_dob
+from scheduling import parse_weekly_schedule
+
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y", "%d-%m-%Y")
+GENDERS = {"m": "Male", "male": "Male", "f": "Female", "female": "Female", "o": "Other", "other": "Other"}
+
+
+# ---------- Reading ----------
+def _iter_json_array(text, chunk_size=1 << 16):
+    """Yield the objects of a top-level JSON array without loading the whole file"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+    while True:
+        chunk = text.read(chunk_size)
+        buffer += chunk
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if not started:
+                if pos < len(buffer):
+                    if buffer[pos] != "[":
+                        raise ValueError("JSON import expects an array of objects or JSON Lines")
+                    started = True
+                    pos += 1
+                    continue
+                break
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # Object continues in the next chunk
+            yield obj
+            pos = end
+        buffer = buffer[pos:]
+        if not chunk:
+            if buffer.strip():
+                raise ValueError("JSON file ended in the middle of an object")
+            return
+
+
+def read_records(path, binary):
+    """Yield (line, dict) for every record in a CSV, JSON array or JSON Lines file.
+
+    A JSON Lines line that doesn't parse comes through as (line, ValueError)
+    so the importer rejects that line and carries on with the rest.
+    """
+    text = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+    elif ext in (".jsonl", ".ndjson"):
+        for line_no, line in enumerate(text, start=1):
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    record = ValueError(f"not valid JSON: {e.msg} at column {e.colno}")
+                yield line_no, record
+    elif ext == ".json":
+        for index, obj in enumerate(_iter_json_array(text), start=1):
+            yield index, obj
+    else:
+        raise ValueError(f"Unsupported file type '{ext}' (use .csv, .json or .jsonl)")
+
+
+# ---------- Validation ----------
+def _text(row, field, required=False, max_length=None):
+    value = row.get(field)
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise ValueError(f"{field} is required")
+    if max_length and len(value) > max_length:
+        raise ValueError(f"{field} is longer than {max_length} characters")
+    return value or None
+
+
+def _date(row, field, required=False):
+    value = _text(row, field, required)
+    if value is None:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"{field} '{value}' is not a date (use YYYY-MM-DD)")
+
+
+def _email(row, field, required=False):
+    value = _text(row, field, required, max_length=150)
+    if value and ("@" not in value or value.startswith("@") or value.endswith("@")):
+        raise ValueError(f"{field} '{value}' is not an email address")
+    return value
+
+
+def validate_patient(row, today):
+    dob = _date(row, "date_of_birth")
+    if dob and dob > today:
+        raise ValueError(f"date_of_birth {dob} is in the future")
+    gender = _text(row, "gender")
+    if gender is not None:
+        if gender.lower() not in GENDERS:
+            raise ValueError(f"gender '{gender}' must be Male, Female or Other")
+        gender = GENDERS[gender.lower()]
+    return (
+        None,  # user_id: imported patients have no login yet
+        _text(row, "patient_id", max_length=20) or "PAT" + "".join(random.choices("0123456789", k=10)),
+        _text(row, "first_name", True, 50),
+        _text(row, "last_name", True, 50),
+        age_from_dob(dob, today),
+        dob,
+        gender,
+        _text(row, "phone", max_length=20),
+        _email(row, "email"),
+        _text(row, "address"),
+        _text(row, "medical_history"),
+        _text(row, "emergency_contact", max_length=100),
+    )
+
+
+def validate_doctor(row, today):
+    schedule = _text(row, "schedule")
+    parse_weekly_schedule(schedule)  # raises ValueError for unreadable hours
+    return (
+        _text(row, "first_name", True, 100),
+        _text(row, "last_name", True, 100),
+        _text(row, "specialization", True, 100),
+        _text(row, "phone", True, 20),
+        _email(row, "email", True),
+        schedule,
+    )
+
+
+def validate_staff(row, today):
+    salary = _text(row, "salary")
+    if salary is not None:
+        try:
+            salary = Decimal(salary.replace(",", ""))
+        except InvalidOperation:
+            raise ValueError(f"salary '{salary}' is not a number")
+    return (
+        _text(row, "full_name", True, 255),
+        _text(row, "role", True, 100),
+        _text(row, "department", max_length=100),
+        _text(row, "phone", max_length=20),
+        _email(row, "email"),
+        _date(row, "hire_date"),
+        salary,
+    )
+
+
+IMPORT_SPECS = {
+    "patients": (("user_id", "patient_id", "first_name", "last_name", "age", "date_of_birth", "gender",
+                  "phone", "email", "address", "medical_history", "emergency_contact"), validate_patient),
+    "doctors": (("first_name", "last_name", "specialization", "phone", "email", "schedule"), validate_doctor),
+    "staff": (("full_name", "role", "department", "phone", "email", "hire_date", "salary"), validate_staff),
+}
+
+
+# ---------- Import ----------
+class Importer:
+    """Validate and insert one file's records in batched transactions.
+
+    Valid rows are inserted ``batch_size`` at a time with one multi-row
+    INSERT per transaction. If a batch is refused (e.g. a duplicate
+    patient_id) it is retried row by row so only the offending rows are
+    rejected. Rejected rows are written to ``rejected_path`` as CSV with
+    the line number and reason, ready to fix and import again.
+    ``progress(done_fraction, imported, rejected)`` is called after each
+    batch; setting ``cancel_event`` stops after the current batch.
+    """
+
+    def __init__(self, db, table, path, rejected_path=None, batch_size=1000, progress=None, cancel_event=None):
+        if table not in IMPORT_SPECS:
+            raise ValueError(f"Cannot import into {table}")
+        self.db = db
+        self.table = table
+        self.path = path
+        self.rejected_path = rejected_path or os.path.splitext(path)[0] + ".rejected.csv"
+        self.batch_size = batch_size
+        self.progress = progress
+        self.cancel_event = cancel_event
+        self.columns, self.validate = IMPORT_SPECS[table]
+        self.imported = 0
+        self.rejected = 0
+
+    def run(self):
+        started = time.monotonic()
+        today = date.today()
+        size = os.path.getsize(self.path) or 1
+        rejected_file = None
+        writer = None
+        try:
+            with open(self.path, "rb") as binary:
+                batch = []
+                for line, record in read_records(self.path, binary):
+                    try:
+                        if isinstance(record, ValueError):
+                            raise record
+                        if not isinstance(record, dict):
+                            raise ValueError("record is not an object")
+                        batch.append((line, record, self.validate(record, today)))
+                    except ValueError as e:
+                        writer, rejected_file = self._reject(writer, rejected_file, line, record, e)
+                    if len(batch) >= self.batch_size:
+                        writer, rejected_file = self._flush(batch, writer, rejected_file)
+                        batch = []
+                        self._report(binary.tell() / size)
+                        if self.cancel_event is not None and self.cancel_event.is_set():
+                            break
+                else:
+                    if batch:
+                        writer, rejected_file = self._flush(batch, writer, rejected_file)
+                    self._report(1.0)
+        finally:
+            if rejected_file is not None:
+                rejected_file.close()
+            if self.imported:
+                self.db.finish_import(self.table)
+        return {
+            "table": self.table,
+            "imported": self.imported,
+            "rejected": self.rejected,
+            "rejected_path": self.rejected_path if self.rejected else None,
+            "cancelled": bool(self.cancel_event is not None and self.cancel_event.is_set()),
+            "seconds": round(time.monotonic() - started, 1),
+        }
+
+    def _flush(self, batch, writer, rejected_file):
+        try:
+            self.imported += self.db.bulk_insert(self.table, self.columns, [values for _l, _r, values in batch])
+        except Error:
+            for line, record, values in batch:
+                try:
+                    self.imported += self.db.bulk_insert(self.table, self.columns, [values])
+                except Error as e:
+                    writer, rejected_file = self._reject(writer, rejected_file, line, record, e)
+        return writer, rejected_file
+
+    def _reject(self, writer, rejected_file, line, record, error):
+        self.rejected += 1
+        if writer is None:
+            rejected_file = open(self.rejected_path, "w", newline="", encoding="utf-8")
+            fields = [c for c in self.columns if c not in ("user_id", "age")]
+            writer = csv.DictWriter(rejected_file, fieldnames=["line", "error"] + fields, extrasaction="ignore")
+            writer.writeheader()
+        row = dict(record) if isinstance(record, dict) else {}
+        row.update(line=line, error=str(error))
+        writer.writerow(row)
+        return writer, rejected_file
+
+    def _report(self, fraction):
+        if self.progress:
+            self.progress(min(fraction, 1.0), self.imported, self.rejected)
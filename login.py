@@ -51,10 +51,10 @@ class LoginPage:
         self.password_entry.pack(fill='x', ipady=8, pady=(0, 20))
         
         # Login button
-        login_btn = tk.Button(form_frame, text="Login", font=('Arial', 14, 'bold'),
-                             bg='#2196F3', fg='white', relief='flat', cursor='hand2',
-                             command=self.handle_login)
-        login_btn.pack(fill='x', ipady=10, pady=(0, 10))
+        self.login_btn = tk.Button(form_frame, text="Login", font=('Arial', 14, 'bold'),
+                                  bg='#2196F3', fg='white', relief='flat', cursor='hand2',
+                                  command=self.handle_login)
+        self.login_btn.pack(fill='x', ipady=10, pady=(0, 10))
         
         # Signup button
         signup_btn = tk.Button(form_frame, text="Create Account", font=('Arial', 12),
@@ -62,8 +62,9 @@ class LoginPage:
                               command=self.app.show_signup)
         signup_btn.pack(fill='x', ipady=8)
         
-        # Bind Enter key to login
-        self.root.bind('<Return>', lambda event: self.handle_login())
+        # Bind Enter key to login (on the fields: the page lives in a frame, which never has focus)
+        for entry in (self.username_entry, self.password_entry):
+            entry.bind('<Return>', lambda event: self.handle_login())
         
         # Focus on username entry
         self.username_entry.focus()
@@ -76,12 +77,23 @@ class LoginPage:
         if not username or not password:
             messagebox.showerror("Error", "Please enter both username and password")
             return
+        if self.login_btn['state'] == 'disabled':
+            return  # a login is already being checked
         
-        # Authenticate user
-        user = self.app.db.authenticate_user(username, password)
+        # Authenticate user in the background: password hashing is slow on purpose
+        self.login_btn.config(state='disabled', text="Signing in...")
+        self.app.worker.submit(self.app.db.authenticate_user, username, password, owner=self,
+                               on_success=self.login_finished, on_error=self.login_failed)
+
+    def login_finished(self, user):
+        self.login_btn.config(state='normal', text="Login")
         if user:
             messagebox.showinfo("Success", f"Welcome, {user['full_name']}!")
             self.app.login_user(user)
         else:
             messagebox.showerror("Error", "Invalid username or password")
             self.password_entry.delete(0, tk.END)
+
+    def login_failed(self, error):
+        self.login_btn.config(state='normal', text="Login")
+        messagebox.showerror("Error", f"Login failed: {error}")
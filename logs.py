@@ -0,0 +1,129 @@
+"""
+Application Logging
+Leveled, sampled logging written by a background thread
+"""
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime
+
+ROOT = "healthnet"
+
+# Attributes every LogRecord has; anything else was passed in ``extra`` and is a structured field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener = None
+
+
+def get_logger(name):
+    """Logger for a module, e.g. ``get_logger(__name__)`` -> healthnet.db"""
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+class SamplingFilter(logging.Filter):
+    """Let through 1 in ``every`` records below ``level`` per message template.
+
+    Applied before the queue, so a chatty debug statement on a hot path
+    costs one counter increment for the records it drops. Warnings and
+    errors are never sampled.
+    """
+
+    def __init__(self, every=1, level=logging.WARNING):
+        super().__init__()
+        self.every = max(int(every), 1)
+        self.level = level
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.every == 1 or record.levelno >= self.level:
+            return True
+        key = (record.name, record.msg)
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(key, itertools.count())
+        return next(counter) % self.every == 0
+
+
+class StructuredFormatter(logging.Formatter):
+    """``time LEVEL logger: message key=value ...``, or one JSON object per line"""
+
+    def __init__(self, as_json=False):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record):
+        fields = {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRIBUTES}
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        timestamp = datetime.fromtimestamp(record.created).isoformat(sep=" ", timespec="milliseconds")
+        if self.as_json:
+            entry = {"time": timestamp, "level": record.levelname, "logger": record.name, "message": message}
+            entry.update(fields)
+            if record.exc_text:
+                entry["exception"] = record.exc_text
+            return json.dumps(entry, default=str)
+        line = f"{timestamp} {record.levelname:<7} {record.name}: {message}"
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+def configure(level=None, path=None, sample=None, as_json=None):
+    """Send the healthnet loggers through a queue to stderr (and ``path``).
+
+    Records are only put on a queue by the calling thread; a
+    QueueListener thread formats and writes them, so logging never waits
+    on the console or disk. Defaults come from HEALTHNET_LOG_LEVEL (INFO),
+    HEALTHNET_LOG_FILE, HEALTHNET_LOG_SAMPLE (keep 1 in N debug/info
+    records per message) and HEALTHNET_LOG_JSON. Calling it again
+    replaces the previous configuration.
+    """
+    global _listener
+    level = level or os.environ.get("HEALTHNET_LOG_LEVEL", "INFO")
+    path = path or os.environ.get("HEALTHNET_LOG_FILE")
+    sample = sample or int(os.environ.get("HEALTHNET_LOG_SAMPLE", "1"))
+    if as_json is None:
+        as_json = os.environ.get("HEALTHNET_LOG_JSON", "") not in ("", "0")
+
+    shutdown()
+    formatter = StructuredFormatter(as_json)
+    handlers = [logging.StreamHandler()]
+    if path:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handlers.append(logging.handlers.RotatingFileHandler(path, maxBytes=10 * 1024 * 1024, backupCount=5,
+                                                             encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample))
+    root = logging.getLogger(ROOT)
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    root.propagate = False
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown():
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown)
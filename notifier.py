@@ -0,0 +1,103 @@
+"""
+Change Notifier
+One shared change_log poller that tells subscribed pages which tables changed
+"""
+from widgets import RefreshScheduler
+from logs import get_logger
+
+log = get_logger(__name__)
+
+
+class ChangeNotifier:
+    """Fans change_log entries out to the pages that subscribed to their tables.
+
+    Instead of every open page re-counting its tables on a timer, the app
+    runs one poller: a single "entries after sequence N" range scan per
+    ``interval`` ms, in the background, only while something is
+    subscribed. ``callback(tables)`` is then called on the Tk thread with
+    the subscribed tables that changed. The poller pauses while the window
+    is minimized and slows down while the user is idle (see
+    ``RefreshScheduler``).
+
+    Pages subscribe when shown and unsubscribe when hidden or destroyed,
+    refreshing themselves on show to catch up on what they missed.
+
+    Audit events are not in the change log (logins and reads would churn
+    it); subscribing to "audit_log" adds a lookup of its highest id instead.
+    """
+
+    def __init__(self, root, db, worker, interval=2000, max_interval=30000):
+        self.db = db
+        self.worker = worker
+        self._subscribers = {}  # owner -> (tables, callback)
+        self._watermark = None
+        self._seen = set()  # sequence numbers inside the look-back window already delivered
+        self._audit_watermark = None
+        self._polling = False
+        self._scheduler = RefreshScheduler(root, self._poll, interval=interval, max_interval=max_interval)
+
+    def subscribe(self, owner, tables, callback):
+        """Call ``callback(changed_tables)`` whenever any of ``tables`` changes (replaces ``owner``'s subscription)"""
+        self._subscribers[owner] = (frozenset(tables), callback)
+        if not self._scheduler.running:
+            self._scheduler.start()
+
+    def unsubscribe(self, owner):
+        self._subscribers.pop(owner, None)
+        if not self._subscribers:
+            self.stop()
+
+    def stop(self):
+        """Drop every subscription and stop polling; the next subscriber starts from a fresh watermark"""
+        self._subscribers.clear()
+        self._scheduler.stop()
+        self.worker.cancel(self)
+        self._polling = False
+        self._watermark = None
+        self._audit_watermark = None
+        self._seen.clear()
+
+    # ---------- Internals ----------
+    def _poll(self):
+        if self._polling or not self._subscribers:
+            return
+        self._polling = True
+        audit = any("audit_log" in tables for tables, _callback in self._subscribers.values())
+        self.worker.submit(self._fetch, self._watermark, audit, owner=self,
+                           on_success=self._deliver, on_error=self._failed)
+
+    def _fetch(self, since, audit):
+        """(watermark, [(seq, table)], audit watermark or None, first poll?) -- runs on a worker thread"""
+        audit_watermark = self.db.get_audit_watermark() if audit else None
+        if since is None:
+            # Start from now: what is already in the look-back window counts as seen
+            since = self.db.get_change_watermark()
+            return since, self.db.get_changed_tables(since), audit_watermark, True
+        return since, self.db.get_changed_tables(since), audit_watermark, False
+
+    def _deliver(self, result):
+        self._polling = False
+        since, entries, audit_watermark, first = result
+        audit_changed = self._audit_watermark is not None and audit_watermark not in (None, self._audit_watermark)
+        self._audit_watermark = audit_watermark
+        fresh = [(seq, table) for seq, table in entries if seq not in self._seen]
+        self._watermark = max([since] + [seq for seq, _table in entries])
+        floor = self._watermark - self.db.CHANGE_LOG_OVERLAP
+        self._seen = {seq for seq in self._seen if seq > floor}
+        self._seen.update(seq for seq, _table in fresh)
+        changed = {table for _seq, table in fresh}
+        if audit_changed:
+            changed.add("audit_log")
+        if first or not changed:
+            return
+        log.debug("Change log advanced to %s: %s", self._watermark, ", ".join(sorted(changed)))
+        for owner, (tables, callback) in list(self._subscribers.items()):
+            if tables & changed and owner in self._subscribers:
+                try:
+                    callback(tables & changed)
+                except Exception as e:
+                    log.exception("Error in change subscriber %r: %s", owner, e)
+
+    def _failed(self, error):
+        self._polling = False
+        log.warning("Polling the change log failed: %s", error)
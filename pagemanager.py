@@ -0,0 +1,94 @@
+"""
+Page Manager
+Keeps visited pages alive between visits instead of rebuilding them
+"""
+from collections import OrderedDict
+import tkinter as tk
+
+
+class PageManager:
+    """Shows one page at a time in ``root``, caching up to ``max_pages`` built pages.
+
+    Each page is built lazily, on its first visit, inside its own container
+    frame (passed to the page as its ``root``). Leaving a cached page only
+    unpacks that frame, so its widgets, scroll position and loaded rows
+    survive; coming back packs it again and calls the page's ``on_show()``
+    so it can fetch what changed meanwhile (``PagedTreeview.sync`` rather
+    than a full reload). ``on_hide()`` is called when a page is left.
+
+    When more than ``max_pages`` pages are cached, the least recently shown
+    one is destroyed: its pending background tasks are cancelled and its
+    ``on_destroy()`` is called. Pages shown with ``cache=False`` (login,
+    signup) are destroyed as soon as another page is shown.
+    """
+
+    def __init__(self, root, worker, max_pages=4, bg='#f0f0f0'):
+        self.root = root
+        self.worker = worker
+        self.max_pages = max_pages
+        self.bg = bg
+        self._pages = OrderedDict()  # name -> (container, page), least recently shown first
+        self._current = None  # (name, container, page, cached)
+
+    @property
+    def current(self):
+        return self._current[2] if self._current else None
+
+    def show(self, name, build, cache=True):
+        """Show page ``name``, calling ``build(container)`` if it is not cached; returns the page"""
+        if self._current and self._current[0] == name and self._current[3]:
+            self._call(self._current[2], 'on_show')
+            return self._current[2]
+        self._leave()
+        if cache and name in self._pages:
+            container, page = self._pages[name]
+            self._pages.move_to_end(name)
+            container.pack(fill='both', expand=True)
+            self._current = (name, container, page, True)
+            self._call(page, 'on_show')
+            return page
+
+        container = tk.Frame(self.root, bg=self.bg)
+        container.pack(fill='both', expand=True)
+        page = build(container)
+        self._current = (name, container, page, cache)
+        if cache:
+            self._pages[name] = (container, page)
+            self._evict()
+        return page
+
+    def _leave(self):
+        if not self._current:
+            return
+        name, container, page, cached = self._current
+        self._current = None
+        if cached:
+            self._call(page, 'on_hide')
+            container.pack_forget()
+        else:
+            self._destroy(container, page)
+
+    def _evict(self):
+        while len(self._pages) > self.max_pages:
+            _name, (container, page) = self._pages.popitem(last=False)
+            self._destroy(container, page)
+
+    def _destroy(self, container, page):
+        self.worker.cancel(page)
+        self._call(page, 'on_destroy')
+        if container.winfo_exists():
+            container.destroy()
+
+    def clear(self):
+        """Destroy every page, e.g. at logout, so no user's data outlives the session"""
+        self._leave()
+        while self._pages:
+            _name, (container, page) = self._pages.popitem(last=False)
+            self._destroy(container, page)
+        self.worker.cancel_all()
+
+    @staticmethod
+    def _call(page, hook):
+        method = getattr(page, hook, None)
+        if method is not None:
+            method()
@@ -0,0 +1,89 @@
+"""
+Password Hashing
+Salted scrypt / PBKDF2 hashes that carry their own cost parameters
+"""
+import base64
+import hashlib
+import hmac
+import os
+
+SCRYPT = "scrypt"
+PBKDF2 = "pbkdf2-sha256"
+
+# scrypt N = 2**ln: ~16 MiB and ~50 ms per hash on a desktop CPU. Tune with
+# ``python -m benchmarks.passwords``; stored hashes keep the parameters they
+# were made with and are upgraded at the next successful login.
+if hasattr(hashlib, "scrypt"):
+    DEFAULT_PARAMS = {"scheme": SCRYPT, "ln": 14, "r": 8, "p": 1}
+else:  # Python built against an OpenSSL without scrypt
+    DEFAULT_PARAMS = {"scheme": PBKDF2, "i": 600000}
+
+SALT_BYTES = 16
+_DUMMY_HASHES = {}
+
+
+def _b64(data):
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _derive(password, salt, params):
+    password = password.encode()
+    if params["scheme"] == SCRYPT:
+        n, r, p = 2 ** params["ln"], params["r"], params["p"]
+        return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, dklen=32, maxmem=256 * r * (n + p) + 2 ** 20)
+    if params["scheme"] == PBKDF2:
+        return hashlib.pbkdf2_hmac("sha256", password, salt, params["i"], dklen=32)
+    raise ValueError(f"Unknown password scheme {params['scheme']}")
+
+
+def hash_password(password, params=None):
+    """``$scheme$k=v,...$salt$hash`` for ``password`` with a fresh random salt"""
+    params = dict(params or DEFAULT_PARAMS)
+    salt = os.urandom(SALT_BYTES)
+    settings = ",".join(f"{key}={value}" for key, value in params.items() if key != "scheme")
+    return f"${params['scheme']}${settings}${_b64(salt)}${_b64(_derive(password, salt, params))}"
+
+
+def parse(stored):
+    """(params, salt, digest) of a stored hash; params is {"scheme": "sha256"} for legacy hex digests"""
+    if not stored.startswith("$"):
+        return {"scheme": "sha256"}, b"", bytes.fromhex(stored)
+    _empty, scheme, settings, salt, digest = stored.split("$")
+    params = {"scheme": scheme}
+    params.update((key, int(value)) for key, value in (item.split("=") for item in settings.split(",")))
+    return params, _unb64(salt), _unb64(digest)
+
+
+def verify_password(password, stored, params=None):
+    """True when ``password`` matches ``stored``, compared in constant time.
+
+    ``stored=None`` (unknown user) still derives a key with ``params`` so
+    the response time doesn't reveal which usernames exist.
+    """
+    if stored is None:
+        key = tuple(sorted((params or DEFAULT_PARAMS).items()))
+        if key not in _DUMMY_HASHES:
+            _DUMMY_HASHES[key] = hash_password("", params)
+        verify_password(password, _DUMMY_HASHES[key])
+        return False
+    try:
+        stored_params, salt, digest = parse(stored)
+        if stored_params["scheme"] == "sha256":  # accounts created before salted hashing
+            candidate = hashlib.sha256(password.encode()).digest()
+        else:
+            candidate = _derive(password, salt, stored_params)
+    except (ValueError, KeyError):
+        return False
+    return hmac.compare_digest(candidate, digest)
+
+
+def needs_rehash(stored, params=None):
+    """True when ``stored`` was made with other parameters than ``params`` (or is a legacy digest)"""
+    try:
+        return parse(stored)[0] != dict(params or DEFAULT_PARAMS)
+    except ValueError:
+        return True
@@ -65,9 +65,6 @@ class PatientDashboard:
         self.clear_display()
         label = tk.Label(self.display_frame, text="My Appointments", font=("Arial", 14, "bold"), bg="white")
         label.pack(pady=10)
-        print("DEBUG - self.user contents:", self.user) 
-        print("DEBUG - self.user object:", self.user)
-        print("DEBUG - Using patient_id:", self.user.get("patient_id"))
         appointments = self.app.db.get_patient_appointments(self.user["patient_id"])
         if appointments:
             for a in appointments:
@@ -2,6 +2,9 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
 import random
+from widgets import LoadingOverlay, PagedTreeview, ImportDialog, ExportDialog
+from importer import Importer
+from exporter import Exporter, EXPORT_FORMATS
 
 class PatientsPage:
     def __init__(self, root, app):
@@ -44,7 +47,9 @@ class PatientsPage:
         buttons_frame.pack(fill='x')
         tk.Button(buttons_frame, text="Add New Patient", font=('Arial', 12, 'bold'), bg='#27ae60', fg='white', relief='flat', cursor='hand2', command=self.add_patient).pack(side='left', padx=(0, 10), ipady=8, ipadx=15)
         tk.Button(buttons_frame, text="Edit Patient", font=('Arial', 12), bg='#f39c12', fg='white', relief='flat', cursor='hand2', command=self.edit_patient).pack(side='left', padx=(0, 10), ipady=8, ipadx=15)
-        tk.Button(buttons_frame, text="Delete Patient", font=('Arial', 12), bg='#e74c3c', fg='white', relief='flat', cursor='hand2', command=self.delete_patient).pack(side='left', ipady=8, ipadx=15)
+        tk.Button(buttons_frame, text="Delete Patient", font=('Arial', 12), bg='#e74c3c', fg='white', relief='flat', cursor='hand2', command=self.delete_patient).pack(side='left', padx=(0, 10), ipady=8, ipadx=15)
+        tk.Button(buttons_frame, text="Import...", font=('Arial', 12), bg='#8e44ad', fg='white', relief='flat', cursor='hand2', command=self.import_patients).pack(side='left', padx=(0, 10), ipady=8, ipadx=15)
+        tk.Button(buttons_frame, text="Export...", font=('Arial', 12), bg='#16a085', fg='white', relief='flat', cursor='hand2', command=self.export_patients).pack(side='left', ipady=8, ipadx=15)
         
         # Table
         table_frame = tk.Frame(content_frame, bg='white', relief='raised', bd=1)
@@ -66,31 +71,48 @@ class PatientsPage:
         self.patients_tree.pack(side='left', fill='both', expand=True)
         v_scrollbar.pack(side='right', fill='y')
         h_scrollbar.pack(side='bottom', fill='x')
+        self.loading = LoadingOverlay(tree_frame)
+        self.table = PagedTreeview(self.patients_tree, v_scrollbar, self.app.worker, self,
+                                   fetch_page=self.app.db.get_patients_page,
+                                   row_values=self.patient_values, indicator=self.loading,
+                                   fetch_watermark=self.app.db.get_change_watermark,
+                                   fetch_changes=self.app.db.get_patient_changes, descending=True,
+                                   on_error=lambda e: messagebox.showerror("Error", f"Failed to load patients: {e}"))
         
         self.load_patients()
     
     # ----------------- Database Actions -----------------
     def load_patients(self):
-        for row in self.patients_tree.get_children():
-            self.patients_tree.delete(row)
-        patients = self.app.db.get_all_patients()
-        for p in patients:
-            full_name = f"{p.get('first_name','')} {p.get('last_name','')}"
-            # Calculate age if not stored
-            dob = p.get('date_of_birth')
-            age = p.get('age') or self.calculate_age(dob)
-            self.patients_tree.insert('', 'end', values=(
-                p.get('id',''),
-                full_name,
-                age,
-                dob,
-                p.get('gender',''),
-                p.get('phone',''),
-                p.get('email',''),
-                p.get('address',''),
-                p.get('medical_history',''),
-                p.get('emergency_contact','')
-            ))
+        self.table.reload()
+
+    def refresh_patients(self):
+        """Pick up changes after a save/delete without reloading the whole table"""
+        if self.search_entry.get().strip():
+            self.search_patients()
+        else:
+            self.table.sync()
+
+    def on_show(self):
+        """Called by the page manager when this cached page is shown again"""
+        self.refresh_patients()
+
+    def patient_values(self, p):
+        full_name = f"{p.get('first_name','')} {p.get('last_name','')}"
+        # Calculate age if not stored
+        dob = p.get('date_of_birth')
+        age = p.get('age') or self.calculate_age(dob)
+        return (
+            p.get('id',''),
+            full_name,
+            age,
+            dob,
+            p.get('gender',''),
+            p.get('phone',''),
+            p.get('email',''),
+            p.get('address',''),
+            p.get('medical_history',''),
+            p.get('emergency_contact','')
+        )
     
     def calculate_age(self, dob):
         try:
@@ -105,24 +127,9 @@ class PatientsPage:
         if not term:
             self.load_patients()
             return
-        patients = self.app.db.search_patients(term)
-        self.patients_tree.delete(*self.patients_tree.get_children())
-        for p in patients:
-            full_name = f"{p.get('first_name','')} {p.get('last_name','')}"
-            dob = p.get('date_of_birth')
-            age = p.get('age') or self.calculate_age(dob)
-            self.patients_tree.insert('', 'end', values=(
-                p.get('id',''),
-                full_name,
-                age,
-                dob,
-                p.get('gender',''),
-                p.get('phone',''),
-                p.get('email',''),
-                p.get('address',''),
-                p.get('medical_history',''),
-                p.get('emergency_contact','')
-            ))
+        self.app.worker.submit(self.app.db.search_patients, term, owner=self, indicator=self.loading,
+                               on_success=self.table.show_rows,
+                               on_error=lambda e: messagebox.showerror("Error", f"Search failed: {e}"))
     
     # ----------------- Add/Edit/Delete -----------------
     def add_patient(self):
@@ -143,11 +150,32 @@ class PatientsPage:
             return
         patient_data = self.patients_tree.item(selected[0])['values']
         if messagebox.askyesno("Confirm Delete", f"Delete patient '{patient_data[1]}'?"):
-            self.app.db.delete_patient(patient_data[0])
-            self.load_patients()
-            if hasattr(self.app, "dashboard_page"):
-                self.app.dashboard_page.refresh_stats()
+            self.app.worker.submit(self.app.db.delete_patient, patient_data[0], owner=self, indicator=self.loading,
+                                   on_success=self.on_patient_deleted,
+                                   on_error=lambda e: messagebox.showerror("Error", f"Failed to delete patient: {e}"))
+
+    def on_patient_deleted(self, success):
+        if not success:
+            messagebox.showerror("Error", "Failed to delete patient.")
+            return
+        self.refresh_patients()
+        if hasattr(self.app, "dashboard_page"):
+            self.app.dashboard_page.refresh_stats()
     
+    def import_patients(self):
+        ImportDialog(self.root, self.app.worker, self, "Import Patients",
+                     lambda path, progress, cancel: Importer(self.app.db, "patients", path,
+                                                             progress=progress, cancel_event=cancel),
+                     on_done=lambda _summary: self.refresh_patients())
+
+    def export_patients(self):
+        ExportDialog(self.root, self.app.worker, self, "Export Patients",
+                     list(self.app.db.EXPORT_SPECS["patients"]["columns"]), EXPORT_FORMATS,
+                     lambda path, columns, start, end, fmt, compress, progress, cancel: Exporter(
+                         self.app.db, "patients", path, columns, start, end, fmt, compress,
+                         progress=progress, cancel_event=cancel),
+                     date_label="Registered")
+
     # ----------------- Patient Form -----------------
     def patient_form_window(self, title, patient_data=None):
         form_window = tk.Toplevel(self.root)
@@ -222,18 +250,23 @@ class PatientsPage:
             if not patient_data:
                 data['patient_id'] = 'PAT' + ''.join(random.choices("0123456789", k=6))
                 data['user_id'] = None
-                success = self.app.db.add_patient(data)
-            else:
-                data['patient_id'] = patient_data[0]  # patient_id stored in ID column
-                success = self.app.db.update_patient(data)
-            if success:
-                messagebox.showinfo("Success","Patient saved successfully!")
-                form_window.destroy()
-                self.load_patients()
-                # Refresh dashboard stats if loaded
-                if hasattr(self.app, "dashboard_page"):
-                    self.app.dashboard_page.refresh_stats()
+                save = self.app.db.add_patient
             else:
-                messagebox.showerror("Error","Failed to save patient.")
+                data['id'] = patient_data[0]
+                save = self.app.db.update_patient
+            self.app.worker.submit(save, data, owner=self, indicator=self.loading,
+                                   on_success=lambda success: self.on_patient_saved(form_window, success),
+                                   on_error=lambda e: messagebox.showerror("Error", f"Unexpected error: {e}"))
         except Exception as e:
             messagebox.showerror("Error", f"Unexpected error: {e}")
+
+    def on_patient_saved(self, form_window, success):
+        if success:
+            messagebox.showinfo("Success","Patient saved successfully!")
+            form_window.destroy()
+            self.refresh_patients()
+            # Refresh dashboard stats if loaded
+            if hasattr(self.app, "dashboard_page"):
+                self.app.dashboard_page.refresh_stats()
+        else:
+            messagebox.showerror("Error","Failed to save patient.")
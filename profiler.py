@@ -0,0 +1,215 @@
+"""
+Query Profiler
+Per-method query timings, row counts and a slow-query log for the Database layer
+"""
+import json
+import math
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from logs import get_logger
+
+log = get_logger(__name__)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile ``p`` (0-100) of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(p / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+def summarize(seconds):
+    """{count, mean, min, max, p50, p95, p99} in milliseconds of a list of durations"""
+    values = sorted(s * 1000 for s in seconds)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 3),
+        "min_ms": round(values[0], 3),
+        "max_ms": round(values[-1], 3),
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+    }
+
+
+def _value_size(value):
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    return 8
+
+
+class _MethodStats:
+    """Totals for one Database method plus its most recent durations (for percentiles)"""
+
+    def __init__(self, window):
+        self.calls = 0
+        self.rows = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.recent = deque(maxlen=window)
+
+    def add(self, seconds, rows, size):
+        self.calls += 1
+        self.rows += rows
+        self.bytes += size
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.recent.append(seconds)
+
+    def as_dict(self):
+        summary = summarize(self.recent)
+        summary.update({
+            "calls": self.calls,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "total_ms": round(self.seconds * 1000, 1),
+            "max_ms": round(self.max_seconds * 1000, 3),
+        })
+        summary.pop("count", None)
+        return summary
+
+
+class QueryProfiler:
+    """Time every query run through ConnectionPool.cursor, grouped by the cursor's label.
+
+    Database methods label their cursors with their own name. Each query's
+    time covers execute plus fetching its rows; rows and bytes fetched
+    (string lengths, 8 per other value) are counted alongside, bytes only
+    for buffered cursors so streamed exports aren't slowed down. Percentiles
+    come from the last ``window`` queries of each method. A query slower
+    than ``slow_ms`` is also kept, with its SQL, in ``slow_queries`` (the
+    latest ``slow_log_size``). Profiling is off until ``enabled`` is set;
+    until then the pool hands out plain cursors.
+    """
+
+    def __init__(self, slow_ms=200, slow_log_size=200, window=1000, enabled=False):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.window = window
+        self.started_at = datetime.now()
+        self.slow_queries = deque(maxlen=slow_log_size)
+        self._methods = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, cursor, label=None, buffered=True):
+        """The cursor to hand out: timed under ``label`` when profiling is on"""
+        if not self.enabled:
+            return cursor
+        return TimedCursor(cursor, self, label or "unlabelled", count_bytes=buffered)
+
+    def record(self, method, query, seconds, rows, size):
+        with self._lock:
+            stats = self._methods.get(method)
+            if stats is None:
+                stats = self._methods[method] = _MethodStats(self.window)
+            stats.add(seconds, rows, size)
+            if seconds * 1000 < self.slow_ms:
+                return
+            entry = {
+                "at": datetime.now().isoformat(timespec="seconds"),
+                "method": method,
+                "ms": round(seconds * 1000, 1),
+                "rows": rows,
+                "query": re.sub(r"\s+", " ", query).strip()[:500],
+            }
+            self.slow_queries.append(entry)
+        log.warning("Slow query in %s: %s ms, %s rows", method, entry["ms"], rows, extra={"query": entry["query"]})
+
+    def snapshot(self):
+        """{method: stats dict}, slowest total time first"""
+        with self._lock:
+            stats = {name: s.as_dict() for name, s in self._methods.items()}
+        return dict(sorted(stats.items(), key=lambda item: item[1]["total_ms"], reverse=True))
+
+    def reset(self):
+        with self._lock:
+            self._methods.clear()
+            self.slow_queries.clear()
+            self.started_at = datetime.now()
+
+    def as_dict(self):
+        with self._lock:
+            slow = list(self.slow_queries)
+        return {
+            "since": self.started_at.isoformat(timespec="seconds"),
+            "slow_ms": self.slow_ms,
+            "methods": self.snapshot(),
+            "slow_queries": slow,
+        }
+
+    def dump(self, path):
+        """Write ``as_dict()`` to ``path`` as JSON"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+
+class TimedCursor:
+    """Cursor proxy that reports each query's time, rows and bytes to a QueryProfiler"""
+
+    def __init__(self, cursor, profiler, method, count_bytes=True):
+        self._cursor = cursor
+        self._profiler = profiler
+        self._method = method
+        self._count_bytes = count_bytes
+        self._query = None
+
+    def _finish(self):
+        if self._query is not None:
+            self._profiler.record(self._method, self._query, self._seconds, self._rows, self._bytes)
+            self._query = None
+
+    def _timed(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._seconds += time.perf_counter() - started
+
+    def execute(self, query, params=()):
+        self._finish()
+        self._query, self._seconds, self._rows, self._bytes = query, 0.0, 0, 0
+        return self._timed(self._cursor.execute, query, params)
+
+    def executemany(self, query, seq_params):
+        self._finish()
+        seq_params = list(seq_params)
+        self._query, self._seconds, self._rows, self._bytes = query, 0.0, len(seq_params), 0
+        return self._timed(self._cursor.executemany, query, seq_params)
+
+    def _count(self, rows):
+        if not self._count_bytes:
+            self._rows += len(rows)
+            return rows
+        for row in rows:
+            self._rows += 1
+            values = row.values() if isinstance(row, dict) else row
+            self._bytes += sum(_value_size(v) for v in values)
+        return rows
+
+    def fetchone(self):
+        row = self._timed(self._cursor.fetchone)
+        if row is not None:
+            self._count([row])
+        return row
+
+    def fetchmany(self, size):
+        return self._count(self._timed(self._cursor.fetchmany, size))
+
+    def fetchall(self):
+        return self._count(self._timed(self._cursor.fetchall))
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        # description, rowcount, lastrowid...
+        return getattr(self._cursor, name)
@@ -0,0 +1,102 @@
+"""
+Report Engine
+Renders the aggregate reports to CSV and HTML files, cached per date range
+"""
+import csv
+import html
+import json
+import os
+import time
+from datetime import date, datetime
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+class ReportEngine:
+    """Run the ``Database.REPORTS`` for a date range and write them to disk.
+
+    Every range gets its own directory (``<directory>/<start>_<end>/``)
+    holding one CSV per report plus ``index.html`` with all of them. A
+    ``meta.json`` records the change_log watermark of the
+    ``Database.REPORT_TABLES`` the files were built at; while it is
+    unchanged (and on the same day, since no-shows depend
+    on today's date) a repeat run returns the existing files without
+    querying the reports again.
+    """
+
+    def __init__(self, db, directory="reports"):
+        self.db = db
+        self.directory = directory
+
+    def output_dir(self, start_date, end_date):
+        return os.path.join(self.directory, f"{start_date:%Y-%m-%d}_{end_date:%Y-%m-%d}")
+
+    def generate(self, start_date, end_date, force=False):
+        """Build (or reuse) the reports for [start_date, end_date]; returns a summary dict"""
+        if end_date < start_date:
+            raise ValueError("End date must not be before start date")
+        started = time.monotonic()
+        out_dir = self.output_dir(start_date, end_date)
+        meta_path = os.path.join(out_dir, "meta.json")
+        today = date.today()
+        watermark = self.db.get_change_watermark(self.db.REPORT_TABLES)
+        stamp = {"watermark": watermark, "generated_on": today.isoformat(), "reports": list(self.db.REPORTS)}
+
+        if not force and os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                if json.load(f) == stamp:
+                    return self._summary(out_dir, cached=True, started=started)
+
+        os.makedirs(out_dir, exist_ok=True)
+        results = {}
+        for name in self.db.REPORTS:
+            columns, rows = self.db.run_report(name, start_date, end_date, today)
+            results[name] = (columns, rows)
+            with open(os.path.join(out_dir, f"{name}.csv"), "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                writer.writerows([_cell(v) for v in row] for row in rows)
+        with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+            f.write(self._html(results, start_date, end_date))
+        # Written last, so an interrupted run is never mistaken for a complete one
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(stamp, f)
+        return self._summary(out_dir, cached=False, started=started)
+
+    def _summary(self, out_dir, cached, started):
+        return {
+            "directory": out_dir,
+            "index": os.path.join(out_dir, "index.html"),
+            "files": [os.path.join(out_dir, f"{name}.csv") for name in self.db.REPORTS],
+            "cached": cached,
+            "seconds": round(time.monotonic() - started, 2),
+        }
+
+    def _html(self, results, start_date, end_date):
+        parts = [
+            "<!DOCTYPE html><html><head><meta charset='utf-8'>",
+            f"<title>HealthNet reports {start_date} to {end_date}</title>",
+            "<style>body{font-family:Arial,sans-serif;margin:24px;color:#2c3e50}"
+            "table{border-collapse:collapse;margin-bottom:32px}"
+            "th,td{border:1px solid #ccc;padding:4px 10px;text-align:left}"
+            "th{background:#34495e;color:white}</style></head><body>",
+            f"<h1>HealthNet reports</h1><p>{start_date} to {end_date} "
+            f"(generated {datetime.now():%Y-%m-%d %H:%M})</p>",
+        ]
+        for name, (columns, rows) in results.items():
+            parts.append(f"<h2>{html.escape(self.db.REPORTS[name])}</h2>")
+            if not rows:
+                parts.append("<p>No data for this period.</p>")
+                continue
+            parts.append("<table><tr>" + "".join(f"<th>{html.escape(c)}</th>" for c in columns) + "</tr>")
+            parts.extend("<tr>" + "".join(f"<td>{html.escape(_cell(v))}</td>" for v in row) + "</tr>"
+                         for row in rows)
+            parts.append("</table>")
+        parts.append("</body></html>")
+        return "\n".join(parts)
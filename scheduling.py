@@ -0,0 +1,188 @@
+"""
+Appointment Scheduling
+Appointment intervals, doctor availability and free-slot search
+"""
+import heapq
+import re
+from itertools import islice
+from datetime import datetime, time, timedelta
+
+DEFAULT_DURATION = 30  # minutes
+
+
+class AppointmentConflictError(Exception):
+    """Raised when a booking overlaps another appointment of the same doctor"""
+
+
+def appointment_start(appointment_date, appointment_time):
+    """Combine a DATE and TIME (as returned by MySQL or typed in a form) into a datetime"""
+    if isinstance(appointment_date, str):
+        appointment_date = datetime.strptime(appointment_date.strip(), "%Y-%m-%d").date()
+    if isinstance(appointment_time, timedelta):
+        # mysql.connector returns TIME columns as timedelta
+        return datetime.combine(appointment_date, time()) + appointment_time
+    if isinstance(appointment_time, str):
+        text = appointment_time.strip()
+        appointment_time = datetime.strptime(text, "%H:%M:%S" if text.count(":") == 2 else "%H:%M").time()
+    return datetime.combine(appointment_date, appointment_time)
+
+
+def appointment_interval(appointment_date, appointment_time, duration_minutes=None):
+    """(start, end) datetimes of an appointment"""
+    start = appointment_start(appointment_date, appointment_time)
+    return start, start + timedelta(minutes=duration_minutes or DEFAULT_DURATION)
+
+
+# ---------- Doctor availability ----------
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+_DAY_RANGE = re.compile(r"^([a-z]+)\s*(?:-|to)\s*([a-z]+)$")
+_TIME_RANGE = re.compile(
+    r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\s*(?:-|to)\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm)?$"
+)
+
+
+def _weekday(token):
+    token = token.strip().lower()[:3]
+    if token not in WEEKDAYS:
+        raise ValueError(f"Unknown day '{token}'")
+    return WEEKDAYS.index(token)
+
+
+def _clock(hour, minute, meridiem):
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    if hour == 24 and minute == 0:
+        return time.max
+    return time(hour, minute)
+
+
+def parse_weekly_schedule(text):
+    """Parse the doctors.schedule text into weekly blocks.
+
+    Accepts lines (or ';'-separated parts) such as "Mon-Fri 09:00-17:00",
+    "Mon, Wed 9am-1pm" or "Saturday 10:00 to 14:00". Returns a sorted list of
+    (weekday, start_time, end_time) with Monday as 0; raises ValueError for
+    text it cannot read.
+    """
+    blocks = []
+    for part in re.split(r"[;\n]", text or ""):
+        part = part.strip().lower()
+        if not part:
+            continue
+        match = re.search(r"\d", part)
+        if not match:
+            raise ValueError(f"No hours in '{part}'")
+        days_text, hours_text = part[:match.start()].strip(" :,"), part[match.start():].strip()
+        hours = _TIME_RANGE.match(hours_text)
+        if not days_text or not hours:
+            raise ValueError(f"Cannot read '{part}' (expected e.g. 'Mon-Fri 09:00-17:00')")
+        start = _clock(*hours.group(1, 2, 3))
+        end = _clock(*hours.group(4, 5, 6))
+        if end <= start:
+            raise ValueError(f"End time must be after start time in '{part}'")
+        days = set()
+        for token in re.split(r"\s*(?:,|&|\band\b)\s*", days_text):
+            day_range = _DAY_RANGE.match(token)
+            if day_range:
+                first, last = _weekday(day_range.group(1)), _weekday(day_range.group(2))
+                days.update(range(first, last + 1) if first <= last else [*range(first, 7), *range(0, last + 1)])
+            elif token:
+                days.add(_weekday(token))
+        blocks.extend((day, start, end) for day in days)
+    return sorted(blocks)
+
+
+def _subtract(free, busy):
+    """Remove the sorted ``busy`` intervals from the sorted ``free`` intervals"""
+    result = []
+    j = 0
+    for start, end in free:
+        while j < len(busy) and busy[j][1] <= start:
+            j += 1
+        k = j
+        while k < len(busy) and busy[k][0] < end:
+            if busy[k][0] > start:
+                result.append((start, busy[k][0]))
+            start = max(start, busy[k][1])
+            k += 1
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+def _merge(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _day_span(day, start_time, end_time):
+    end = datetime.combine(day, end_time)
+    if end_time == time.max:
+        end = datetime.combine(day + timedelta(days=1), time())
+    return datetime.combine(day, start_time), end
+
+
+def doctor_free_slots(blocks, exceptions, bookings, start_date, end_date, duration_minutes, not_before=None):
+    """Yield free (start, end) slots of one doctor in time order.
+
+    ``blocks`` are weekly (weekday, start_time, end_time) blocks;
+    ``exceptions`` map a date to [(start_time, end_time, available)] where
+    times of None mean the whole day; ``bookings`` are (start, end) datetimes
+    sorted by start. Each day's open hours are swept once against the
+    bookings, so the cost is linear in blocks + bookings.
+    """
+    by_weekday = {}
+    for weekday, block_start, block_end in blocks:
+        by_weekday.setdefault(weekday, []).append((block_start, block_end))
+    length = timedelta(minutes=duration_minutes)
+    j = 0
+    day = start_date
+    while day <= end_date:
+        hours = [_day_span(day, s, e) for s, e in by_weekday.get(day.weekday(), [])]
+        for exc_start, exc_end, available in exceptions.get(day, []):
+            span = [_day_span(day, exc_start or time(), exc_end or time.max)]
+            hours = hours + span if available else _subtract(_merge(hours), span)
+        free = _merge(hours)
+        if not_before is not None:
+            free = _subtract(free, [(datetime.min, not_before)])
+        if free:
+            while j < len(bookings) and bookings[j][1] <= free[0][0]:
+                j += 1
+            day_end = free[-1][1]
+            busy = []
+            k = j
+            while k < len(bookings) and bookings[k][0] < day_end:
+                busy.append(bookings[k])
+                k += 1
+            for gap_start, gap_end in _subtract(free, _merge(busy)):
+                slot = gap_start
+                while slot + length <= gap_end:
+                    yield slot, slot + length
+                    slot += length
+        day += timedelta(days=1)
+
+
+def find_free_slots(doctors, start_date, end_date, duration_minutes=DEFAULT_DURATION, count=10, not_before=None):
+    """The ``count`` earliest free slots across ``doctors``.
+
+    ``doctors`` maps doctor_id -> {"blocks", "exceptions", "bookings"} as
+    taken by ``doctor_free_slots``. Each doctor's slots are generated lazily
+    and merged by start time, so only as many days are swept as are needed
+    to fill ``count`` slots, however many doctors there are.
+    """
+    def stream(doctor_id, info):
+        for start, end in doctor_free_slots(info["blocks"], info["exceptions"], info["bookings"],
+                                            start_date, end_date, duration_minutes, not_before):
+            yield start, end, doctor_id
+
+    streams = [stream(doctor_id, info) for doctor_id, info in doctors.items()]
+    return list(islice(heapq.merge(*streams), count))
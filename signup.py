@@ -1,13 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from widgets import TypeaheadCombobox
 
 class SignupPage:
     def __init__(self, root, app):
         self.root = root
         self.app = app
-        self.patient_map = {}
-        self.doctor_map = {}
-        self.staff_map = {}
         self.create_widgets()
     
     def create_widgets(self):
@@ -39,10 +37,12 @@ class SignupPage:
         role_combo.bind("<<ComboboxSelected>>", self.load_names)
 
         # Name dropdown
-        tk.Label(form_frame, text="Select Name:", font=('Arial', 12, 'bold'), bg='white').grid(row=1, column=0, sticky='w', pady=5)
+        tk.Label(form_frame, text="Type Your Name:", font=('Arial', 12, 'bold'), bg='white').grid(row=1, column=0, sticky='w', pady=5)
         self.name_var = tk.StringVar()
-        self.name_combo = ttk.Combobox(form_frame, textvariable=self.name_var, width=27, state="readonly", font=('Arial', 12))
+        self.name_combo = ttk.Combobox(form_frame, textvariable=self.name_var, width=27, font=('Arial', 12))
         self.name_combo.grid(row=1, column=1, pady=5, ipady=5)
+        self.name_picker = TypeaheadCombobox(self.name_combo, self.app.worker, self, self.app.db.lookup_patients,
+                                             on_error=lambda e: messagebox.showerror("Error", f"Failed to look up names: {e}"))
 
         # Username
         tk.Label(form_frame, text="Username:", font=('Arial', 12, 'bold'), bg='white').grid(row=2, column=0, sticky='w', pady=5)
@@ -83,19 +83,13 @@ class SignupPage:
         scrollbar.pack(side="right", fill="y")
 
     def load_names(self, event=None):
-        role = self.role_var.get()
-        if role == "Patient":
-            patients = self.app.db.get_all_patients()
-            self.patient_map = {f"{p['first_name']} {p['last_name']}": p['id'] for p in patients}
-            self.name_combo['values'] = list(self.patient_map.keys())
-        elif role == "Doctor":
-            doctors = self.app.db.get_all_doctors_for_signup()
-            self.doctor_map = {f"{d['first_name']} {d['last_name']}": d['id'] for d in doctors}
-            self.name_combo['values'] = list(self.doctor_map.keys())
-        elif role == "Staff":
-           staff = self.app.db.get_all_staff()  # ✅ fetch from DB
-           self.staff_map = {s['full_name']: s['id'] for s in staff}
-           self.name_combo['values'] = list(self.staff_map.keys())
+        """Point the name picker at the records of the selected role"""
+        lookups = {
+            "Patient": self.app.db.lookup_patients,
+            "Doctor": self.app.db.lookup_doctors,
+            "Staff": self.app.db.lookup_staff,
+        }
+        self.name_picker.set_lookup(lookups[self.role_var.get()])
 
     def handle_signup(self):
         role = self.role_var.get()
@@ -113,13 +107,7 @@ class SignupPage:
             messagebox.showerror("Error", "Passwords do not match")
             return
 
-        if role == "Patient":
-            linked_id = self.patient_map.get(name)
-        elif role == "Doctor":
-            linked_id = self.doctor_map.get(name)
-        else:
-            linked_id = self.staff_map.get(name)
-
+        linked_id = self.name_picker.get_id()
         if not linked_id:
             messagebox.showerror("Error", "Invalid selection")
             return
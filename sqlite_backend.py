@@ -0,0 +1,469 @@
+"""
+SQLite Backend
+The Database API on SQLite (a file or ":memory:") for tests and benchmarks
+"""
+import functools
+import re
+import sqlite3
+import threading
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from mysql.connector import errors
+from mysql.connector.errors import PoolError
+
+from db import ConnectionPool, Database
+from logs import get_logger
+from scheduling import DEFAULT_DURATION
+
+log = get_logger(__name__)
+
+
+# ---------- Types ----------
+# Columns come back as the same Python types mysql.connector returns
+# (TIME as timedelta, DECIMAL as Decimal). Converters are looked up by
+# declared column type and are registered process-wide by sqlite3.
+def _to_timedelta(value):
+    hours, minutes, seconds = value.decode().split(":")
+    return timedelta(hours=int(hours), minutes=int(minutes), seconds=float(seconds))
+
+
+# "9:30" or "09:30:00"; MySQL stores a TIME given either way as 09:30:00
+_TIME_TEXT = re.compile(r"(\d{1,2}):(\d{2})(?::(\d{2}))?")
+
+
+sqlite3.register_converter("DATE", lambda v: date.fromisoformat(v.decode()))
+sqlite3.register_converter("DATETIME", lambda v: datetime.fromisoformat(v.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda v: datetime.fromisoformat(v.decode()))
+sqlite3.register_converter("TIME", _to_timedelta)
+sqlite3.register_converter("DECIMAL", lambda v: Decimal(v.decode()))
+
+
+def _param(value):
+    """A query parameter as SQLite stores it (the text MySQL would accept)"""
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, str):
+        match = _TIME_TEXT.fullmatch(value)
+        if match:
+            hours, minutes, seconds = match.groups()
+            return f"{int(hours):02d}:{minutes}:{seconds or '00'}"
+    return value
+
+
+# ---------- MySQL functions ----------
+def _concat(*values):
+    if any(v is None for v in values):
+        return None
+    return "".join(str(v) for v in values)
+
+
+def _floor(value):
+    return None if value is None else int(value // 1)
+
+
+def _timestampdiff(unit, start, end):
+    if start is None or end is None:
+        return None
+    start, end = (datetime.fromisoformat(str(v)) for v in (start, end))
+    if unit == "YEAR":
+        return end.year - start.year - ((end.month, end.day, end.time()) < (start.month, start.day, start.time()))
+    seconds = (end - start).total_seconds()
+    return int(seconds // {"DAY": 86400, "HOUR": 3600, "MINUTE": 60, "SECOND": 1}[unit])
+
+
+_SOUNDEX_CODES = {c: str(d) for d, letters in enumerate(("bfpv", "cgjkqsxz", "dt", "l", "mn", "r"), start=1)
+                  for c in letters}
+
+
+def _soundex(text):
+    """MySQL-style SOUNDEX: first letter plus digit codes, at least four characters"""
+    if text is None:
+        return None
+    letters = [c for c in str(text).lower() if c.isalpha()]
+    if not letters:
+        return ""
+    code = letters[0].upper()
+    last = _SOUNDEX_CODES.get(letters[0])
+    for c in letters[1:]:
+        digit = _SOUNDEX_CODES.get(c)
+        if digit and digit != last:
+            code += digit
+        if c not in "hw":
+            last = digit
+    return code.ljust(4, "0")
+
+
+# ---------- SQL translation ----------
+# The Database methods are written for MySQL; these rewrites cover the
+# dialect they use. Anything else (information_schema, FULLTEXT, EXPLAIN)
+# is handled by overriding the method in SQLiteDatabase.
+_REWRITES = [
+    (re.compile(r"\s+FOR UPDATE\b"), ""),
+    (re.compile(r"TIMESTAMPDIFF\((\w+),"), r"TIMESTAMPDIFF('\1',"),
+    (re.compile(r"ON DUPLICATE KEY UPDATE"), "ON CONFLICT DO UPDATE SET"),
+    (re.compile(r"\bVALUES\((\w+)\)"), r"excluded.\1"),
+    # SQLite has no parenthesised UNION members; make each one a subquery
+    (re.compile(r"(^\s*|\bUNION(?: ALL)?\s+)\(SELECT\b"), r"\1SELECT * FROM (SELECT"),
+    (re.compile(r"\bLIKE \?"), r"LIKE ? ESCAPE '\\'"),
+    (re.compile(r"^\s*TRUNCATE TABLE\b"), "DELETE FROM"),
+    (re.compile(r"^\s*SET FOREIGN_KEY_CHECKS = 0\s*$"), "PRAGMA foreign_keys = OFF"),
+    (re.compile(r"^\s*SET FOREIGN_KEY_CHECKS = 1\s*$"), "PRAGMA foreign_keys = ON"),
+    (re.compile(r"^\s*START TRANSACTION WITH CONSISTENT SNAPSHOT\s*$"), "BEGIN"),
+    # SQLite transactions are serializable; there is no level to choose
+    (re.compile(r"^\s*SET TRANSACTION ISOLATION LEVEL .*$"), ""),
+]
+
+
+@functools.lru_cache(maxsize=512)
+def translate(query):
+    """Rewrite a MySQL query (with %s placeholders) for SQLite"""
+    query = re.sub(r"%(s|%)", lambda m: "?" if m.group(1) == "s" else "%", query)
+    for pattern, replacement in _REWRITES:
+        query = pattern.sub(replacement, query)
+    return query
+
+
+def _wrap_error(e):
+    """The mysql.connector error the Database methods already catch"""
+    if isinstance(e, sqlite3.IntegrityError):
+        return errors.IntegrityError(msg=str(e))
+    if isinstance(e, sqlite3.OperationalError):
+        return errors.OperationalError(msg=str(e))
+    return errors.DatabaseError(msg=str(e))
+
+
+class _Cursor:
+    """A sqlite3 cursor with the parts of the mysql.connector cursor API Database uses"""
+
+    def __init__(self, cursor, dictionary):
+        self._cursor = cursor
+        self.dictionary = dictionary
+
+    def execute(self, query, params=()):
+        query = translate(query)
+        if not query.strip():
+            return
+        try:
+            self._cursor.execute(query, [_param(p) for p in params])
+        except sqlite3.Error as e:
+            raise _wrap_error(e) from e
+
+    def executemany(self, query, seq_params):
+        try:
+            self._cursor.executemany(translate(query), ([_param(p) for p in params] for params in seq_params))
+        except sqlite3.Error as e:
+            raise _wrap_error(e) from e
+
+    def _row(self, row):
+        if row is None or not self.dictionary:
+            return row
+        return dict(zip((d[0] for d in self._cursor.description), row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+
+class _Connection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, dictionary=False, buffered=True):
+        return _Cursor(self._conn.cursor(), dictionary)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def is_connected(self):
+        return True
+
+
+class SQLitePool(ConnectionPool):
+    """One SQLite connection lent to one unit of work at a time.
+
+    Keeps ConnectionPool's interface (and its ``cursor()`` transaction
+    handling), so every Database method runs unchanged. SQLite allows one
+    writer at a time anyway; serialising on a lock also makes the MySQL
+    ``FOR UPDATE`` locking reads (which are dropped) unnecessary.
+    """
+
+    def __init__(self, path=":memory:", timeout=10, profiler=None):
+        conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False,
+                               detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.create_function("CONCAT", -1, _concat, deterministic=True)
+        conn.create_function("FLOOR", 1, _floor, deterministic=True)
+        conn.create_function("TIMESTAMPDIFF", 3, _timestampdiff, deterministic=True)
+        conn.create_function("SOUNDEX", 1, _soundex, deterministic=True)
+        conn.execute("PRAGMA foreign_keys = ON")
+        self.path = path
+        self.timeout = timeout
+        self.profiler = profiler
+        self._conn = _Connection(conn)
+        self._lock = threading.RLock()
+
+    def acquire(self):
+        if not self._lock.acquire(timeout=self.timeout):
+            raise PoolError(f"No database connection available after {self.timeout}s")
+        return self._conn
+
+    def release(self, conn):
+        self._lock.release()
+
+    def discard(self, conn):
+        # The only connection can't be replaced (":memory:" would lose its data); reset it instead
+        try:
+            conn.rollback()
+            conn._conn.execute("PRAGMA foreign_keys = ON")
+        finally:
+            self._lock.release()
+
+    def close_all(self):
+        with self._lock:
+            self._conn._conn.close()
+
+
+class SQLiteDatabase(Database):
+    """Database on SQLite: a file, or ``":memory:"`` for a throwaway database.
+
+    Runs every Database method through SQLitePool's MySQL-to-SQLite
+    translation. What SQLite cannot translate is overridden here: the
+    schema (created whole rather than migrated), column introspection,
+    query plans, and FULLTEXT search (prefix and SOUNDEX matching only).
+    """
+
+    # No FULLTEXT: every search takes the indexed prefix path
+    FULLTEXT_MIN_TOKEN = 10 ** 9
+
+    def __init__(self, path=":memory:"):
+        super().__init__()
+        self.path = path
+
+    def connect(self):
+        try:
+            self.pool = SQLitePool(self.path, profiler=self.profiler)
+            log.info("Opened SQLite database %s", self.path)
+        except sqlite3.Error as e:
+            log.error("Error opening SQLite database %s: %s", self.path, e)
+            return False
+        return True
+
+    SCHEMA = f"""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username VARCHAR(50) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            role TEXT NOT NULL CHECK (role IN ('Admin', 'Doctor', 'Nurse', 'Patient')),
+            full_name VARCHAR(100) NOT NULL,
+            email VARCHAR(100),
+            phone VARCHAR(20),
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+            is_active BOOLEAN NOT NULL DEFAULT 1,
+            last_login DATETIME NULL,
+            last_login_sort DATETIME GENERATED ALWAYS AS (COALESCE(last_login, '1000-01-01 00:00:00')) STORED
+        );
+
+        CREATE TABLE IF NOT EXISTS patients (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INT REFERENCES users(id),
+            patient_id VARCHAR(20) UNIQUE NOT NULL,
+            first_name VARCHAR(50) NOT NULL,
+            last_name VARCHAR(50) NOT NULL,
+            age INT,
+            date_of_birth DATE,
+            gender TEXT CHECK (gender IN ('Male', 'Female', 'Other')),
+            phone VARCHAR(20),
+            email VARCHAR(100),
+            address TEXT,
+            medical_history TEXT,
+            emergency_contact VARCHAR(100),
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+            updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+            first_name_soundex VARCHAR(32) GENERATED ALWAYS AS (SOUNDEX(first_name)) STORED,
+            last_name_soundex VARCHAR(32) GENERATED ALWAYS AS (SOUNDEX(last_name)) STORED
+        );
+
+        CREATE TABLE IF NOT EXISTS doctors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            first_name VARCHAR(100) NOT NULL,
+            last_name VARCHAR(100) NOT NULL,
+            specialization VARCHAR(100) NOT NULL,
+            phone VARCHAR(20) NOT NULL,
+            email VARCHAR(150) NOT NULL,
+            schedule TEXT,
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+            updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+            first_name_soundex VARCHAR(32) GENERATED ALWAYS AS (SOUNDEX(first_name)) STORED,
+            last_name_soundex VARCHAR(32) GENERATED ALWAYS AS (SOUNDEX(last_name)) STORED
+        );
+
+        CREATE TABLE IF NOT EXISTS staff (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            full_name VARCHAR(255) NOT NULL,
+            role VARCHAR(100) NOT NULL,
+            department VARCHAR(100),
+            phone VARCHAR(20),
+            email VARCHAR(150),
+            hire_date DATE,
+            salary DECIMAL(10,2),
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+            updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+        );
+
+        CREATE TABLE IF NOT EXISTS appointments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            patient_id INT NOT NULL REFERENCES patients(id),
+            doctor_id INT NOT NULL REFERENCES doctors(id),
+            appointment_date DATE NOT NULL,
+            appointment_time TIME NOT NULL,
+            duration_minutes INT NOT NULL DEFAULT {DEFAULT_DURATION},
+            status TEXT DEFAULT 'Scheduled' CHECK (status IN ('Scheduled', 'Confirmed', 'Completed', 'Cancelled')),
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+            updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+        );
+
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name VARCHAR(50) PRIMARY KEY,
+            value BIGINT NOT NULL DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS appointment_daily_counts (
+            appointment_date DATE PRIMARY KEY,
+            total INT NOT NULL DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name VARCHAR(30) NOT NULL,
+            row_id INT,
+            operation VARCHAR(10) NOT NULL,
+            changed_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+        );
+        CREATE INDEX IF NOT EXISTS idx_change_log_table_seq ON change_log (table_name, seq);
+        CREATE INDEX IF NOT EXISTS idx_change_log_changed_at ON change_log (changed_at);
+
+        CREATE TABLE IF NOT EXISTS doctor_availability (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            doctor_id INT NOT NULL REFERENCES doctors(id) ON DELETE CASCADE,
+            weekday TINYINT NOT NULL,
+            start_time TIME NOT NULL,
+            end_time TIME NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_availability_doctor_weekday ON doctor_availability (doctor_id, weekday);
+
+        CREATE TABLE IF NOT EXISTS doctor_availability_exceptions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            doctor_id INT NOT NULL REFERENCES doctors(id) ON DELETE CASCADE,
+            exception_date DATE NOT NULL,
+            start_time TIME NULL,
+            end_time TIME NULL,
+            available BOOLEAN NOT NULL DEFAULT 0,
+            reason VARCHAR(255)
+        );
+        CREATE INDEX IF NOT EXISTS idx_availability_exceptions_doctor_date
+            ON doctor_availability_exceptions (doctor_id, exception_date);
+
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            occurred_at TIMESTAMP NOT NULL,
+            username VARCHAR(50),
+            action VARCHAR(20) NOT NULL,
+            table_name VARCHAR(40),
+            row_id INT,
+            status VARCHAR(10) NOT NULL,
+            details VARCHAR(255)
+        );
+        CREATE INDEX IF NOT EXISTS idx_audit_log_username ON audit_log (username, id);
+        CREATE INDEX IF NOT EXISTS idx_audit_log_action ON audit_log (action, id);
+        CREATE INDEX IF NOT EXISTS idx_audit_log_table ON audit_log (table_name, id);
+    """
+
+    # MySQL's ON UPDATE CURRENT_TIMESTAMP
+    UPDATED_AT_TABLES = ("patients", "doctors", "staff", "appointments")
+
+    def create_tables(self):
+        try:
+            conn = self.pool.acquire()
+            try:
+                raw = conn._conn
+                raw.executescript(self.SCHEMA)
+                for table in self.UPDATED_AT_TABLES:
+                    raw.execute(f"""
+                        CREATE TRIGGER IF NOT EXISTS trg_{table}_updated_at AFTER UPDATE ON {table}
+                        BEGIN
+                            UPDATE {table} SET updated_at = datetime('now', 'localtime') WHERE id = NEW.id;
+                        END
+                    """)
+                for table, name, columns, kind in self.INDEXES:
+                    if kind == "INDEX":
+                        raw.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+                raw.commit()
+            finally:
+                self.pool.release(conn)
+            self.create_default_admin()
+            self.migrate_doctor_schedules()
+            self.reconcile_stats()
+            log.info("Database tables created successfully")
+        except sqlite3.Error as e:
+            log.error("Error creating tables: %s", e)
+
+    def _stored_columns(self, cursor, table):
+        # PRAGMA table_xinfo marks generated columns as hidden (2 = virtual, 3 = stored)
+        cursor.execute(f"PRAGMA table_xinfo({table})")
+        return [row[1] if isinstance(row, tuple) else row["name"] for row in cursor.fetchall()
+                if (row[6] if isinstance(row, tuple) else row["hidden"]) == 0]
+
+    def check_query_plans(self):
+        """EXPLAIN QUERY PLAN the appointment date queries; returns those that scan the table.
+
+        Index lookups show up as SEARCH; any SCAN of appointments, including
+        a full pass over a covering index, is reported. An empty dict means
+        every query uses an index range, as on MySQL.
+        """
+        today = date.today()
+        week_end = today + timedelta(days=7)
+        checks = {
+            "count_todays_appointments": (self.COUNT_APPOINTMENTS_BETWEEN_QUERY, (today, today)),
+            "get_doctor_schedule": (self.DOCTOR_SCHEDULE_QUERY, (1, today, week_end)),
+            "get_patient_appointments": (self.PATIENT_APPOINTMENTS_QUERY, (1, today, week_end)),
+            "_check_slot": (self.SLOT_CONFLICT_QUERY, (1, today, today, 0)),
+        }
+        full_scans = {}
+        with self.pool.cursor(label="check_query_plans") as cursor:
+            for name, (query, params) in checks.items():
+                cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+                for row in cursor.fetchall():
+                    if re.match(r"SCAN (a|appointments)\b", row["detail"]):
+                        full_scans[name] = row
+        return full_scans
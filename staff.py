@@ -1,5 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from widgets import LoadingOverlay, PagedTreeview, ImportDialog
+from importer import Importer
 
 class StaffPage:
     def __init__(self, root, app):
@@ -70,7 +72,12 @@ class StaffPage:
         delete_btn = tk.Button(buttons_frame, text="Delete Staff", font=('Arial', 12),
                               bg='#e74c3c', fg='white', relief='flat', cursor='hand2',
                               command=self.delete_staff)
-        delete_btn.pack(side='left', ipady=8, ipadx=15)
+        delete_btn.pack(side='left', padx=(0, 10), ipady=8, ipadx=15)
+        
+        import_btn = tk.Button(buttons_frame, text="Import...", font=('Arial', 12),
+                              bg='#8e44ad', fg='white', relief='flat', cursor='hand2',
+                              command=self.import_staff)
+        import_btn.pack(side='left', ipady=8, ipadx=15)
         
         # Table
         table_frame = tk.Frame(content_frame, bg='white', relief='raised', bd=1)
@@ -100,32 +107,50 @@ class StaffPage:
         self.staff_tree.pack(side='left', fill='both', expand=True)
         v_scrollbar.pack(side='right', fill='y')
         h_scrollbar.pack(side='bottom', fill='x')
+        self.loading = LoadingOverlay(tree_frame)
+        self.table = PagedTreeview(self.staff_tree, v_scrollbar, self.app.worker, self,
+                                   fetch_page=self.app.db.get_staff_page,
+                                   row_values=self.staff_values, indicator=self.loading,
+                                   fetch_watermark=self.app.db.get_change_watermark,
+                                   fetch_changes=self.app.db.get_staff_changes, descending=True,
+                                   on_error=lambda e: messagebox.showerror("Error", f"Failed to load staff: {str(e)}"))
         
         self.load_staff()
 
     def load_staff(self):
-        """Load staff from database"""
-        try:
-            staff_members = self.app.db.get_all_staff()
-            
-            # Clear existing data
-            for item in self.staff_tree.get_children():
-                self.staff_tree.delete(item)
-            
-            # Insert staff data
-            for staff in staff_members:
-                self.staff_tree.insert('', 'end', values=(
-                    staff.get('id', ''),
-                    staff.get('full_name', ''),
-                    staff.get('role', ''),
-                    staff.get('department', ''),
-                    staff.get('phone', ''),
-                    staff.get('email', ''),
-                    staff.get('hire_date', ''),
-                    staff.get('salary', '')
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load staff: {str(e)}")
+        """Load staff from database, one page at a time"""
+        self.table.reload()
+
+    def refresh_staff(self):
+        """Pick up changes after a save/delete without reloading the whole table"""
+        if self.search_entry.get().strip():
+            self.search_staff()
+        else:
+            self.table.sync()
+
+    def on_show(self):
+        """Called by the page manager when this cached page is shown again"""
+        self.refresh_staff()
+
+    def import_staff(self):
+        """Bulk import staff from a CSV/JSON file"""
+        ImportDialog(self.root, self.app.worker, self, "Import Staff",
+                     lambda path, progress, cancel: Importer(self.app.db, "staff", path,
+                                                             progress=progress, cancel_event=cancel),
+                     on_done=lambda _summary: self.refresh_staff())
+
+    def staff_values(self, staff):
+        """Treeview values for one staff row"""
+        return (
+            staff.get('id', ''),
+            staff.get('full_name', ''),
+            staff.get('role', ''),
+            staff.get('department', ''),
+            staff.get('phone', ''),
+            staff.get('email', ''),
+            staff.get('hire_date', ''),
+            staff.get('salary', '')
+        )
     
     def search_staff(self):
         """Search staff by name or role"""
@@ -134,27 +159,9 @@ class StaffPage:
             self.load_staff()
             return
         
-        try:
-            staff_members = self.app.db.search_staff(search_term)
-            
-            # Clear existing data
-            for item in self.staff_tree.get_children():
-                self.staff_tree.delete(item)
-            
-            # Insert search results
-            for staff in staff_members:
-                self.staff_tree.insert('', 'end', values=(
-                    staff.get('id', ''),
-                    staff.get('full_name', ''),
-                    staff.get('role', ''),
-                    staff.get('department', ''),
-                    staff.get('phone', ''),
-                    staff.get('email', ''),
-                    staff.get('hire_date', ''),
-                    staff.get('salary', '')
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Search failed: {str(e)}")
+        self.app.worker.submit(self.app.db.search_staff, search_term, owner=self, indicator=self.loading,
+                               on_success=self.table.show_rows,
+                               on_error=lambda e: messagebox.showerror("Error", f"Search failed: {str(e)}"))
     
     def add_staff(self):
         """Add new staff member"""
@@ -179,12 +186,10 @@ class StaffPage:
         
         staff_data = self.staff_tree.item(selected[0])['values']
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete staff member '{staff_data[1]}'?"):
-            try:
-                self.app.db.delete_staff(staff_data[0])
-                messagebox.showinfo("Success", "Staff member deleted successfully")
-                self.load_staff()
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to delete staff member: {str(e)}")
+            self.app.worker.submit(self.app.db.delete_staff, staff_data[0], owner=self, indicator=self.loading,
+                                   on_success=lambda success: self.on_staff_saved(None, success, "Staff member deleted successfully",
+                                                                                  "Failed to delete staff member"),
+                                   on_error=lambda e: messagebox.showerror("Error", f"Failed to delete staff member: {str(e)}"))
     
     def staff_form_window(self, title, staff_data=None):
         """Scrollable form window for staff"""
@@ -252,14 +257,24 @@ class StaffPage:
             # Save to database
             if staff_data:  # Edit existing
                 data['id'] = staff_data[0]
-                self.app.db.update_staff(data)
-                messagebox.showinfo("Success", "Staff member updated successfully")
+                save, message = self.app.db.update_staff, "Staff member updated successfully"
             else:  # Add new
-                self.app.db.add_staff(data)
-                messagebox.showinfo("Success", "Staff member added successfully")
+                save, message = self.app.db.add_staff, "Staff member added successfully"
             
-            window.destroy()
-            self.load_staff()
+            self.app.worker.submit(save, data, owner=self, indicator=self.loading,
+                                   on_success=lambda success: self.on_staff_saved(window, success, message,
+                                                                                  "Failed to save staff member"),
+                                   on_error=lambda e: messagebox.showerror("Error", f"Failed to save staff member: {str(e)}"))
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save staff member: {str(e)}")
+
+    def on_staff_saved(self, window, success, message, failure):
+        """Report a completed write and reload the table; on failure the form stays open to retry"""
+        if not success:
+            messagebox.showerror("Error", failure)
+            return
+        messagebox.showinfo("Success", message)
+        if window is not None:
+            window.destroy()
+        self.refresh_staff()
@@ -0,0 +1,21 @@
+"""
+Test Fixtures
+Puts the application modules on sys.path and opens a throwaway SQLite database
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def sqlite_db():
+    """A fresh in-memory SQLiteDatabase with the full schema"""
+    from sqlite_backend import SQLiteDatabase
+    db = SQLiteDatabase(":memory:")
+    assert db.connect()
+    db.create_tables()
+    yield db
+    db.close()
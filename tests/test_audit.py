@@ -0,0 +1,37 @@
+"""
+Audit Log Tests
+Write methods leave events naming the row they touched
+"""
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("mysql.connector")  # db.py needs the driver's error classes even for SQLite
+
+
+def audit_events(db, action):
+    db.audit.close()  # write the pending audit batch
+    return {row["table_name"]: row for row in db.get_audit_log_page(action=action)}
+
+
+def test_add_events_record_the_new_id(sqlite_db):
+    db = sqlite_db
+    patient_id = db.add_patient({"patient_id": "P1", "first_name": "Ana", "last_name": "Lee",
+                                 "date_of_birth": "1990-01-01", "gender": "Other"})
+    doctor_id = db.add_doctor({"first_name": "Dana", "last_name": "Ray", "specialization": "ENT",
+                               "phone": "555-0100", "email": "dana.ray@example.com"})
+    appointment_id = db.add_appointment(patient_id, doctor_id, date.today() + timedelta(days=1), "10:00")
+    assert patient_id and doctor_id and appointment_id
+    events = audit_events(db, "add")
+    assert events["patients"]["row_id"] == patient_id
+    assert events["doctors"]["row_id"] == doctor_id
+    assert events["appointments"]["row_id"] == appointment_id
+    assert events["appointments"]["status"] == "ok"
+
+
+def test_delete_events_record_the_argument_id(sqlite_db):
+    db = sqlite_db
+    doctor_id = db.add_doctor({"first_name": "Dana", "last_name": "Ray", "specialization": "ENT",
+                               "phone": "555-0100", "email": "dana.ray@example.com"})
+    assert db.delete_doctor(doctor_id)
+    assert audit_events(db, "delete")["doctors"]["row_id"] == doctor_id
@@ -0,0 +1,39 @@
+"""
+Query Cache Tests
+A load that races an invalidation is returned but not cached
+"""
+from cache import QueryCache
+
+
+def test_table_invalidation_during_load_is_not_cached():
+    cache = QueryCache()
+
+    def loader():
+        cache.invalidate("doctors")
+        return "stale"
+
+    assert cache.get("key", loader, ("doctors",)) == "stale"
+    assert cache.get("key", lambda: "fresh", ("doctors",)) == "fresh"
+    assert cache.get("key", lambda: "reloaded", ("doctors",)) == "fresh"
+
+
+def test_full_invalidation_during_load_is_not_cached():
+    cache = QueryCache()
+
+    def loader():
+        cache.invalidate()
+        return "stale"
+
+    assert cache.get("key", loader, ("doctors",)) == "stale"
+    assert cache.get("key", lambda: "fresh", ("doctors",)) == "fresh"
+
+
+def test_other_tables_keep_their_entries():
+    cache = QueryCache()
+    cache.get("doctors", lambda: 1, ("doctors",))
+    cache.get("staff", lambda: 2, ("staff",))
+    cache.invalidate("doctors")
+    assert cache.get("doctors", lambda: 10, ("doctors",)) == 10
+    assert cache.get("staff", lambda: 20, ("staff",)) == 2
+    cache.invalidate()
+    assert cache.get("staff", lambda: 20, ("staff",)) == 20
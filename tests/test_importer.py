@@ -0,0 +1,61 @@
+"""
+Importer Tests
+Bad rows and lines are rejected to the side file while the rest of the file goes in
+"""
+import csv
+
+import pytest
+
+pytest.importorskip("mysql.connector")  # importer.py needs the driver's error classes
+
+from importer import Importer  # noqa: E402
+
+HEADER = "patient_id,first_name,last_name,date_of_birth,gender\n"
+
+
+def rejected_lines(result):
+    with open(result["rejected_path"], newline="", encoding="utf-8") as f:
+        return {int(row["line"]): row["error"] for row in csv.DictReader(f)}
+
+
+def patient_codes(db):
+    return sorted(row["patient_id"] for row in db.get_all_patients())
+
+
+def test_csv_rejects_invalid_rows(sqlite_db, tmp_path):
+    path = tmp_path / "patients.csv"
+    path.write_text(HEADER
+                    + "P1,Ana,Lee,1990-01-01,F\n"
+                    + "P2,,Lee,1990-01-01,F\n"  # no first name
+                    + "P3,Cal,Lee,1990-01-01,robot\n"
+                    + "P4,Dee,Lee,01/02/1991,Other\n", encoding="utf-8")
+    result = Importer(sqlite_db, "patients", str(path)).run()
+    assert (result["imported"], result["rejected"]) == (2, 2)
+    assert sorted(rejected_lines(result)) == [3, 4]
+    assert patient_codes(sqlite_db) == ["P1", "P4"]
+
+
+def test_jsonl_rejects_malformed_lines(sqlite_db, tmp_path):
+    path = tmp_path / "patients.jsonl"
+    path.write_text('{"patient_id": "P1", "first_name": "Ana", "last_name": "Lee"}\n'
+                    '{"patient_id": "P2", "first_name": "Ben", \n'
+                    '\n'
+                    '["not", "an", "object"]\n'
+                    '{"patient_id": "P3", "first_name": "Cal", "last_name": "Lee"}\n', encoding="utf-8")
+    result = Importer(sqlite_db, "patients", str(path)).run()
+    assert (result["imported"], result["rejected"]) == (2, 2)
+    errors = rejected_lines(result)
+    assert sorted(errors) == [2, 4]
+    assert errors[2].startswith("not valid JSON")
+    assert patient_codes(sqlite_db) == ["P1", "P3"]
+
+
+def test_duplicate_retries_the_batch_row_by_row(sqlite_db, tmp_path):
+    assert sqlite_db.add_patient({"patient_id": "P2", "first_name": "Old", "last_name": "Lee",
+                                  "date_of_birth": "1980-01-01", "gender": "Other"})
+    path = tmp_path / "patients.csv"
+    path.write_text(HEADER + "".join(f"P{n},Pat{n},Lee,1990-01-01,Other\n" for n in range(1, 6)), encoding="utf-8")
+    result = Importer(sqlite_db, "patients", str(path), batch_size=3).run()
+    assert (result["imported"], result["rejected"]) == (4, 1)
+    assert list(rejected_lines(result)) == [3]
+    assert patient_codes(sqlite_db) == ["P1", "P2", "P3", "P4", "P5"]
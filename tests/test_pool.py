@@ -0,0 +1,67 @@
+"""
+Connection Pool Tests
+Slot accounting when idle connections are found dead and reopened
+"""
+import pytest
+
+pytest.importorskip("mysql.connector")  # db.py needs the driver's error classes
+
+from mysql.connector import Error  # noqa: E402
+from mysql.connector.errors import PoolError  # noqa: E402
+
+from db import ConnectionPool  # noqa: E402
+
+
+class FakeConnection:
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.closed = False
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        if not self.alive:
+            raise Error("server has gone away")
+
+    def close(self):
+        self.closed = True
+
+
+class FakePool(ConnectionPool):
+    def __init__(self, size, fail_open=False):
+        super().__init__({}, size=size, timeout=0.01, health_check_interval=0)
+        self.fail_open = fail_open
+        self.opened = []
+
+    def _open(self):
+        if self.fail_open:
+            raise Error("cannot connect")
+        conn = FakeConnection()
+        self.opened.append(conn)
+        return conn
+
+
+def test_dead_connection_is_reopened_in_its_own_slot():
+    pool = FakePool(size=1)
+    conn = pool.acquire()
+    conn.alive = False
+    pool.release(conn)
+    fresh = pool.acquire()
+    assert fresh is not conn and conn.closed
+    assert pool._created == 1
+    # The pool is full: nobody else may open a second connection
+    with pytest.raises(PoolError):
+        pool.acquire()
+    assert len(pool.opened) == 2
+
+
+def test_failed_reopen_frees_the_slot():
+    pool = FakePool(size=1)
+    conn = pool.acquire()
+    conn.alive = False
+    pool.release(conn)
+    pool.fail_open = True
+    with pytest.raises(Error):
+        pool.acquire()
+    assert pool._created == 0
+    pool.fail_open = False
+    assert pool.acquire() is pool.opened[-1]
+    assert pool._created == 1
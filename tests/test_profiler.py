@@ -0,0 +1,43 @@
+"""
+Query Profiler Tests
+Profiling is opt-in and charges each query to the Database method that labelled it
+"""
+import pytest
+
+pytest.importorskip("mysql.connector")  # db.py needs the driver's error classes even for SQLite
+
+from profiler import TimedCursor  # noqa: E402
+
+
+def add_patients(db, count):
+    for n in range(count):
+        assert db.add_patient({"patient_id": f"P{n}", "first_name": f"Pat{n}", "last_name": "Lee",
+                               "date_of_birth": "1990-01-01", "gender": "Other"})
+
+
+def test_off_by_default(sqlite_db):
+    assert sqlite_db.profiler.enabled is False
+    with sqlite_db.pool.cursor() as cursor:
+        assert not isinstance(cursor, TimedCursor)
+    sqlite_db.get_all_patients()
+    assert sqlite_db.profiler.snapshot() == {}
+
+
+def test_queries_are_charged_to_the_labelled_method(sqlite_db):
+    add_patients(sqlite_db, 3)
+    sqlite_db.profiler.enabled = True
+    sqlite_db.get_all_patients()
+    sqlite_db.get_patients_page(limit=2)
+    methods = sqlite_db.profiler.snapshot()
+    assert methods["get_all_patients"]["rows"] == 3
+    assert methods["get_all_patients"]["bytes"] > 0
+    assert methods["get_patients_page"]["rows"] == 2
+    assert "_keyset_page" not in methods
+
+
+def test_unbuffered_cursors_count_rows_but_not_bytes(sqlite_db):
+    add_patients(sqlite_db, 3)
+    sqlite_db.profiler.enabled = True
+    assert sum(len(chunk) for chunk in sqlite_db.stream_export("patients", chunk_size=2)) == 3
+    stats = sqlite_db.profiler.snapshot()["stream_export"]
+    assert (stats["rows"], stats["bytes"]) == (3, 0)
@@ -0,0 +1,77 @@
+"""
+Query Plan Tests
+The appointment date queries must stay on their indexes (Database.check_query_plans)
+"""
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("mysql.connector")  # db.py needs the driver's error classes even for SQLite
+
+from db import Database  # noqa: E402
+
+
+@pytest.fixture
+def mysql_db():
+    db = Database()
+    if not db.connect():
+        pytest.skip("MySQL server not available")
+    db.create_tables()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def booked_db(sqlite_db):
+    """Two patients and one doctor with appointments yesterday, today, in 3 days and in 10 days"""
+    db = sqlite_db
+    for code, first in (("P1", "Ann"), ("P2", "Ben")):
+        assert db.add_patient({"patient_id": code, "first_name": first, "last_name": "Lee",
+                               "date_of_birth": "1990-01-01", "gender": "Other"})
+    doctor_id = db.add_doctor({"first_name": "Dana", "last_name": "Ray", "specialization": "ENT",
+                               "phone": "555-0100", "email": "dana.ray@example.com"})
+    patient_ids = [row["id"] for row in db.get_all_patients()]
+    today = date.today()
+    for offset, patient_id in ((-1, patient_ids[0]), (0, patient_ids[0]), (3, patient_ids[1]),
+                               (10, patient_ids[0])):
+        assert db.add_appointment(patient_id, doctor_id, today + timedelta(days=offset), "10:00")
+    db.today, db.doctor_id, db.patient_ids = today, doctor_id, patient_ids
+    return db
+
+
+def test_mysql_query_plans_use_indexes(mysql_db):
+    assert mysql_db.check_query_plans() == {}
+
+
+def test_sqlite_query_plans_use_indexes(sqlite_db):
+    assert sqlite_db.check_query_plans() == {}
+
+
+def test_check_query_plans_reports_full_scans(sqlite_db):
+    with sqlite_db.pool.cursor() as cursor:
+        cursor.execute("DROP INDEX idx_appointments_date_time")
+    assert "count_todays_appointments" in sqlite_db.check_query_plans()
+
+
+def test_count_appointments_between_bounds(booked_db):
+    today = booked_db.today
+    assert booked_db.count_appointments_between(today, today) == 1
+    assert booked_db.count_appointments_between(today - timedelta(days=1), today + timedelta(days=3)) == 3
+    assert booked_db.count_appointments_between(today + timedelta(days=4), today + timedelta(days=9)) == 0
+    assert booked_db.count_todays_appointments() == 1
+
+
+def test_doctor_schedule_bounds(booked_db):
+    today = booked_db.today
+    week = booked_db.get_doctor_schedule(booked_db.doctor_id, today, today + timedelta(days=7))
+    assert [row["appointment_date"] for row in week] == [today, today + timedelta(days=3)]
+    assert len(booked_db.get_doctor_schedule(booked_db.doctor_id)) == 4
+
+
+def test_patient_appointments_bounds(booked_db):
+    today = booked_db.today
+    patient_id = booked_db.patient_ids[0]
+    rows = booked_db.get_patient_appointments(patient_id, today, today + timedelta(days=10))
+    assert [row["appointment_date"] for row in rows] == [str(today), str(today + timedelta(days=10))]
+    assert len(booked_db.get_patient_appointments(patient_id)) == 3
+    assert booked_db.get_patient_appointments(patient_id, today + timedelta(days=1), today + timedelta(days=9)) == []
@@ -0,0 +1,53 @@
+"""
+Report Cache Tests
+ReportEngine reuses its files until a table the reports read changes
+"""
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("mysql.connector")  # db.py needs the driver's error classes even for SQLite
+
+from reports import ReportEngine  # noqa: E402
+
+
+@pytest.fixture
+def engine(sqlite_db, tmp_path):
+    return ReportEngine(sqlite_db, directory=str(tmp_path))
+
+
+def generate(engine):
+    today = date.today()
+    return engine.generate(today - timedelta(days=30), today)
+
+
+def test_repeat_run_is_cached(engine):
+    assert generate(engine)["cached"] is False
+    assert generate(engine)["cached"] is True
+
+
+def test_logins_and_audit_events_keep_the_cache(engine):
+    db = engine.db
+    generate(engine)
+    watermark = db.get_change_watermark()
+    assert db.authenticate_user("admin", "admin123")
+    assert db.authenticate_user("admin", "wrong") is None
+    db.audit.close()  # write the pending audit batch
+    assert db.get_audit_watermark() > 0
+    assert db.get_change_watermark() == watermark
+    assert generate(engine)["cached"] is True
+
+
+def test_changes_outside_report_tables_keep_the_cache(engine):
+    db = engine.db
+    generate(engine)
+    assert db.create_user(None, "Admin", "second_admin", "secret")
+    assert generate(engine)["cached"] is True
+
+
+def test_report_table_change_rebuilds(engine):
+    db = engine.db
+    generate(engine)
+    assert db.add_patient({"patient_id": "P1", "first_name": "Ann", "last_name": "Lee",
+                           "date_of_birth": "1990-01-01", "gender": "Other"})
+    assert generate(engine)["cached"] is False
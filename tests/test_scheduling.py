@@ -0,0 +1,64 @@
+"""
+Scheduling Tests
+Overlapping bookings for a doctor are refused; back-to-back slots are not
+"""
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("mysql.connector")  # db.py needs the driver's error classes even for SQLite
+
+from scheduling import AppointmentConflictError  # noqa: E402
+
+
+@pytest.fixture
+def clinic(sqlite_db):
+    db = sqlite_db
+    for code, first in (("P1", "Ana"), ("P2", "Ben")):
+        assert db.add_patient({"patient_id": code, "first_name": first, "last_name": "Lee",
+                               "date_of_birth": "1990-01-01", "gender": "Other"})
+    db.doctor_id = db.add_doctor({"first_name": "Dana", "last_name": "Ray", "specialization": "ENT",
+                                  "phone": "555-0100", "email": "dana.ray@example.com"})
+    db.patient_ids = [row["id"] for row in db.get_all_patients()]
+    db.day = date.today() + timedelta(days=1)
+    return db
+
+
+def test_overlapping_add_is_refused(clinic):
+    first, second = clinic.patient_ids
+    assert clinic.add_appointment(first, clinic.doctor_id, clinic.day, "10:00", duration_minutes=30)
+    with pytest.raises(AppointmentConflictError):
+        clinic.add_appointment(second, clinic.doctor_id, clinic.day, "10:15", duration_minutes=30)
+    assert len(clinic.get_all_appointments()) == 1
+
+
+def test_back_to_back_slots_are_accepted(clinic):
+    first, second = clinic.patient_ids
+    assert clinic.add_appointment(first, clinic.doctor_id, clinic.day, "10:00", duration_minutes=30)
+    assert clinic.add_appointment(second, clinic.doctor_id, clinic.day, "10:30", duration_minutes=30)
+    assert clinic.add_appointment(second, clinic.doctor_id, clinic.day, "09:30", duration_minutes=30)
+    assert len(clinic.get_all_appointments()) == 3
+
+
+def test_cancelled_booking_frees_the_slot(clinic):
+    first, second = clinic.patient_ids
+    assert clinic.add_appointment(first, clinic.doctor_id, clinic.day, "10:00", duration_minutes=30)
+    assert clinic.update_appointment_status(clinic.get_all_appointments()[0]["id"], "Cancelled")
+    assert clinic.add_appointment(second, clinic.doctor_id, clinic.day, "10:00", duration_minutes=30)
+
+
+def test_update_into_a_taken_slot_is_refused(clinic):
+    first, second = clinic.patient_ids
+    assert clinic.add_appointment(first, clinic.doctor_id, clinic.day, "10:00", duration_minutes=30)
+    assert clinic.add_appointment(second, clinic.doctor_id, clinic.day, "11:00", duration_minutes=30)
+    moving = clinic.get_all_appointments()[1]
+    data = {"id": moving["id"], "patient_id": second, "doctor_id": clinic.doctor_id,
+            "appointment_date": clinic.day, "appointment_time": "10:20", "duration_minutes": 30,
+            "status": "Scheduled", "notes": ""}
+    with pytest.raises(AppointmentConflictError):
+        clinic.update_appointment(data)
+    data["appointment_time"] = "10:30"  # right after the first booking
+    assert clinic.update_appointment(data)
+    # Rescheduling onto itself doesn't conflict with its own old slot
+    data["duration_minutes"] = 45
+    assert clinic.update_appointment(data)
@@ -0,0 +1,652 @@
+"""
+Shared Widgets
+Reusable Tkinter components used across pages
+"""
+import threading
+from datetime import datetime
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+
+class LoadingOverlay:
+    """A "Loading..." badge laid over a widget while background work runs."""
+
+    def __init__(self, parent, text="Loading..."):
+        self.label = tk.Label(parent, text=text, font=('Arial', 12, 'italic'),
+                              bg='#fff3cd', fg='#856404', relief='solid', bd=1,
+                              padx=12, pady=6)
+        self._pending = 0
+
+    def show(self):
+        self._pending += 1
+        if self.label.winfo_exists():
+            self.label.place(relx=0.5, rely=0.5, anchor='center')
+            self.label.lift()
+
+    def hide(self):
+        self._pending = max(0, self._pending - 1)
+        if self._pending == 0 and self.label.winfo_exists():
+            self.label.place_forget()
+
+
+class RefreshScheduler:
+    """Calls ``callback`` every ``interval`` ms while ``widget`` is on screen.
+
+    One timer per scheduler: ``start()`` (re)starts it with an immediate
+    call, ``stop()`` cancels it, and it stops by itself once ``widget`` is
+    destroyed. While the widget is not viewable (its page is hidden or the
+    window minimized) nothing is called; a cheap once-a-second check
+    resumes the refreshes when it is back on screen. Once the user has been idle for ``idle_after``
+    ms the interval doubles on each tick, up to ``max_interval``, and drops
+    back to ``interval`` with the first tick after they return.
+    """
+
+    def __init__(self, widget, callback, interval=5000, idle_after=60000, max_interval=60000):
+        self.widget = widget
+        self.callback = callback
+        self.interval = interval
+        self.idle_after = idle_after
+        self.max_interval = max_interval
+        self._delay = interval
+        self._after_id = None
+        self._pointer = None
+        self._pointer_since = 0
+
+    @property
+    def running(self):
+        return self._after_id is not None
+
+    def start(self):
+        self.stop()
+        self._delay = self.interval
+        self._tick()
+
+    def stop(self):
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
+
+    def _idle_ms(self):
+        """Milliseconds since the user last touched the app (pointer only where Tk can't tell)"""
+        idle = int(self.widget.tk.call('tk', 'inactive'))
+        if idle >= 0:
+            return idle
+        now = int(self.widget.tk.call('clock', 'milliseconds'))
+        pointer = self.widget.winfo_pointerxy()
+        if pointer != self._pointer:
+            self._pointer, self._pointer_since = pointer, now
+        return now - self._pointer_since
+
+    def _tick(self):
+        self._after_id = None
+        if not self.widget.winfo_exists():
+            return
+        if not self.widget.winfo_viewable():
+            self._delay = self.interval  # refresh as soon as it is visible again
+            self._after_id = self.widget.after(min(self.interval, 1000), self._tick)
+            return
+        self.callback()
+        if self._idle_ms() >= self.idle_after:
+            self._delay = min(self._delay * 2, self.max_interval)
+        else:
+            self._delay = self.interval
+        self._after_id = self.widget.after(self._delay, self._tick)
+
+
+class PagedTreeview:
+    """Keyset-paginated rows for a ttk.Treeview.
+
+    Pages are fetched in the background with
+    ``fetch_page(after_key=..., before_key=..., limit=...)`` as the user
+    scrolls towards either edge. At most ``max_pages`` pages stay in the tree;
+    pages that scroll far out of view are dropped and fetched again when the
+    user scrolls back, so memory stays flat however large the table is.
+
+    With ``fetch_watermark``/``fetch_changes`` (see ``Database._changes``),
+    ``sync()`` patches only the rows changed since the last load instead of
+    reloading. ``descending`` tells it where new rows belong.
+    """
+
+    def __init__(self, tree, scrollbar, worker, owner, fetch_page, row_values,
+                 row_key=lambda row: row['id'], row_iid=lambda row: str(row['id']),
+                 indicator=None, page_size=100, max_pages=3, on_error=None,
+                 fetch_watermark=None, fetch_changes=None, descending=False):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.worker = worker
+        self.owner = owner
+        self.fetch_page = fetch_page
+        self.row_values = row_values
+        self.row_key = row_key
+        self.row_iid = row_iid
+        self.indicator = indicator
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.on_error = on_error
+        self.fetch_watermark = fetch_watermark
+        self.fetch_changes = fetch_changes
+        self.descending = descending
+        self.watermark = None
+        self.rows = {}  # iid -> row dict for every row currently in the tree
+        self.pages = []  # [(first_key, last_key, [iids])] in display order
+        self.more_after = False
+        self.more_before = False
+        self.paging = True
+        self._loading = False
+        self._generation = 0
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+    # ---------- Public API ----------
+    def reload(self):
+        """Drop every row and fetch the first page again"""
+        self._reset()
+        self.paging = True
+        self._fetch(after_key=None, before_key=None)
+
+    def sync(self):
+        """Patch rows changed since the last load in place (falls back to reload)"""
+        if not self.paging or self.fetch_changes is None or self.watermark is None:
+            self.reload()
+            return
+        generation = self._generation
+        self.worker.submit(self.fetch_changes, self.watermark, owner=self.owner,
+                           on_success=lambda changes: self._apply_changes(generation, changes),
+                           on_error=lambda e: self._on_fetch_error(generation, e))
+
+    def row(self, iid):
+        """The row dict behind a tree item (e.g. the current selection), or None"""
+        return self.rows.get(iid)
+
+    def show_rows(self, rows):
+        """Show a fixed result set (e.g. search results) with paging turned off"""
+        self._reset()
+        self.paging = False
+        iids = self._insert_rows(rows, 'end')
+        if rows:
+            self.pages.append((self.row_key(rows[0]), self.row_key(rows[-1]), iids))
+
+    # ---------- Internals ----------
+    def _reset(self):
+        self._generation += 1
+        self._loading = False
+        self.tree.delete(*self.tree.get_children())
+        self.watermark = None
+        self.rows = {}
+        self.pages = []
+        self.more_after = False
+        self.more_before = False
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if not self.paging or self._loading:
+            return
+        if float(last) >= 0.9 and self.more_after:
+            self._fetch(after_key=self.pages[-1][1], before_key=None)
+        elif float(first) <= 0.1 and self.more_before:
+            self._fetch(after_key=None, before_key=self.pages[0][0])
+
+    def _fetch(self, after_key, before_key):
+        self._loading = True
+        generation = self._generation
+        first_load = after_key is None and before_key is None and self.fetch_watermark is not None
+
+        def load():
+            # Read the watermark before the rows so no change can slip between them
+            watermark = self.fetch_watermark() if first_load else None
+            return watermark, self.fetch_page(after_key=after_key, before_key=before_key, limit=self.page_size)
+
+        self.worker.submit(load, owner=self.owner, indicator=self.indicator,
+                           on_success=lambda result: self._on_page(generation, result, before_key is not None),
+                           on_error=lambda e: self._on_fetch_error(generation, e))
+
+    def _on_fetch_error(self, generation, error):
+        if generation != self._generation:
+            return
+        self._loading = False
+        if self.on_error:
+            self.on_error(error)
+
+    def _on_page(self, generation, result, backwards):
+        if generation != self._generation or not self.tree.winfo_exists():
+            return
+        watermark, rows = result
+        if watermark is not None:
+            self.watermark = watermark
+        self._loading = False
+        full = len(rows) >= self.page_size
+        if backwards:
+            self.more_before = full
+        else:
+            self.more_after = full
+        if not rows:
+            return
+        anchor = self._top_visible()
+        if backwards:
+            iids = self._insert_rows(rows, 0)
+            self.pages.insert(0, (self.row_key(rows[0]), self.row_key(rows[-1]), iids))
+            if len(self.pages) > self.max_pages:
+                self._drop_page(-1)
+                self.more_after = True
+        else:
+            iids = self._insert_rows(rows, 'end')
+            self.pages.append((self.row_key(rows[0]), self.row_key(rows[-1]), iids))
+            if len(self.pages) > self.max_pages:
+                self._drop_page(0)
+                self.more_before = True
+        self._restore_top(anchor)
+
+    def _insert_rows(self, rows, index):
+        iids = []
+        position = index
+        for row in rows:
+            iid = self.row_iid(row)
+            if self.tree.exists(iid):
+                continue
+            self.tree.insert('', position, iid=iid, values=self.row_values(row))
+            self.rows[iid] = row
+            iids.append(iid)
+            if position != 'end':
+                position += 1
+        return iids
+
+    def _drop_page(self, index):
+        _first, _last, iids = self.pages.pop(index)
+        existing = [iid for iid in iids if self.tree.exists(iid)]
+        if existing:
+            self.tree.delete(*existing)
+        for iid in iids:
+            self.rows.pop(iid, None)
+
+    def _apply_changes(self, generation, changes):
+        if generation != self._generation or not self.tree.winfo_exists():
+            return
+        if changes["reload"]:
+            self.reload()
+            return
+        self.watermark = changes["watermark"]
+        for row_id in changes["deleted"]:
+            iid = str(row_id)
+            if self.tree.exists(iid):
+                self.tree.delete(iid)
+            self.rows.pop(iid, None)
+            for _first, _last, iids in self.pages:
+                if iid in iids:
+                    iids.remove(iid)
+        for row in changes["rows"]:
+            iid = self.row_iid(row)
+            key = self.row_key(row)
+            if iid in self.rows and self.row_key(self.rows[iid]) == key:
+                self.tree.item(iid, values=self.row_values(row))
+                self.rows[iid] = row
+                continue
+            if self.tree.exists(iid):
+                # Sort key changed (e.g. appointment moved): re-place the row
+                self.tree.delete(iid)
+                self.rows.pop(iid, None)
+                for _first, _last, iids in self.pages:
+                    if iid in iids:
+                        iids.remove(iid)
+            if self._in_window(key):
+                self._insert_sorted(iid, key, row)
+
+    def _before(self, a, b):
+        """True when key ``a`` is displayed above key ``b``"""
+        return a > b if self.descending else a < b
+
+    def _in_window(self, key):
+        # Rows outside the loaded pages are picked up when the user scrolls to them
+        if not self.pages:
+            return not self.more_before and not self.more_after
+        if self.more_before and self._before(key, self.pages[0][0]):
+            return False
+        if self.more_after and self._before(self.pages[-1][1], key):
+            return False
+        return True
+
+    def _insert_sorted(self, iid, key, row):
+        children = self.tree.get_children()
+        index = len(children)
+        for i, child in enumerate(children):
+            if child in self.rows and self._before(key, self.row_key(self.rows[child])):
+                index = i
+                break
+        self.tree.insert('', index, iid=iid, values=self.row_values(row))
+        self.rows[iid] = row
+        if not self.pages:
+            self.pages.append((key, key, [iid]))
+            return
+        # Attach the row to the page of the row it was placed above, so it is
+        # dropped and refetched together with its neighbours
+        neighbour = children[index] if index < len(children) else None
+        for _first, _last, iids in self.pages:
+            if neighbour in iids:
+                iids.append(iid)
+                return
+        self.pages[-1][2].append(iid)
+
+    def _top_visible(self):
+        children = self.tree.get_children()
+        if not children:
+            return None
+        first = float(self.tree.yview()[0])
+        return children[min(int(first * len(children)), len(children) - 1)]
+
+    def _restore_top(self, anchor):
+        # Keep the row the user was looking at in place after rows were added or dropped above it
+        if anchor is None or not self.tree.exists(anchor):
+            return
+        children = self.tree.get_children()
+        self.tree.yview_moveto(self.tree.index(anchor) / max(len(children), 1))
+
+
+class TypeaheadCombobox:
+    """Autocomplete picker on top of an editable ttk.Combobox.
+
+    ``delay`` ms after the last keystroke the typed text is looked up in the
+    background with ``lookup(text)`` (rows with "id" and "label"), and the
+    matches replace the dropdown values; a reply to an older keystroke is
+    dropped. Choices read "id - label" so people with the same name can be
+    told apart.
+    """
+
+    IGNORED_KEYS = ('Up', 'Down', 'Left', 'Right', 'Return', 'Escape', 'Tab',
+                    'Shift_L', 'Shift_R', 'Control_L', 'Control_R')
+
+    def __init__(self, combobox, worker, owner, lookup, delay=250, on_error=None):
+        self.combobox = combobox
+        self.worker = worker
+        self.owner = owner
+        self.lookup = lookup
+        self.delay = delay
+        self.on_error = on_error
+        self.choices = {}  # "id - label" -> id
+        self._after_id = None
+        self._generation = 0
+        self.combobox.bind('<KeyRelease>', self._on_key, add='+')
+
+    # ---------- Public API ----------
+    def set(self, value_id, label):
+        """Show a known record as the current choice (e.g. when editing)"""
+        text = f"{value_id} - {label}"
+        self.choices[text] = value_id
+        self.combobox.set(text)
+
+    def get_id(self):
+        """Id of the chosen record, or None if the text is not one of the matches"""
+        return self.choices.get(self.combobox.get())
+
+    def set_lookup(self, lookup):
+        """Switch the data source and clear the current text and matches"""
+        self.lookup = lookup
+        self._generation += 1
+        self.choices = {}
+        self.combobox['values'] = []
+        self.combobox.set('')
+
+    # ---------- Internals ----------
+    def _on_key(self, event):
+        if event.keysym in self.IGNORED_KEYS:
+            return
+        if self._after_id is not None:
+            self.combobox.after_cancel(self._after_id)
+        self._after_id = self.combobox.after(self.delay, self._run_lookup)
+
+    def _run_lookup(self):
+        self._after_id = None
+        text = self.combobox.get().strip()
+        if not text or text in self.choices:
+            return
+        self._generation += 1
+        generation = self._generation
+        self.worker.submit(self.lookup, text, owner=self.owner,
+                           on_success=lambda rows: self._show(generation, rows),
+                           on_error=self.on_error)
+
+    def _show(self, generation, rows):
+        if generation != self._generation or not self.combobox.winfo_exists():
+            return
+        self.choices = {f"{row['id']} - {row['label']}": row['id'] for row in rows}
+        self.combobox['values'] = list(self.choices)
+
+
+class ImportDialog:
+    """Pick a CSV/JSON file and run a bulk import with a progress bar.
+
+    ``make_importer(path, progress, cancel_event)`` must return an object
+    whose ``run()`` returns the summary dict of ``importer.Importer``; it is
+    run on the worker and ``on_done(summary)`` is called when it finishes.
+    """
+
+    def __init__(self, root, worker, owner, title, make_importer, on_done=None):
+        path = filedialog.askopenfilename(
+            parent=root, title=title,
+            filetypes=[("Data files", "*.csv *.json *.jsonl *.ndjson"), ("All files", "*.*")])
+        if not path:
+            return
+        self.worker = worker
+        self.on_done = on_done
+        self.cancel_event = threading.Event()
+
+        self.window = tk.Toplevel(root)
+        self.window.title(title)
+        self.window.geometry("420x170")
+        self.window.configure(bg='white')
+        self.window.transient(root)
+        self.window.protocol("WM_DELETE_WINDOW", self.cancel_event.set)
+
+        tk.Label(self.window, text=path, font=('Arial', 10), bg='white', fg='#2c3e50',
+                 wraplength=390).pack(padx=15, pady=(15, 5))
+        self.bar = ttk.Progressbar(self.window, maximum=100, length=380)
+        self.bar.pack(padx=15, pady=5)
+        self.status = tk.Label(self.window, text="Starting...", font=('Arial', 11), bg='white')
+        self.status.pack(pady=5)
+        tk.Button(self.window, text="Stop", font=('Arial', 11), bg='#e74c3c', fg='white', relief='flat',
+                  cursor='hand2', command=self.cancel_event.set).pack(pady=5, ipadx=15)
+
+        importer = make_importer(path, self._progress, self.cancel_event)
+        worker.submit(importer.run, owner=owner, on_success=self._finished,
+                      on_error=lambda e: self._finished(None, e))
+
+    def _progress(self, fraction, imported, rejected):
+        # Called on the worker thread; hand the update to the Tk thread
+        self.worker.post(self._show_progress, fraction, imported, rejected)
+
+    def _show_progress(self, fraction, imported, rejected):
+        if self.window.winfo_exists():
+            self.bar['value'] = fraction * 100
+            self.status.config(text=f"{imported:,} imported, {rejected:,} rejected")
+
+    def _finished(self, summary, error=None):
+        if self.window.winfo_exists():
+            self.window.destroy()
+        if error is not None:
+            messagebox.showerror("Import", f"Import failed: {error}")
+            return
+        message = (f"{summary['imported']:,} records imported, {summary['rejected']:,} rejected "
+                   f"in {summary['seconds']}s.")
+        if summary['cancelled']:
+            message = "Import stopped. " + message
+        if summary['rejected_path']:
+            message += f"\n\nRejected rows were saved to:\n{summary['rejected_path']}"
+        messagebox.showinfo("Import", message)
+        if self.on_done:
+            self.on_done(summary)
+
+
+class ExportDialog:
+    """Choose columns, a date range and a format, then stream an export to a file.
+
+    ``formats`` maps a format name to its file extension.
+    ``make_exporter(path, columns, start_date, end_date, fmt, compress,
+    progress, cancel_event)`` must return an object whose ``run()`` returns
+    the summary dict of ``exporter.Exporter``; it is run on the worker.
+    """
+
+    def __init__(self, root, worker, owner, title, columns, formats, make_exporter, date_label="Date"):
+        self.root = root
+        self.worker = worker
+        self.owner = owner
+        self.title = title
+        self.formats = formats
+        self.make_exporter = make_exporter
+        self.cancel_event = threading.Event()
+
+        self.window = tk.Toplevel(root)
+        self.window.title(title)
+        self.window.geometry("460x560")
+        self.window.configure(bg='white')
+        self.window.transient(root)
+
+        tk.Label(self.window, text="Columns", font=('Arial', 12, 'bold'), bg='white',
+                 fg='#2c3e50').pack(anchor='w', padx=15, pady=(15, 5))
+        columns_frame = tk.Frame(self.window, bg='white')
+        columns_frame.pack(fill='x', padx=15)
+        self.column_vars = {}
+        for i, column in enumerate(columns):
+            var = tk.BooleanVar(value=True)
+            tk.Checkbutton(columns_frame, text=column, variable=var, bg='white',
+                           font=('Arial', 10)).grid(row=i // 2, column=i % 2, sticky='w', padx=5)
+            self.column_vars[column] = var
+
+        range_frame = tk.Frame(self.window, bg='white')
+        range_frame.pack(fill='x', padx=15, pady=15)
+        tk.Label(range_frame, text=f"{date_label} from (YYYY-MM-DD):", font=('Arial', 10),
+                 bg='white').grid(row=0, column=0, sticky='w')
+        self.start_entry = tk.Entry(range_frame, font=('Arial', 10), width=14)
+        self.start_entry.grid(row=0, column=1, padx=5, pady=2)
+        tk.Label(range_frame, text="to:", font=('Arial', 10), bg='white').grid(row=1, column=0, sticky='w')
+        self.end_entry = tk.Entry(range_frame, font=('Arial', 10), width=14)
+        self.end_entry.grid(row=1, column=1, padx=5, pady=2)
+
+        options_frame = tk.Frame(self.window, bg='white')
+        options_frame.pack(fill='x', padx=15)
+        tk.Label(options_frame, text="Format:", font=('Arial', 10), bg='white').pack(side='left')
+        self.format_combo = ttk.Combobox(options_frame, values=list(formats), state='readonly', width=10)
+        self.format_combo.set(next(iter(formats)))
+        self.format_combo.pack(side='left', padx=5)
+        self.compress_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(options_frame, text="Compress (gzip)", variable=self.compress_var, bg='white',
+                       font=('Arial', 10)).pack(side='left', padx=10)
+
+        self.bar = ttk.Progressbar(self.window, mode='indeterminate', length=420)
+        self.bar.pack(padx=15, pady=(20, 5))
+        self.status = tk.Label(self.window, text="", font=('Arial', 11), bg='white')
+        self.status.pack(pady=5)
+
+        buttons_frame = tk.Frame(self.window, bg='white')
+        buttons_frame.pack(pady=10)
+        self.export_button = tk.Button(buttons_frame, text="Export", font=('Arial', 11), bg='#27ae60', fg='white',
+                                       relief='flat', cursor='hand2', command=self._start)
+        self.export_button.pack(side='left', padx=5, ipadx=15)
+        tk.Button(buttons_frame, text="Stop", font=('Arial', 11), bg='#e74c3c', fg='white', relief='flat',
+                  cursor='hand2', command=self.cancel_event.set).pack(side='left', padx=5, ipadx=15)
+        self.window.protocol("WM_DELETE_WINDOW", self._close)
+
+    def _parse_date(self, entry, name):
+        text = entry.get().strip()
+        if not text:
+            return None
+        try:
+            return datetime.strptime(text, "%Y-%m-%d").date()
+        except ValueError:
+            raise ValueError(f"{name} date must be YYYY-MM-DD")
+
+    def _start(self):
+        columns = [c for c, var in self.column_vars.items() if var.get()]
+        if not columns:
+            messagebox.showerror("Export", "Select at least one column", parent=self.window)
+            return
+        try:
+            start_date = self._parse_date(self.start_entry, "From")
+            end_date = self._parse_date(self.end_entry, "To")
+        except ValueError as e:
+            messagebox.showerror("Export", str(e), parent=self.window)
+            return
+        fmt = self.format_combo.get()
+        compress = self.compress_var.get()
+        extension = self.formats[fmt] + (".gz" if compress and fmt != "parquet" else "")
+        path = filedialog.asksaveasfilename(
+            parent=self.window, title=self.title, defaultextension=extension,
+            filetypes=[(fmt.upper(), "*" + extension), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            exporter = self.make_exporter(path, columns, start_date, end_date, fmt, compress,
+                                          self._progress, self.cancel_event)
+        except (ValueError, RuntimeError) as e:
+            messagebox.showerror("Export", str(e), parent=self.window)
+            return
+        self.export_button.config(state='disabled')
+        self.bar.start(10)
+        self.status.config(text="Exporting...")
+        self.worker.submit(exporter.run, owner=self.owner, on_success=self._finished,
+                           on_error=lambda e: self._finished(None, e))
+
+    def _progress(self, rows):
+        # Called on the worker thread; hand the update to the Tk thread
+        self.worker.post(self._show_progress, rows)
+
+    def _show_progress(self, rows):
+        if self.window.winfo_exists():
+            self.status.config(text=f"{rows:,} rows written")
+
+    def _close(self):
+        self.cancel_event.set()
+        self.window.destroy()
+
+    def _finished(self, summary, error=None):
+        if not self.window.winfo_exists():
+            return
+        self.bar.stop()
+        if error is not None:
+            self.export_button.config(state='normal')
+            self.status.config(text="")
+            messagebox.showerror("Export", f"Export failed: {error}", parent=self.window)
+            return
+        message = f"{summary['rows']:,} rows written to\n{summary['path']}\nin {summary['seconds']}s."
+        if summary['cancelled']:
+            message = "Export stopped. " + message
+        self.window.destroy()
+        messagebox.showinfo("Export", message)
+
+
+class ProgressDialog:
+    """Small window showing the progress of a long background task.
+
+    ``fraction`` of None shows an indeterminate bar. ``on_stop`` adds a Stop
+    button (also used when the window is closed).
+    """
+
+    def __init__(self, root, title, text="Starting...", on_stop=None):
+        self.window = tk.Toplevel(root)
+        self.window.title(title)
+        self.window.geometry("420x150")
+        self.window.configure(bg='white')
+        self.window.transient(root)
+        self.window.protocol("WM_DELETE_WINDOW", on_stop or (lambda: None))
+
+        self.bar = ttk.Progressbar(self.window, maximum=100, length=380, mode='indeterminate')
+        self.bar.pack(padx=15, pady=(20, 5))
+        self.bar.start(10)
+        self.status = tk.Label(self.window, text=text, font=('Arial', 11), bg='white', wraplength=390)
+        self.status.pack(pady=5)
+        if on_stop:
+            tk.Button(self.window, text="Stop", font=('Arial', 11), bg='#e74c3c', fg='white', relief='flat',
+                      cursor='hand2', command=on_stop).pack(pady=5, ipadx=15)
+
+    def update(self, text, fraction=None):
+        if not self.window.winfo_exists():
+            return
+        if fraction is not None and self.bar['mode'] != 'determinate':
+            self.bar.stop()
+            self.bar.config(mode='determinate')
+        if fraction is not None:
+            self.bar['value'] = fraction * 100
+        self.status.config(text=text)
+
+    def close(self):
+        if self.window.winfo_exists():
+            self.window.destroy()